@@ -0,0 +1,66 @@
+# benchmark_parsing.py
+"""
+Benchmark: ast.literal_eval per cell vs the movie_parsing column parser.
+
+Builds genres (TMDB JSON) and cast (Python repr) columns with realistic
+repetition, parses them both ways, checks the results agree and prints
+the speedup. Run from the scripts folder:  python benchmark_parsing.py [rows]
+"""
+
+import ast
+import json
+import random
+import sys
+import time
+
+import pandas as pd
+
+import movie_parsing
+from movie_parsing import parse_list_column, to_lists
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama",
+          "Family", "Fantasy", "History", "Horror", "Music", "Mystery", "Romance",
+          "Science Fiction", "TV Movie", "Thriller", "War", "Western"]
+
+
+def make_columns(rows, seed=42):
+    """Genres as TMDB JSON, cast as repr lists drawn from a pool with heavy reuse."""
+    rng = random.Random(seed)
+    actors = [f"Actor {i}" for i in range(max(rows // 2, 10))] + ["Sam O'Neill", "Zoë Saldana"]
+    genres, cast = [], []
+    for _ in range(rows):
+        picked = rng.sample(range(len(GENRES)), rng.randint(0, 4))
+        genres.append(json.dumps([{"id": i, "name": GENRES[i]} for i in picked]))
+        cast.append(repr(rng.sample(actors, rng.randint(0, 12))))
+    return pd.Series(genres), pd.Series(cast)
+
+
+def literal_eval_names(column):
+    """The old path: literal_eval every cell, then pull names out of dicts."""
+    parsed = column.apply(lambda x: ast.literal_eval(x) if pd.notnull(x) else [])
+    return [[i["name"] if isinstance(i, dict) else i for i in cell] for cell in parsed]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    genres, cast = make_columns(rows)
+    print(f"Rows: {rows}  distinct genre strings: {genres.nunique()}  distinct cast strings: {cast.nunique()}")
+
+    for name, column in (("genres (JSON)", genres), ("cast (repr)", cast)):
+        expected, old_time = timed(literal_eval_names, column)
+
+        movie_parsing._parse_text.cache_clear()
+        movie_parsing._names_for_text.cache_clear()
+        (values, offsets), new_time = timed(parse_list_column, column)
+        assert to_lists(values, offsets) == expected, f"{name}: results differ"
+
+        (values, offsets), warm_time = timed(parse_list_column, column)
+
+        print(f"{name:14s} literal_eval: {old_time:7.3f}s   parse_list_column: {new_time:7.3f}s "
+              f"(warm {warm_time:7.3f}s)   speedup: {old_time / new_time:5.1f}x")
@@ -0,0 +1,231 @@
+# benchmark_pipeline.py
+"""
+End-to-end benchmark: load_data, cleaning, the EDA transform, validation, the
+database load and the analysis queries, on synthetic TMDB data
+(movie_synthetic.py) at several scales.
+
+Each stage runs in its own Python process, so its peak RSS is measured on its
+own (resource.getrusage, including any worker processes it started). Results,
+as seconds, rows/sec and peak RSS in MB per scale and stage, are written to
+RESULTS_FILE. With --save-baseline they become the new BASELINE_FILE. Otherwise
+they are compared with the saved baseline, and any stage that got slower or
+bigger by more than the tolerance is flagged (exit status 1).
+
+Run from the scripts folder:
+    python benchmark_pipeline.py                  # 5k and 50k
+    python benchmark_pipeline.py 5k 50k 500k 5m --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from movie_synthetic import SCALES, generate, parse_scale
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join("..", "data", "benchmark")
+BASELINE_FILE = os.path.join("..", "data", "benchmark_baseline.json")
+RESULTS_FILE = os.path.join("..", "data", "benchmark_latest.json")
+DEFAULT_SCALES = ["5k", "50k"]
+REGRESSION_TOLERANCE = 0.20  # flag >20% fewer rows/sec or >20% more peak RSS
+
+STAGES = ["load_data", "clean", "transform", "validate", "load", "analysis"]
+
+# The reports' queries: raw joins over the fact/link tables and the summary lookups
+ANALYSIS_QUERIES = [
+    "SELECT title, release_year, budget, revenue, profit, runtime, director_text FROM movies",
+    """SELECT g.name AS genre, COUNT(mg.movie_id) AS movie_count
+       FROM genres g JOIN movie_genres mg ON g.id = mg.genre_id
+       GROUP BY g.name ORDER BY movie_count DESC LIMIT 10""",
+    """SELECT g.name AS genre, ROUND(AVG(m.vote_average), 2) AS avg_rating
+       FROM movies m JOIN movie_genres mg ON m.id = mg.movie_id JOIN genres g ON g.id = mg.genre_id
+       GROUP BY g.name ORDER BY avg_rating DESC LIMIT 10""",
+    "SELECT name, movie_count FROM genre_summary ORDER BY movie_count DESC LIMIT 10",
+    "SELECT release_year, avg_profit FROM year_summary ORDER BY release_year",
+    "SELECT director_text, avg_profit FROM director_summary ORDER BY avg_profit DESC LIMIT 10",
+]
+
+
+def _paths(data_dir):
+    return dict(movies=os.path.join(data_dir, "tmdb_5000_movies.csv"),
+                credits=os.path.join(data_dir, "tmdb_5000_credits.csv"),
+                cleaned=os.path.join(data_dir, "movies_cleaned.store"),
+                transformed=os.path.join(data_dir, "movies_transformed.store"),
+                validated=os.path.join(data_dir, "movies_validated.store"),
+                quarantine=os.path.join(data_dir, "movies_quarantine.store"),
+                db=os.path.join(data_dir, "movies.db"),
+                dimension_cache=os.path.join(data_dir, "movies_dimensions.json"))  # movie_dimensions.cache_path_for
+
+
+def run_stage(stage, data_dir):
+    """Child side: run one stage against data_dir and return the rows it handled."""
+    paths = _paths(data_dir)
+    if stage == "load_data":
+        from movie_ingestion import load_data
+        movies_df, _ = load_data(paths["movies"], paths["credits"])
+        return len(movies_df)
+    if stage == "clean":
+        from movie_cleaning import write_cleaned
+        from movie_ingestion import load_data_chunks
+        return write_cleaned(load_data_chunks(10_000, paths["movies"], paths["credits"]), paths["cleaned"])
+    if stage == "transform":
+        from movie_eda import run_transform
+        return run_transform(paths["cleaned"], paths["transformed"])
+    if stage == "validate":
+        from movie_validation import run_validation
+        return run_validation(paths["transformed"], paths["validated"], paths["quarantine"])
+    if stage == "load":
+        from movie_load import read_transformed, run_load
+        from movie_store import read_table
+        for path in (paths["db"], paths["dimension_cache"]):
+            if os.path.exists(path):
+                os.remove(path)
+        count, _ = run_load(read_transformed(paths["validated"]), f"sqlite:///{paths['db']}",
+                            "full", paths["dimension_cache"], quarantined=read_table(paths["quarantine"]))
+        return count
+    if stage == "analysis":
+        from movie_query_cache import run_query
+        frames = [run_query(paths["db"], sql, cache=False) for sql in ANALYSIS_QUERIES]
+        return len(frames[0])
+    raise ValueError(f"Unknown stage {stage!r}")
+
+
+def _peak_rss_mb():
+    """Peak RSS of this process (and of any workers it waited for), in MB."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # kilobytes on Linux, bytes on macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        # Linux keeps ru_maxrss across exec (the parent's size would leak in);
+        # VmHWM starts fresh with the new program
+        with open("/proc/self/status", encoding="ascii") as f:
+            own = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        pass
+    return max(own, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / unit
+
+
+def measure(stage, data_dir, verbose=False):
+    """Run a stage in a fresh interpreter; returns its metrics dict."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--stage", stage,
+                        "--data", os.path.abspath(data_dir), "--result", result_path],
+                       cwd=SCRIPTS_DIR, check=True,
+                       stdout=None if verbose else subprocess.DEVNULL)
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def _child(stage, data_dir, result_path):
+    started = time.perf_counter()
+    rows = run_stage(stage, data_dir)
+    seconds = time.perf_counter() - started
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(dict(rows=rows, seconds=round(seconds, 4),
+                       rows_per_sec=round(rows / seconds, 1) if seconds else None,
+                       peak_rss_mb=_peak_rss_mb()), f)
+
+
+def benchmark(scale, verbose=False):
+    rows = parse_scale(scale)
+    data_dir = os.path.join(BENCH_DIR, scale.lower())
+    if not os.path.exists(_paths(data_dir)["credits"]):
+        print(f"Generating {rows} synthetic movies in {data_dir}")
+        generate(rows, data_dir)
+    results = {}
+    for stage in STAGES:
+        metrics = measure(stage, data_dir, verbose)
+        results[stage] = metrics
+        rss = f"{metrics['peak_rss_mb']:.0f} MB" if metrics["peak_rss_mb"] is not None else "n/a"
+        print(f"  {scale:>5s} {stage:10s} {metrics['seconds']:9.2f}s {metrics['rows_per_sec'] or 0:12.0f} rows/s  "
+              f"peak RSS {rss}")
+    return results
+
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Lines describing every stage that regressed against the baseline."""
+    regressions = []
+    for scale, stages in results.items():
+        for stage, now in stages.items():
+            before = baseline.get(scale, {}).get(stage)
+            if not before:
+                continue
+            if before.get("rows_per_sec") and now.get("rows_per_sec") is not None \
+                    and now["rows_per_sec"] < before["rows_per_sec"] * (1 - tolerance):
+                regressions.append(f"{scale} {stage}: {now['rows_per_sec']:.0f} rows/s "
+                                   f"(baseline {before['rows_per_sec']:.0f})")
+            if before.get("peak_rss_mb") and now.get("peak_rss_mb") is not None \
+                    and now["peak_rss_mb"] > before["peak_rss_mb"] * (1 + tolerance):
+                regressions.append(f"{scale} {stage}: peak RSS {now['peak_rss_mb']:.0f} MB "
+                                   f"(baseline {before['peak_rss_mb']:.0f} MB)")
+    return regressions
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic data.")
+    parser.add_argument("scales", nargs="*", default=DEFAULT_SCALES,
+                        help=f"row counts, e.g. {' '.join(SCALES)} (default: {' '.join(DEFAULT_SCALES)})")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--clean-up", action="store_true", help="delete the generated data afterwards")
+    parser.add_argument("--verbose", action="store_true", help="show the stages' own output")
+    parser.add_argument("--stage", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        _child(args.stage, args.data, args.result)
+        sys.exit(0)
+
+    results = {}
+    for scale in args.scales:
+        results[scale.lower()] = benchmark(scale, args.verbose)
+        if args.clean_up:
+            shutil.rmtree(os.path.join(BENCH_DIR, scale.lower()), ignore_errors=True)
+
+    payload = dict(machine=dict(python=platform.python_version(), platform=platform.platform(),
+                                cpus=os.cpu_count()),
+                   recorded=time.strftime("%Y-%m-%d %H:%M:%S"), results=results)
+    _write_json(RESULTS_FILE, payload)
+    print("Results written to", RESULTS_FILE)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE_FILE):
+            with open(BASELINE_FILE, encoding="utf-8") as f:
+                baseline = json.load(f).get("results", {})
+        baseline.update(results)
+        _write_json(BASELINE_FILE, dict(payload, results=baseline))
+        print("Baseline saved to", BASELINE_FILE)
+    elif os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f).get("results", {}), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("No regressions against", BASELINE_FILE)
+    else:
+        print("No baseline yet; run with --save-baseline to record one")
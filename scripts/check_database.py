@@ -1,24 +1,35 @@
 # check_database.py
 
 import sqlite3
+import sys
 import pandas as pd
 
+from movie_profile import load_profile, print_profile
+
+DB_PATH = "../data/movies.db"
+# --profile: null rates, distinct counts, quantiles and frequent values of every
+# column, from one streaming pass (or the saved profile), instead of steps 2-3
+PROFILE = "--profile" in sys.argv
+
 # Connect to the SQLite database
-conn = sqlite3.connect("../data/movies.db")
+conn = sqlite3.connect(DB_PATH)
 
 # Step 1: List all tables
 tables = pd.read_sql_query("SELECT name FROM sqlite_master WHERE type='table';", conn)
 print("Tables in the database:")
 print(tables)
 
-# Step 2: See first few rows from the main 'movies' table
-print("\n Sample records from 'movies' table:")
-movies_sample = pd.read_sql_query("SELECT * FROM movies LIMIT 5;", conn)
-print(movies_sample)
-
-# Step 3: Check number of rows
-row_count = pd.read_sql_query("SELECT COUNT(*) AS total_movies FROM movies;", conn)
-print("\n Total rows in 'movies' table:", row_count.iloc[0]['total_movies'])
+if PROFILE:
+    print_profile(load_profile(DB_PATH))
+else:
+    # Step 2: See first few rows from the main 'movies' table
+    print("\n Sample records from 'movies' table:")
+    movies_sample = pd.read_sql_query("SELECT * FROM movies LIMIT 5;", conn)
+    print(movies_sample)
+
+    # Step 3: Check number of rows
+    row_count = pd.read_sql_query("SELECT COUNT(*) AS total_movies FROM movies;", conn)
+    print("\n Total rows in 'movies' table:", row_count.iloc[0]['total_movies'])
 
 # Step 4 (optional): Explore other tables if you created normalized ones
 # e.g. genres, directors, cast tables
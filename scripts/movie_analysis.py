@@ -1,56 +1,143 @@
-import sqlite3
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
+from sqlalchemy.exc import OperationalError
 
-# Connect to the database
-conn = sqlite3.connect("../data/movies.db")
-
-# Read movies data into a DataFrame
-query = "SELECT title, release_year, budget, revenue, profit, runtime, director_text FROM movies"
-df = pd.read_sql_query(query, conn)
-
-# Close connection
-conn.close()
-
-# Basic data overview
-print("Data Loaded Successfully")
-print(df.head())
-
-# Convert datatypes if necessary
-df["budget"] = pd.to_numeric(df["budget"], errors="coerce")
-df["revenue"] = pd.to_numeric(df["revenue"], errors="coerce")
-df["profit"] = pd.to_numeric(df["profit"], errors="coerce")
-df["release_year"] = pd.to_numeric(df["release_year"], errors="coerce")
-
-# Drop missing data for safety
-df = df.dropna(subset=["budget", "revenue", "profit", "release_year"])
-
-# 🎯 1. Budget vs Revenue trend
-plt.figure(figsize=(8, 5))
-plt.scatter(df["budget"], df["revenue"], alpha=0.5, color="blue")
-plt.title("Movie Budget vs Revenue")
-plt.xlabel("Budget")
-plt.ylabel("Revenue")
-plt.grid(True)
-plt.show()
-
-# 🎯 2. Profit trend over years
-profit_by_year = df.groupby("release_year")["profit"].mean().reset_index()
-plt.figure(figsize=(8, 5))
-plt.plot(profit_by_year["release_year"], profit_by_year["profit"], color="green", marker="o")
-plt.title("Average Movie Profit Over Years")
-plt.xlabel("Year")
-plt.ylabel("Average Profit")
-plt.grid(True)
-plt.show()
-
-# 🎯 3. Top 10 directors by average profit
-director_profit = df.groupby("director_text")["profit"].mean().sort_values(ascending=False).head(10)
-plt.figure(figsize=(9, 5))
-director_profit.plot(kind="bar", color="orange")
-plt.title("Top 10 Directors by Average Profit")
-plt.ylabel("Average Profit")
-plt.xlabel("Director")
-plt.xticks(rotation=45, ha="right")
-plt.tight_layout()
-plt.show()
+from movie_instrumentation import stage, write_metrics
+from movie_partitions import query_years
+from movie_plots import analysis_charts, render_charts, yearly
+from movie_query_cache import run_query
+
+DB_PATH = "../data/movies.db"
+# "binned": charts from aggregates computed in SQL (movie_plots.py); "points": every row via pandas
+PLOT_MODE = "binned"
+
+
+def load_movies(db_path=DB_PATH, start_year=None, end_year=None):
+    """Read the movie facts used by the analysis from the database (all years, or a range)."""
+    # Read movies data into a DataFrame (cached until the database changes)
+    columns = "title, release_year, budget, revenue, profit, runtime, director_text"
+    if start_year is None and end_year is None:
+        df = run_query(db_path, f"SELECT {columns} FROM movies")
+    else:
+        # with PARTITION_FACTS, only the year partitions overlapping the range are read
+        df = query_years(db_path, f"SELECT {columns} FROM {{movie_facts}} "
+                                  "WHERE release_year BETWEEN :start_year AND :end_year", start_year, end_year)
+
+    # Convert datatypes if necessary
+    df["budget"] = pd.to_numeric(df["budget"], errors="coerce")
+    df["revenue"] = pd.to_numeric(df["revenue"], errors="coerce")
+    df["profit"] = pd.to_numeric(df["profit"], errors="coerce")
+    df["release_year"] = pd.to_numeric(df["release_year"], errors="coerce")
+
+    # Drop missing data for safety
+    return df.dropna(subset=["budget", "revenue", "profit", "release_year"])
+
+
+def read_summary(db_path, query):
+    """Query a summary table kept by movie_load.py; None if the database predates them."""
+    try:
+        return run_query(db_path, query)
+    except OperationalError:
+        return None
+
+
+def profit_by_year(df, db_path=DB_PATH):
+    """Average profit per year: the summary table, else df (or SQL when df is None)."""
+    summary = read_summary(db_path, "SELECT release_year, avg_profit AS profit FROM year_summary ORDER BY release_year")
+    if summary is not None:
+        return summary
+    if df is None:
+        return yearly(db_path, "profit")[["release_year", "profit"]]
+    return df.groupby("release_year")["profit"].mean().reset_index()
+
+
+def top_directors(df, db_path=DB_PATH, n=10):
+    """Directors with the highest average profit: the summary table, else df (or SQL when df is None)."""
+    summary = read_summary(db_path, "SELECT director_text, avg_profit AS profit FROM director_summary "
+                                    f"ORDER BY avg_profit DESC LIMIT {int(n)}")
+    if summary is not None:
+        return summary.set_index("director_text")["profit"]
+    if df is None:
+        return run_query(db_path, "SELECT director_text, AVG(profit) AS profit FROM movies "
+                                  "WHERE release_year IS NOT NULL AND profit IS NOT NULL AND director_text IS NOT NULL "
+                                  f"GROUP BY director_text ORDER BY profit DESC LIMIT {int(n)}"
+                         ).set_index("director_text")["profit"]
+    return df.groupby("director_text")["profit"].mean().sort_values(ascending=False).head(n)
+
+
+def plot_analysis(df, db_path=DB_PATH, out_dir=None):
+    """Draw the three charts; shown interactively, or saved as PNGs into out_dir."""
+    def finish(name):
+        if out_dir:
+            plt.savefig(os.path.join(out_dir, name))
+            plt.close()
+        else:
+            plt.show()
+
+    # 🎯 1. Budget vs Revenue trend
+    plt.figure(figsize=(8, 5))
+    plt.scatter(df["budget"], df["revenue"], alpha=0.5, color="blue")
+    plt.title("Movie Budget vs Revenue")
+    plt.xlabel("Budget")
+    plt.ylabel("Revenue")
+    plt.grid(True)
+    finish("budget_vs_revenue.png")
+
+    # 🎯 2. Profit trend over years
+    yearly = profit_by_year(df, db_path)
+    plt.figure(figsize=(8, 5))
+    plt.plot(yearly["release_year"], yearly["profit"], color="green", marker="o")
+    plt.title("Average Movie Profit Over Years")
+    plt.xlabel("Year")
+    plt.ylabel("Average Profit")
+    plt.grid(True)
+    finish("profit_by_year.png")
+
+    # 🎯 3. Top 10 directors by average profit
+    director_profit = top_directors(df, db_path)
+    plt.figure(figsize=(9, 5))
+    director_profit.plot(kind="bar", color="orange")
+    plt.title("Top 10 Directors by Average Profit")
+    plt.ylabel("Average Profit")
+    plt.xlabel("Director")
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+    finish("top_directors.png")
+
+
+def run_analysis(db_path=DB_PATH, out_dir="../data/analysis", plot_mode=PLOT_MODE):
+    """
+    Non-interactive analysis: result tables as CSV and charts as PNG in out_dir.
+    In "binned" mode no movie rows are read: the charts are drawn from SQL
+    aggregates and rendered in worker processes (see movie_plots.py).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with stage("analysis") as s:
+        df = load_movies(db_path) if plot_mode == "points" else None
+        yearly_profit = profit_by_year(df, db_path)
+        director_profit = top_directors(df, db_path)
+        yearly_profit.to_csv(os.path.join(out_dir, "profit_by_year.csv"), index=False)
+        director_profit.reset_index().to_csv(os.path.join(out_dir, "top_directors.csv"), index=False)
+        if df is None:
+            charts = analysis_charts(db_path, out_dir, yearly_profit, director_profit)
+            render_charts(charts)
+            movies = int(charts[0]["counts"].sum())  # every analysed movie is in one grid cell
+        else:
+            plot_analysis(df, db_path, out_dir)
+            movies = len(df)
+        s.rows_in = s.rows_out = movies
+    print("Analysis written to", out_dir)
+
+
+if __name__ == "__main__":
+    with stage("analysis.load_movies") as s:
+        df = load_movies()
+        s.rows_out = len(df)
+
+    # Basic data overview
+    print("Data Loaded Successfully")
+    print(df.head())
+
+    plot_analysis(df)
+    write_metrics("movie_analysis")
@@ -2,8 +2,11 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 import matplotlib.pyplot as plt
 
+from movie_instrumentation import instrument_engine, write_metrics
+from movie_query_cache import run_query as cached_query
+
 # Connect to your SQLite database
-engine = create_engine("sqlite:///../data/movies.db")
+engine = instrument_engine(create_engine("sqlite:///../data/movies.db"))
 # Check columns available in 'movies' table
 # Check what columns are available in 'movies' table
 with engine.connect() as conn:
@@ -12,18 +15,15 @@ with engine.connect() as conn:
     print(df_columns[['name', 'type']])
 
 # Helper function to run SQL and return DataFrame
-def run_query(sql):
-    with engine.connect() as conn:
-        df = pd.read_sql(text(sql), conn)
-    return df
+# (results are cached until the database changes, see movie_query_cache.py)
+def run_query(sql, params=None):
+    return cached_query(engine, sql, params)
 
 
-# Top 10 genres by movie count
+# Top 10 genres by movie count (genre_summary is maintained by movie_load.py)
 query_genres = """
-SELECT g.name AS genre, COUNT(mg.movie_id) AS movie_count
-FROM genres g
-JOIN movie_genres mg ON g.id = mg.genre_id
-GROUP BY g.name
+SELECT name AS genre, movie_count
+FROM genre_summary
 ORDER BY movie_count DESC
 LIMIT 10;
 """
@@ -41,13 +41,11 @@ plt.tight_layout()
 plt.show()
 
 
-# Average popularity by genre
+# Average rating by genre
 query_rating = """
-SELECT g.name AS genre, ROUND(AVG(m.vote_average), 2) AS avg_rating
-FROM movies m
-JOIN movie_genres mg ON m.id = mg.movie_id
-JOIN genres g ON g.id = mg.genre_id
-GROUP BY g.name
+SELECT name AS genre, ROUND(avg_rating, 2) AS avg_rating
+FROM genre_summary
+WHERE avg_rating IS NOT NULL
 ORDER BY avg_rating DESC
 LIMIT 10;
 """
@@ -56,10 +54,12 @@ print("\nTop Genres by Average Rating:")
 print(df_rating)
 
 plt.figure(figsize=(10,5))
-plt.barh(df_pop['genre'], df_pop['avg_popularity'], color='orange')
+plt.barh(df_rating['genre'], df_rating['avg_rating'], color='orange')
 plt.gca().invert_yaxis()
-plt.title("Top 10 Genres by Average Popularity")
-plt.xlabel("Average Popularity")
+plt.title("Top 10 Genres by Average Rating")
+plt.xlabel("Average Rating")
 plt.ylabel("Genre")
 plt.tight_layout()
 plt.show()
+
+write_metrics("movie_analysis_old")
@@ -0,0 +1,47 @@
+# movie_cdc.py
+"""
+Change-data-capture helpers for incremental loads.
+
+Every transformed movie row gets a 64-bit content hash, computed for a whole
+batch at once with pandas' vectorised hash_pandas_object. movie_load.py keeps
+the hash of each loaded movie in the `movie_hashes` table, so a refresh only
+has to rewrite the movies whose hash changed (or that are new) and delete the
+ones that disappeared from the input.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Columns added by the loader itself, not part of the movie's content
+IGNORED_COLUMNS = {"release_date_parsed"}
+
+
+def _normalise(series):
+    """
+    Give a column the same representation whatever the input format was
+    (CSV text, columnar store, in-memory stream), so its hash is stable.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.dt.strftime("%Y-%m-%d")
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+        return series.astype("float64")
+    # list cells hash as their repr, which is also what a CSV hand-off stores
+    return series.map(lambda v: repr(list(v)) if isinstance(v, (list, tuple, np.ndarray)) else v)
+
+
+def content_hashes(frame):
+    """One signed 64-bit hash per row (fits an SQLite INTEGER), over all content columns."""
+    columns = sorted(c for c in frame.columns if c not in IGNORED_COLUMNS)
+    normalised = pd.DataFrame({c: _normalise(frame[c]) for c in columns}, index=frame.index)
+    return pd.util.hash_pandas_object(normalised, index=False).to_numpy().view(np.int64)
+
+
+def split_changes(ids, hashes, stored):
+    """
+    Compare a batch against the stored hashes.
+    ids, hashes: arrays for the batch; stored: dict movie_id -> hash.
+    Returns boolean masks (new, changed).
+    """
+    old = np.fromiter((stored.get(i, 0) for i in ids.tolist()), dtype=np.int64, count=len(ids))
+    known = np.fromiter((i in stored for i in ids.tolist()), dtype=bool, count=len(ids))
+    return ~known, known & (old != hashes)
@@ -1,19 +1,78 @@
-import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy import text
+import os
 
-# Step 1: Read cleaned CSV
-cleaned_file = "cleaned_movies.csv"
-df = pd.read_csv(cleaned_file)
+from movie_credits import join_credits
+from movie_ingestion import DATA_DIR, MOVIES_TEXT_COLUMNS, load_data_chunks
+from movie_instrumentation import stage, write_metrics
+from movie_store import StoreWriter
 
-# Step 2: Connect to SQLite
-engine = create_engine("sqlite:///movie_data.db")
+# Output of the cleaning stage (input of movie_eda.py): a typed columnar store,
+# plus an optional CSV export
+CLEANED_STORE = os.path.join(DATA_DIR, "movies_cleaned.store")
+CLEANED_FILE = os.path.join(DATA_DIR, "movies_cleaned.csv")
+EXPORT_CSV = False
 
-# Step 3: Load DataFrame into database
-df.to_sql("movies", con=engine, if_exists="replace", index=False)
+# Explicit types for columns a single chunk can get wrong (all-NaN text -> float)
+TEXT_COLUMNS = MOVIES_TEXT_COLUMNS + ["cast", "directors", "director"]
+CLEANED_DTYPES = dict({c: "string" for c in TEXT_COLUMNS},
+                      budget="float64", revenue="float64", runtime="float64",
+                      popularity="float64", vote_average="float64", vote_count="float64")
 
-# Step 4: Verify
-with engine.connect() as connection:
-    result = connection.execute(text("SELECT COUNT(*) FROM movies"))
-    total = result.scalar_one()   # scalar_one() returns the single value (COUNT)
-    print("Total rows in movies table:", total)
+
+def clean_movies(movies_df, credits_df=None, seen_ids=None):
+    """
+    Cleans one movies frame (a whole file or a single chunk):
+    drops rows without id/title and duplicate ids, fills missing money columns
+    and joins the credits' cast and directors (see movie_credits.py).
+    seen_ids: set shared across chunks so a duplicate id in a later chunk is dropped too.
+    """
+    df = movies_df.copy()
+    if credits_df is not None:
+        df = join_credits(df, credits_df)
+
+    df = df.dropna(subset=["id", "title"])
+    df = df.drop_duplicates(subset="id", keep="first")
+    if seen_ids is not None:
+        df = df[~df["id"].isin(seen_ids)]
+        seen_ids.update(df["id"].tolist())
+
+    df["title"] = df["title"].str.strip()
+    for col in ("budget", "revenue"):
+        if col in df.columns:
+            df[col] = df[col].fillna(0)
+    return df
+
+
+def clean_chunks(chunks):
+    """Generator version of clean_movies over load_data_chunks() output."""
+    seen_ids = set()
+    for movies_chunk, credits_chunk in chunks:
+        yield clean_movies(movies_chunk, credits_chunk, seen_ids)
+
+
+def write_cleaned(chunks, store_path=CLEANED_STORE, csv_path=None):
+    """
+    Cleans (movies_chunk, credits_chunk) pairs and appends each cleaned chunk to
+    the store at store_path (and to csv_path when given). Returns the row count.
+    """
+    def counted(pairs, record):
+        for movies_chunk, credits_chunk in pairs:
+            record.rows_in = (record.rows_in or 0) + len(movies_chunk)
+            yield movies_chunk, credits_chunk
+
+    total = 0
+    with stage("clean") as s, StoreWriter(store_path, CLEANED_DTYPES) as store:
+        for i, chunk in enumerate(clean_chunks(counted(chunks, s))):
+            store.append(chunk)
+            if csv_path:
+                chunk.to_csv(csv_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+            total += len(chunk)
+            print(f"{total} cleaned movies written")
+        s.rows_out = total
+    return total
+
+
+if __name__ == "__main__":
+    # Stream the raw CSVs and append each cleaned chunk to the store (and CSV export)
+    write_cleaned(load_data_chunks(), CLEANED_STORE, CLEANED_FILE if EXPORT_CSV else None)
+    print("Cleaned dataset saved as", CLEANED_STORE)
+    write_metrics("movie_cleaning")
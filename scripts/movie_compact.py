@@ -0,0 +1,275 @@
+# movie_compact.py
+"""
+Compact in-memory representation of the movie data (EDA transform -> load).
+
+List columns (genres, cast, directors) are dictionary-coded CSR arrays
+instead of object columns of Python lists of Python strings:
+    codes       int32 code of every item, row after row
+    offsets     int64, row i owns codes[offsets[i]:offsets[i + 1]]
+    dictionary  object array of the distinct names; codes index into it
+A reference costs 4 bytes (plus 8 per row for the offsets) instead of a list
+object and a pointer per item. Slices and row selections share the
+dictionary instead of copying names.
+
+CompactMovies pairs those CodedLists with a DataFrame of the scalar columns,
+whose dtypes are shrunk by compact_dtypes(): integers (and floats that only
+hold whole numbers, e.g. budget or release_year) become the smallest integer
+dtype that fits, nullable where there are gaps, and repetitive text columns
+(main_genre, director, original_language, ...) become categoricals.
+from_frame() / to_frame() convert to and from ordinary DataFrames with list
+cells, so CSV input and export keep working.
+"""
+
+import numpy as np
+import pandas as pd
+
+from movie_parsing import parse_list_column
+
+# text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+_INT_TYPES = [(np.int8, "Int8"), (np.int16, "Int16"), (np.int32, "Int32"), (np.int64, "Int64")]
+
+
+def _gather(offsets, rows):
+    """Item positions of the given rows, and the new offsets for them."""
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = offsets[:-1][rows]
+    lengths = offsets[1:][rows] - starts
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1], dtype=np.int64)
+    return positions, new_offsets
+
+
+class CodedLists:
+    """One list column as int32 codes into a shared name dictionary, CSR style."""
+
+    __slots__ = ("codes", "offsets", "dictionary")
+
+    def __init__(self, codes, offsets, dictionary):
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.dictionary = np.asarray(dictionary, dtype=object)
+
+    @classmethod
+    def from_values(cls, values, offsets):
+        """From a flat values array + offsets (parse_list_column output)."""
+        codes, dictionary = pd.factorize(np.asarray(values, dtype=object))
+        return cls(codes, offsets, dictionary)
+
+    @classmethod
+    def from_series(cls, series, key="name"):
+        """
+        Parse a column of list-like cells (list reprs, JSON, lists, plain names).
+        Categoricals are parsed once per category.
+        """
+        series = pd.Series(series)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # parse only the categories in use (a slice can share a store-wide dictionary)
+            codes = series.cat.codes.to_numpy()
+            used, rows = np.unique(codes, return_inverse=True)
+            present = used >= 0
+            categories = series.cat.categories.to_numpy(dtype=object)[used[present]]
+            lists = cls.from_values(*parse_list_column(pd.Series(categories, dtype=object), key))
+            if not present.all():
+                # the missing category (-1, sorted first) becomes an empty list
+                lists = cls(lists.codes, np.insert(lists.offsets, 0, 0), lists.dictionary)
+            return lists.take(rows.ravel())
+        return cls.from_values(*parse_list_column(series, key))
+
+    @classmethod
+    def concat(cls, parts):
+        """Stack row-wise; the dictionaries are merged and the codes remapped."""
+        parts = list(parts)
+        if not parts:
+            return cls(np.empty(0, np.int32), np.zeros(1, np.int64), np.empty(0, object))
+        if all(p.dictionary is parts[0].dictionary for p in parts):
+            dictionary, remaps = parts[0].dictionary, [None] * len(parts)
+        else:
+            merged = pd.Index(np.concatenate([p.dictionary for p in parts])).unique()
+            dictionary = np.asarray(merged, dtype=object)
+            remaps = [merged.get_indexer(p.dictionary).astype(np.int32) for p in parts]
+        codes = np.concatenate([p.codes if m is None else m[p.codes] for p, m in zip(parts, remaps)])
+        lengths = np.concatenate([np.diff(p.offsets) for p in parts])
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(codes, offsets, dictionary)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        names = sum(len(n) for n in self.dictionary.tolist()) + 56 * len(self.dictionary)
+        return self.codes.nbytes + self.offsets.nbytes + self.dictionary.nbytes + names
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def row_index(self):
+        """Row number of every item (parallel to codes)."""
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.lengths())
+
+    def positions(self):
+        """Position of every item within its row."""
+        return np.arange(len(self.codes), dtype=np.int64) - np.repeat(self.offsets[:-1], self.lengths())
+
+    def take(self, rows):
+        """The given rows (positions), sharing the dictionary."""
+        positions, offsets = _gather(self.offsets, rows)
+        return CodedLists(self.codes[positions], offsets, self.dictionary)
+
+    def slice(self, start, stop):
+        stop = min(stop, len(self))
+        first, last = int(self.offsets[start]), int(self.offsets[stop])
+        return CodedLists(self.codes[first:last], self.offsets[start:stop + 1] - first, self.dictionary)
+
+    def head(self, limit):
+        """First `limit` items of every row."""
+        lengths = np.minimum(self.lengths(), limit)
+        keep = self.positions() < np.repeat(lengths, self.lengths())
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return CodedLists(self.codes[keep], offsets, self.dictionary)
+
+    def first(self):
+        """First item of each row as a Categorical (NaN for empty rows)."""
+        lengths = self.lengths()
+        codes = np.full(len(lengths), -1, dtype=np.int32)
+        codes[lengths > 0] = self.codes[self.offsets[:-1][lengths > 0]]
+        return pd.Categorical.from_codes(codes, categories=pd.Index(self.dictionary, dtype=object))
+
+    def names(self):
+        """Flat object array of every item's name."""
+        return self.dictionary[self.codes]
+
+    def to_lists(self):
+        names = self.names()
+        bounds = self.offsets.tolist()
+        return [names[s:e].tolist() for s, e in zip(bounds[:-1], bounds[1:])]
+
+    def fill(self, rows, other):
+        """Replace the given rows (positions) with other's rows, in order."""
+        merged = CodedLists.concat([self, other])
+        order = np.arange(len(self), dtype=np.int64)
+        order[rows] = len(self) + np.arange(len(other), dtype=np.int64)
+        return merged.take(order)
+
+    def coalesce(self, other):
+        """Per row: this row's items, or other's when this row is empty."""
+        empty = np.flatnonzero(self.lengths() == 0)
+        return self.fill(empty, other.take(empty)) if len(empty) else self
+
+
+# -----------------------------
+# Scalar columns
+# -----------------------------
+def _smallest_int(values, nullable):
+    low, high = (values.min(), values.max()) if len(values) else (0, 0)
+    for np_type, pd_type in _INT_TYPES:
+        info = np.iinfo(np_type)
+        if info.min <= low and high <= info.max:
+            return pd_type if nullable else np_type
+    return "Int64" if nullable else np.int64
+
+
+def compact_series(series, category_max_ratio=CATEGORY_MAX_RATIO):
+    """One column in its compact dtype (unchanged when nothing smaller is lossless)."""
+    if isinstance(series.dtype, pd.Float64Dtype):
+        # nullable floats come from mixing Int and float parts; plain float64 with NaN is smaller
+        series = series.astype("float64")
+    dtype = series.dtype
+    if not len(series) or isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_float_dtype(dtype):
+        valid = series.dropna().to_numpy(dtype="float64")
+        if pd.api.types.is_float_dtype(dtype) and not (np.isfinite(valid).all() and (valid == np.round(valid)).all()):
+            return series  # real fractions (vote_average, popularity) keep their precision
+        if len(valid) and (valid.min() < np.iinfo(np.int64).min or valid.max() > np.iinfo(np.int64).max):
+            return series
+        has_gaps = len(valid) < len(series)
+        return series.astype(_smallest_int(valid, has_gaps))
+    if category_max_ratio > 0 and pd.api.types.infer_dtype(series, skipna=True) == "string":
+        if series.nunique() <= category_max_ratio * len(series):
+            return series.astype("category")
+    return series
+
+
+def compact_dtypes(df, category_max_ratio=CATEGORY_MAX_RATIO):
+    """Copy of df with every column in its compact dtype (see compact_series)."""
+    out = df.copy(deep=False)  # only the converted columns get new arrays
+    for name in df.columns:
+        compacted = compact_series(df[name], category_max_ratio)
+        if compacted is not df[name]:
+            out[name] = compacted
+    return out
+
+
+# -----------------------------
+# Whole datasets
+# -----------------------------
+class CompactMovies:
+    """A DataFrame of scalar columns plus CodedLists for the list columns, row-aligned."""
+
+    def __init__(self, frame, lists=None):
+        self.frame = frame
+        self.lists = dict(lists or {})
+
+    @classmethod
+    def from_frame(cls, df, list_columns, key="name", category_max_ratio=CATEGORY_MAX_RATIO):
+        """Code the list_columns present in df and compact the rest."""
+        present = [c for c in list_columns if c in df.columns]
+        lists = {c: CodedLists.from_series(df[c], key) for c in present}
+        frame = compact_dtypes(df.drop(columns=present), category_max_ratio)
+        return cls(frame, lists)
+
+    def to_frame(self):
+        """Ordinary DataFrame with Python list cells, in the stored column order."""
+        df = self.frame.copy()
+        for name, coded in self.lists.items():
+            df[name] = pd.Series(coded.to_lists(), index=df.index, dtype=object)
+        return df
+
+    @classmethod
+    def concat(cls, parts):
+        parts = list(parts)
+        frame = pd.concat([p.frame for p in parts])
+        for name in frame.columns:
+            pieces = [p.frame[name] for p in parts]
+            if all(s.dtype == frame[name].dtype for s in pieces):
+                continue
+            # parts compacted on their own can disagree (Int8 vs float64, other categories)
+            if all(isinstance(s.dtype, pd.CategoricalDtype) for s in pieces):
+                frame[name] = pd.api.types.union_categoricals(pieces, ignore_order=True)
+            else:
+                frame[name] = compact_series(frame[name])
+        lists = {name: CodedLists.concat([p.lists[name] for p in parts]) for name in parts[0].lists}
+        return cls(frame, lists)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def columns(self):
+        return list(self.frame.columns) + list(self.lists)
+
+    @property
+    def nbytes(self):
+        return int(self.frame.memory_usage(deep=True).sum()) + sum(c.nbytes for c in self.lists.values())
+
+    def slice(self, start, stop):
+        return CompactMovies(self.frame.iloc[start:stop],
+                             {n: c.slice(start, stop) for n, c in self.lists.items()})
+
+    def take(self, rows):
+        """The rows at these positions (e.g. np.flatnonzero(mask))."""
+        rows = np.asarray(rows, dtype=np.int64)
+        return CompactMovies(self.frame.iloc[rows], {n: c.take(rows) for n, c in self.lists.items()})
+
+
+def as_compact(data, list_columns, key="name"):
+    """CompactMovies as is; a DataFrame is converted with from_frame."""
+    if isinstance(data, CompactMovies):
+        return data
+    return CompactMovies.from_frame(data, list_columns, key)
@@ -0,0 +1,96 @@
+# movie_credits.py
+"""
+Credits processing: pull directors out of `crew` and ordered names out of
+`cast`, then hash-join the result onto the movies by id.
+
+The crew blobs dominate tmdb_5000_credits.csv, so they are never decoded
+with json.loads. Instead each blob is scanned with a couple of regexes for the
+`"job": "Director"` entries, and the `"name"` string literals are copied out
+verbatim. The output columns are compact JSON arrays of names, which
+movie_parsing's fast path reads back without literal_eval:
+    cast       '["Sam Worthington", "Zoe Saldana", ...]'   (credits order)
+    directors  '["James Cameron"]'
+    director   'James Cameron'   (first director, plain text for director_text)
+"""
+
+import json
+import re
+
+import pandas as pd
+
+# One crew object that has job == Director (crew objects never nest)
+_DIRECTOR_ENTRY = re.compile(r'\{[^{}]*"job":\s*"Director"[^{}]*\}')
+# A "name" key with its JSON string literal (escapes included)
+_NAME = re.compile(r'"name":\s*("(?:[^"\\]|\\.)*")')
+
+
+def _json_array(literals):
+    """Build a JSON array from already-encoded string literals."""
+    return "[" + ", ".join(literals) + "]"
+
+
+def director_literals(crew):
+    """JSON string literals of every director in one crew blob."""
+    if not isinstance(crew, str) or '"Director"' not in crew:
+        return []
+    names = []
+    for entry in _DIRECTOR_ENTRY.finditer(crew):
+        m = _NAME.search(entry.group(0))
+        if m:
+            names.append(m.group(1))
+    return names
+
+
+def cast_literals(cast):
+    """JSON string literals of the cast names, in the order they appear."""
+    if not isinstance(cast, str):
+        return []
+    return _NAME.findall(cast)
+
+
+def extract_credits(credits_df):
+    """
+    One pass over credits: returns a DataFrame with movie_id, cast, directors
+    and director (see module docstring). Duplicate movie ids keep the first row.
+    """
+    credits_df = credits_df.drop_duplicates(subset="movie_id", keep="first")
+
+    cast_col = []
+    directors_col = []
+    director_col = []
+    for cast, crew in zip(credits_df["cast"].tolist(), credits_df["crew"].tolist()):
+        cast_col.append(_json_array(cast_literals(cast)))
+        found = director_literals(crew)
+        directors_col.append(_json_array(found))
+        director_col.append(json.loads(found[0]) if found else None)
+
+    return pd.DataFrame({
+        "movie_id": credits_df["movie_id"].values,
+        "cast": cast_col,
+        "directors": directors_col,
+        "director": director_col,
+    })
+
+
+def join_credits(movies_df, credits_df):
+    """
+    Hash-join extracted credits onto movies by id (left join: movie order and
+    movies without credits are kept). Returns the movies with cast, directors
+    and director columns added.
+    """
+    extracted = extract_credits(credits_df.dropna(subset=["movie_id"]))
+    extracted["movie_id"] = extracted["movie_id"].astype(movies_df["id"].dtype)
+    movies_df = movies_df.drop(columns=[c for c in ("cast", "directors", "director")
+                                        if c in movies_df.columns])
+    joined = movies_df.merge(extracted, how="left", left_on="id", right_on="movie_id", sort=False)
+    joined.index = movies_df.index
+    return joined.drop(columns="movie_id")
+
+
+if __name__ == "__main__":
+    from movie_ingestion import load_data
+
+    movies_df, credits_df = load_data()
+    joined = join_credits(movies_df, credits_df)
+    print(joined[["id", "title", "director", "directors", "cast"]].head())
+    print("Movies with a director:", joined["director"].notna().sum(), "of", len(joined))
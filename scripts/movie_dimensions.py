@@ -0,0 +1,170 @@
+# movie_dimensions.py
+"""
+Bulk name -> id resolution for the dimension tables (genres, actors, directors).
+
+Replaces the one-SELECT-then-one-INSERT-per-name pattern of get_or_create_scalar:
+ - all existing name/id pairs are preloaded with one query per table
+ - the unseen names of a whole batch are inserted with one executemany INSERT
+   (ON CONFLICT DO NOTHING on SQLite and PostgreSQL, see insert_new_names)
+   and their ids are read back with one SELECT ... WHERE name IN (...)
+ - the resolved dictionaries are saved to a JSON sidecar next to the database,
+   so the next run can skip the preload when the table has not changed; the
+   sidecar names the database it was saved from (its path and a random marker
+   kept in the database itself), so it is never applied to another database
+"""
+
+import json
+import os
+import uuid
+from sqlalchemy import Column, MetaData, String, Table, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+LOOKUP_CHUNK = 900
+# One row: the random marker of this database, written on first use
+dimension_marker = Table("dimension_marker", MetaData(), Column("marker", String, primary_key=True))
+# Dialects whose INSERT can skip names another loader inserted first (ON CONFLICT DO NOTHING)
+CONFLICT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def insert_new_names(conn, table):
+    """
+    INSERT for new dimension names that skips the ones already in the table, so
+    concurrent loaders can race on the same name. Other dialects get a plain
+    INSERT: there a name inserted concurrently raises IntegrityError.
+    """
+    dialect_insert = CONFLICT_INSERTS.get(conn.dialect.name)
+    if dialect_insert is None:
+        return insert(table)
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=[table.c.name])
+
+
+class DimensionResolver:
+    """Resolves names to ids for one dimension table with a `name` column."""
+
+    def __init__(self, table):
+        self.table = table
+        self.ids = {}  # name -> id
+        self.added = []  # names resolved since checkpoint(); their rows are not committed yet
+
+    def checkpoint(self):
+        """Call as a transaction starts: the names resolve() adds from now on are recorded."""
+        self.added = []
+
+    def rollback(self):
+        """Call when the transaction rolled back: forget the ids resolved in it (they were never committed)."""
+        for name in self.added:
+            self.ids.pop(name, None)
+        self.added = []
+
+    def table_state(self, conn):
+        """(row count, max id) — cheap fingerprint used to validate a persisted cache."""
+        count, max_id = conn.execute(select(func.count(), func.max(self.table.c.id))).one()
+        return int(count), (int(max_id) if max_id is not None else None)
+
+    def preload(self, conn):
+        """Read every existing name/id pair in a single query."""
+        rows = conn.execute(select(self.table.c.name, self.table.c.id))
+        self.ids = {name: id_ for name, id_ in rows}
+        return len(self.ids)
+
+    def resolve(self, conn, names):
+        """
+        Return a dict name -> id covering every (non-empty) name in `names`.
+        New names are inserted in first-appearance order, so id assignment is
+        the same as creating them one at a time.
+        """
+        new_names = []
+        seen = set()
+        for name in names:
+            if name and name not in self.ids and name not in seen:
+                seen.add(name)
+                new_names.append(name)
+
+        if new_names:
+            stmt = insert_new_names(conn, self.table)
+            max_id = conn.execute(select(func.max(self.table.c.id))).scalar()
+            conn.execute(stmt, [{"name": n} for n in new_names])
+            # the inserted rows are the ids above the old maximum: one range scan instead
+            # of IN (...) lookups; names another loader had inserted are looked up below
+            rows = conn.execute(select(self.table.c.name, self.table.c.id)
+                                .where(self.table.c.id > (max_id if max_id is not None else 0)))
+            self.ids.update({name: id_ for name, id_ in rows})
+            missing = [n for n in new_names if n not in self.ids]
+            for start in range(0, len(missing), LOOKUP_CHUNK):
+                chunk = missing[start:start + LOOKUP_CHUNK]
+                rows = conn.execute(select(self.table.c.name, self.table.c.id)
+                                    .where(self.table.c.name.in_(chunk)))
+                self.ids.update({name: id_ for name, id_ in rows})
+            self.added.extend(new_names)
+        return self.ids
+
+
+# -----------------------------
+# Persistence between runs
+# -----------------------------
+def cache_path_for(url):
+    """Sidecar of a file database: <database>_dimensions.json next to it (None for other databases)."""
+    database = url.database if url.get_backend_name() == "sqlite" else None
+    if not database or database == ":memory:" or database.startswith("file:"):
+        return None
+    return os.path.splitext(database)[0] + "_dimensions.json"
+
+
+def database_identity(conn):
+    """(absolute path or URL, marker) of conn's database; the marker is created on first use."""
+    dimension_marker.create(conn, checkfirst=True)
+    marker = conn.execute(select(dimension_marker.c.marker)).scalar()
+    if marker is None:
+        marker = uuid.uuid4().hex
+        conn.execute(insert(dimension_marker).values(marker=marker))
+    url = conn.engine.url
+    database = os.path.abspath(url.database) if cache_path_for(url) else url.render_as_string(hide_password=True)
+    return database, marker
+
+
+def load_resolvers(conn, resolvers, cache_path=None):
+    """
+    Fill each resolver from the JSON cache when it was saved from this database
+    (same path and marker) and the table's (count, max id) still matches,
+    otherwise preload it from the database.
+    cache_path: None for the database's own sidecar (cache_path_for).
+    """
+    cache_path = cache_path or cache_path_for(conn.engine.url)
+    saved = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+    database, marker = database_identity(conn)
+    if saved.get("database") != database or saved.get("marker") != marker:
+        saved = {}
+
+    for resolver in resolvers:
+        entry = saved.get("tables", {}).get(resolver.table.name)
+        count, max_id = resolver.table_state(conn)
+        if entry and entry.get("count") == count and entry.get("max_id") == max_id:
+            resolver.ids = entry["ids"]
+            source = "cache"
+        else:
+            resolver.preload(conn)
+            source = "database"
+        print(f"{resolver.table.name}: {len(resolver.ids)} ids loaded from {source}")
+
+
+def save_resolvers(conn, resolvers, cache_path=None):
+    """Write every resolver's dictionary plus the database and table fingerprint it is valid for."""
+    cache_path = cache_path or cache_path_for(conn.engine.url)
+    if not cache_path:
+        return
+    database, marker = database_identity(conn)
+    payload = {"database": database, "marker": marker, "tables": {}}
+    for resolver in resolvers:
+        count, max_id = resolver.table_state(conn)
+        payload["tables"][resolver.table.name] = {"count": count, "max_id": max_id, "ids": resolver.ids}
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, cache_path)
@@ -8,99 +8,197 @@ This script performs:
 2. Basic exploratory data analysis (EDA)
 3. Data transformation and feature engineering
 4. Saving transformed dataset
+
+Steps 3-5 live in transform_compact(), which works on a whole dataset or on a
+single chunk and returns CompactMovies (see movie_compact.py): cast and
+directors stay dictionary-coded lists, and the other columns get compact
+dtypes. transform_movies() returns the same as an ordinary DataFrame;
+transform_chunks() applies the transform to a stream of cleaned chunks.
+Large datasets are transformed in row partitions across TRANSFORM_WORKERS
+processes (see movie_parallel.py) with the same result as the serial path.
 """
 
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
-import ast
-
-# ----------------------------
-# Step 1: Load cleaned dataset
-# ----------------------------
-df = pd.read_csv("../data/movies_cleaned.csv")
-
-print("Dataset loaded successfully")
-print("Number of rows:", df.shape[0])
-print("Number of columns:", df.shape[1])
-print(df.info())
-print(df.head())
-
-# ----------------------------
-# Step 2: Basic Exploration
-# ----------------------------
-# Missing values
-print("\nMissing values per column:")
-print(df.isnull().sum())
-
-# Quick statistics
-print("\nSummary statistics for numeric columns:")
-print(df.describe())
-
-# Example: plot budget distribution
-plt.figure(figsize=(8, 5))
-plt.hist(df['budget'], bins=50, color='skyblue', edgecolor='black')
-plt.title("Budget Distribution")
-plt.xlabel("Budget")
-plt.ylabel("Number of Movies")
-plt.show()
-
-# Revenue distribution
-plt.figure(figsize=(8, 5))
-plt.hist(df['revenue'], bins=50, color='lightgreen', edgecolor='black')
-plt.title("Revenue Distribution")
-plt.xlabel("Revenue")
-plt.ylabel("Number of Movies")
-plt.show()
-
-# ----------------------------
-# Step 3: Transform nested columns
-# ----------------------------
-def parse_list_column(column):
-    """
-    Convert string representation of list to actual list using ast.literal_eval
-    """
-    return column.apply(lambda x: ast.literal_eval(x) if pd.notnull(x) else [])
-
-# Parse genres and cast columns
-df['genres_list'] = parse_list_column(df['genres'])
-df['cast_list'] = parse_list_column(df['cast'])
-
-# Count number of genres per movie
-df['num_genres'] = df['genres_list'].apply(len)
-
-# Extract main genre (first genre)
-df['main_genre'] = df['genres_list'].apply(lambda x: x[0] if len(x) > 0 else None)
-
-# Extract first 3 actors as main cast
-df['main_cast'] = df['cast_list'].apply(lambda x: x[:3] if len(x) > 0 else [])
-
-# Count number of cast members
-df['num_cast'] = df['cast_list'].apply(len)
-
-# ----------------------------
-# Step 4: Feature Engineering
-# ----------------------------
-# Profit = revenue - budget
-df['profit'] = df['revenue'] - df['budget']
-
-# Convert release_date to datetime and extract year
-df['release_date'] = pd.to_datetime(df['release_date'], errors='coerce')
-df['release_year'] = df['release_date'].dt.year
-
-# Optional: Month of release
-df['release_month'] = df['release_date'].dt.month
-
-# ----------------------------
-# Step 5: Optional cleanup
-# ----------------------------
-# Drop redundant columns
-columns_to_drop = ['genres', 'cast', 'cast_list', 'genres_list']
-for col in columns_to_drop:
-    if col in df.columns:
-        df.drop(col, axis=1, inplace=True)
-
-# ----------------------------
-# Step 6: Save transformed dataset
-# ----------------------------
-df.to_csv("../data/movies_transformed.csv", index=False)
-print("\nTransformed dataset saved as movies_transformed.csv")
+
+from movie_compact import CodedLists, CompactMovies, compact_dtypes
+from movie_instrumentation import stage, write_metrics
+from movie_parallel import transform_parallel
+from movie_store import is_store, read_table, write_table
+
+# Columnar stores are the stage hand-off; the CSVs are only import/export
+CLEANED_STORE = "../data/movies_cleaned.store"
+CLEANED_CSV = "../data/movies_cleaned.csv"
+TRANSFORMED_STORE = "../data/movies_transformed.store"
+TRANSFORMED_CSV = "../data/movies_transformed.csv"
+EXPORT_CSV = False
+
+# Transform in a process pool (row partitions) once the dataset is big enough
+TRANSFORM_WORKERS = os.cpu_count() or 1
+PARALLEL_MIN_ROWS = 100_000
+
+TRANSFORMED_DTYPES = {
+    "main_genre": "category",
+    "main_cast": "codes",
+    "directors": "codes",
+    "num_genres": "int64",
+    "num_cast": "int64",
+    "release_date": "datetime64[ns]",
+    "release_year": "float64",
+    "release_month": "float64",
+}
+
+
+def transform_compact(df):
+    """Steps 3-5: nested columns, feature engineering and cleanup. Returns CompactMovies."""
+    df = df.copy()
+    lists = {}
+
+    # ----------------------------
+    # Step 3: Transform nested columns
+    # ----------------------------
+    # Parse genres and cast columns once per distinct string into
+    # dictionary-coded lists (see movie_compact.py), then derive the features
+    # from the offsets instead of per-row lambdas
+    genres = CodedLists.from_series(df['genres'])
+    cast = CodedLists.from_series(df['cast'])
+
+    # Count number of genres per movie
+    df['num_genres'] = genres.lengths()
+
+    # Extract main genre (first genre)
+    df['main_genre'] = genres.first()
+
+    # Extract first 3 actors as main cast
+    lists['main_cast'] = cast.head(3)
+
+    # Count number of cast members
+    df['num_cast'] = cast.lengths()
+
+    # Full directors list from the credits join
+    if 'directors' in df.columns:
+        lists['directors'] = CodedLists.from_series(df.pop('directors'))
+
+    # ----------------------------
+    # Step 4: Feature Engineering
+    # ----------------------------
+    # Profit = revenue - budget
+    df['profit'] = df['revenue'] - df['budget']
+
+    # Convert release_date to datetime and extract year
+    df['release_date'] = pd.to_datetime(df['release_date'], errors='coerce')
+    df['release_year'] = df['release_date'].dt.year
+
+    # Optional: Month of release
+    df['release_month'] = df['release_date'].dt.month
+
+    # ----------------------------
+    # Step 5: Optional cleanup
+    # ----------------------------
+    # Drop redundant columns
+    columns_to_drop = ['genres', 'cast', 'cast_list', 'genres_list']
+    for col in columns_to_drop:
+        if col in df.columns:
+            df.drop(col, axis=1, inplace=True)
+
+    return CompactMovies(compact_dtypes(df), lists)
+
+
+def transform_movies(df):
+    """transform_compact() as an ordinary DataFrame (list cells for main_cast and directors)."""
+    return transform_compact(df).to_frame()
+
+
+def transform_chunks(chunks):
+    """Generator version of transform_compact for streamed (chunked) input."""
+    for chunk in chunks:
+        yield transform_compact(chunk)
+
+
+def read_cleaned(store_path=CLEANED_STORE, csv_path=CLEANED_CSV):
+    """Step 1: the cleaned dataset, from its store or else its CSV export."""
+    if is_store(store_path):
+        return read_table(store_path)
+    return pd.read_csv(csv_path)
+
+
+def transform_dataset(df, workers=TRANSFORM_WORKERS):
+    """Steps 3-5 over a whole dataset (CompactMovies), in a process pool once it is big enough."""
+    with stage("transform", rows_in=len(df)) as s:
+        if workers > 1 and len(df) >= PARALLEL_MIN_ROWS:
+            print(f"\nTransforming in {workers} processes")
+            out = transform_parallel(df, transform_compact, workers)
+        else:
+            out = transform_compact(df)
+        s.rows_out = len(out)
+    return out
+
+
+def run_transform(cleaned_path=CLEANED_STORE, transformed_path=TRANSFORMED_STORE, workers=TRANSFORM_WORKERS):
+    """Steps 1 and 3-6 without the exploration: cleaned store -> transformed store."""
+    with stage("transform.read") as s:
+        df = read_cleaned(cleaned_path)
+        s.rows_out = len(df)
+    df = transform_dataset(df, workers)
+    with stage("transform.write", rows_in=len(df)) as s:
+        write_table(transformed_path, df, TRANSFORMED_DTYPES)
+        s.rows_out = len(df)
+    print("Transformed dataset saved as", transformed_path)
+    return len(df)
+
+
+if __name__ == "__main__":
+    # ----------------------------
+    # Step 1: Load cleaned dataset
+    # ----------------------------
+    df = read_cleaned()
+
+    print("Dataset loaded successfully")
+    print("Number of rows:", df.shape[0])
+    print("Number of columns:", df.shape[1])
+    print(df.info())
+    print(df.head())
+
+    # ----------------------------
+    # Step 2: Basic Exploration
+    # ----------------------------
+    # Missing values
+    print("\nMissing values per column:")
+    print(df.isnull().sum())
+
+    # Quick statistics
+    print("\nSummary statistics for numeric columns:")
+    print(df.describe())
+
+    # Example: plot budget distribution
+    plt.figure(figsize=(8, 5))
+    plt.hist(df['budget'], bins=50, color='skyblue', edgecolor='black')
+    plt.title("Budget Distribution")
+    plt.xlabel("Budget")
+    plt.ylabel("Number of Movies")
+    plt.show()
+
+    # Revenue distribution
+    plt.figure(figsize=(8, 5))
+    plt.hist(df['revenue'], bins=50, color='lightgreen', edgecolor='black')
+    plt.title("Revenue Distribution")
+    plt.xlabel("Revenue")
+    plt.ylabel("Number of Movies")
+    plt.show()
+
+    # ----------------------------
+    # Steps 3-5: Transform
+    # ----------------------------
+    df = transform_dataset(df)
+
+    # ----------------------------
+    # Step 6: Save transformed dataset
+    # ----------------------------
+    write_table(TRANSFORMED_STORE, df, TRANSFORMED_DTYPES)
+    print("\nTransformed dataset saved as", TRANSFORMED_STORE)
+    if EXPORT_CSV:
+        df.to_frame().to_csv(TRANSFORMED_CSV, index=False)
+        print("Transformed dataset exported as movies_transformed.csv")
+    write_metrics("movie_eda")
@@ -1,6 +1,9 @@
 import os
 import pandas as pd
 
+from movie_instrumentation import stage
+from movie_store import StoreReader, import_csv
+
 # Automatically find base project directory (one level above current file)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
@@ -9,18 +12,37 @@ DATA_DIR = os.path.join(BASE_DIR, "data")
 MOVIES_FILE = os.path.join(DATA_DIR, "tmdb_5000_movies.csv")
 CREDITS_FILE = os.path.join(DATA_DIR, "tmdb_5000_credits.csv")
 
-def load_data():
+# Typed columnar copies of the raw CSVs (written by the pipeline's ingest stages)
+MOVIES_STORE = os.path.join(DATA_DIR, "tmdb_5000_movies.store")
+CREDITS_STORE = os.path.join(DATA_DIR, "tmdb_5000_credits.store")
+
+# Movies per chunk for streaming ingestion
+CHUNK_SIZE = 1000
+# Credits buffered ahead of the movies, in movies chunks: a movie whose credits are not
+# found within this window gets none (instead of the rest of the credits file being read)
+CREDITS_BUFFER_CHUNKS = 4
+
+# Raw text columns; given explicitly so an all-NaN first chunk isn't stored as float
+MOVIES_TEXT_COLUMNS = ["genres", "homepage", "keywords", "original_language", "original_title",
+                       "overview", "production_companies", "production_countries", "release_date",
+                       "spoken_languages", "status", "tagline", "title"]
+MOVIES_DTYPES = {c: "string" for c in MOVIES_TEXT_COLUMNS}
+CREDITS_DTYPES = {"title": "string", "cast": "string", "crew": "string"}
+
+def load_data(movies_file=MOVIES_FILE, credits_file=CREDITS_FILE):
     """Reads the movie and credits CSV files into pandas DataFrames."""
     
     print("Current working directory:", os.getcwd())
-    print("Looking for files in:", DATA_DIR)
+    print("Looking for files in:", os.path.dirname(movies_file))
 
-    if not os.path.exists(MOVIES_FILE) or not os.path.exists(CREDITS_FILE):
+    if not os.path.exists(movies_file) or not os.path.exists(credits_file):
         raise FileNotFoundError("One or both CSV files are missing in the data folder.")
     
     print("Loading datasets...")
-    movies_df = pd.read_csv(MOVIES_FILE)
-    credits_df = pd.read_csv(CREDITS_FILE)
+    with stage("ingest.load_data") as s:
+        movies_df = pd.read_csv(movies_file)
+        credits_df = pd.read_csv(credits_file)
+        s.rows_out = len(movies_df)
     
     print("\nMovies dataset shape:", movies_df.shape)
     print("Credits dataset shape:", credits_df.shape)
@@ -34,5 +56,76 @@ def load_data():
     return movies_df, credits_df
 
 
+def align_chunks(movie_chunks, credit_chunks, buffer_chunks=CREDITS_BUFFER_CHUNKS):
+    """
+    Pairs a stream of movies chunks with a stream of credits chunks.
+
+    Yields (movies_chunk, credits_chunk) pairs: credits_chunk has one row per
+    movie in movies_chunk, in the same order and with the same index (all NaN
+    when a movie has no credits). Credits are read only as far as needed to
+    cover the current movies chunk; credits that arrive early are held in a
+    buffer of at most buffer_chunks movies chunks, so memory stays bounded by
+    the chunk size. A movie whose credits are not within that window (none in
+    the file, or the inputs far out of order) gets NaN credits; the oldest
+    unmatched credits are dropped once the buffer is full. TMDB exports list
+    both files in the same order.
+    """
+    credit_chunks = iter(credit_chunks)
+    pending = None  # credits read but not yet matched, indexed by movie_id
+    credits_done = False
+
+    for movies_chunk in movie_chunks:
+        ids = movies_chunk["id"]
+        limit = buffer_chunks * max(len(movies_chunk), 1)
+
+        # Read credits until every id in this chunk is buffered, the buffer is full or the input ends
+        while not credits_done and (pending is None or
+                                    (len(pending) < limit and not ids.isin(pending.index).all())):
+            try:
+                credits_chunk = next(credit_chunks)
+            except StopIteration:
+                credits_done = True
+                break
+            credits_chunk = credits_chunk.set_index("movie_id")
+            pending = credits_chunk if pending is None else pd.concat([pending, credits_chunk])
+            pending = pending[~pending.index.duplicated(keep="first")]
+
+        if pending is None:
+            matched = pd.DataFrame(index=ids)
+        else:
+            matched = pending.reindex(ids)
+            pending = pending.drop(ids, errors="ignore")
+            if len(pending) > limit:
+                pending = pending.iloc[len(pending) - limit:]
+
+        matched = matched.rename_axis("movie_id").reset_index()
+        matched.index = movies_chunk.index
+        yield movies_chunk, matched
+
+
+def load_data_chunks(chunksize=CHUNK_SIZE, movies_file=MOVIES_FILE, credits_file=CREDITS_FILE):
+    """Streams the movie and credits CSVs in fixed-size, aligned chunks (see align_chunks)."""
+    if not os.path.exists(movies_file) or not os.path.exists(credits_file):
+        raise FileNotFoundError("One or both CSV files are missing in the data folder.")
+
+    return align_chunks(pd.read_csv(movies_file, chunksize=chunksize),
+                        pd.read_csv(credits_file, chunksize=chunksize))
+
+
+def load_store_chunks(chunksize=CHUNK_SIZE, movies_store=MOVIES_STORE, credits_store=CREDITS_STORE):
+    """Same as load_data_chunks, reading the columnar copies made by import_raw()."""
+    return align_chunks(StoreReader(movies_store).chunks(chunksize),
+                        StoreReader(credits_store).chunks(chunksize))
+
+
+def import_raw(csv_file, store_path, dtypes=None, chunksize=CHUNK_SIZE * 10):
+    """Copy a raw TMDB CSV into a typed columnar store (movie_store.py)."""
+    if not os.path.exists(csv_file):
+        raise FileNotFoundError(f"{csv_file} is missing in the data folder.")
+    with stage("ingest.import_raw") as s:
+        import_csv(csv_file, store_path, chunksize=chunksize, dtypes=dtypes)
+        s.rows_out = StoreReader(store_path).rows
+
+
 if __name__ == "__main__":
     movies_df, credits_df = load_data()
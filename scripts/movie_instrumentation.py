@@ -0,0 +1,299 @@
+# movie_instrumentation.py
+"""
+Built-in instrumentation for the pipeline scripts.
+
+    with stage("load", rows_in=n) as s:      # wall, CPU, peak RSS, rows in/out
+        ...
+        s.rows_out = written
+
+    instrument_engine(engine)                # count + time every SQL statement
+    with profiled("cprofile", "load"):       # or "sample"; None disables it
+        ...
+
+    write_metrics("movie_load")              # -> METRICS_DIR/movie_load.json
+
+Stages with the same name accumulate (calls, totals), so a per-batch step can
+be wrapped in the batch loop. CPU time is the calling thread's plus that of
+any worker processes that finished during the stage. Peak RSS is the process
+high-water mark during the stage: it is reset at stage start where Linux
+allows it (/proc/self/clear_refs); elsewhere it is the peak since process
+start. Only the outermost active stage resets it, so a nested stage reports
+the peak since its enclosing stage began, and stages running at the same time
+in threads share the process-wide mark.
+
+SQL statements are grouped by template: whitespace collapsed, literals
+replaced by ?, and IN (?, ?, ...) lists folded, so the thousand lookups that
+differ only in their ids count as one line. Each template records
+executions, parameter sets (executemany), total/max time and rows.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+
+from sqlalchemy import event
+
+# -----------------------------
+# Config
+# -----------------------------
+METRICS_DIR = os.path.join("..", "data", "metrics")
+PROFILE_TOP = 25  # functions / stacks kept in the JSON for profiled sections
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def statement_template(sql):
+    sql = _SPACE.sub(" ", sql).strip()
+    return _IN_LIST.sub("IN (?, ...)", _LITERALS.sub("?", sql))
+
+
+def _rss_kb(field):
+    """VmRSS / VmHWM in kB from /proc (Linux), else None."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    peak = _rss_kb("VmHWM")
+    if peak is not None:
+        return peak / 1024
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _children_cpu():
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class StageRecord:
+    """What one `with stage(...)` block measured; set rows_out inside the block."""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+
+class Metrics:
+    """Thread-safe collector of stage, SQL and profile measurements."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.sql = {}
+        self.profiles = {}
+
+    def add_stage(self, record, wall, cpu, peak_rss_mb):
+        with self.lock:
+            entry = self.stages.setdefault(record.name, dict(calls=0, wall_s=0.0, cpu_s=0.0, peak_rss_mb=None,
+                                                             rows_in=0, rows_out=0))
+            entry["calls"] += 1
+            entry["wall_s"] += wall
+            entry["cpu_s"] += cpu
+            if peak_rss_mb is not None:
+                entry["peak_rss_mb"] = max(entry["peak_rss_mb"] or 0, peak_rss_mb)
+            entry["rows_in"] += record.rows_in or 0
+            entry["rows_out"] += record.rows_out or 0
+
+    def add_sql(self, template, seconds, param_sets, rows):
+        with self.lock:
+            entry = self.sql.get(template)
+            if entry is None:
+                entry = self.sql[template] = dict(executions=0, param_sets=0, total_s=0.0, max_s=0.0, rows=0)
+            entry["executions"] += 1
+            entry["param_sets"] += param_sets
+            entry["total_s"] += seconds
+            entry["max_s"] = max(entry["max_s"], seconds)
+            if rows > 0:
+                entry["rows"] += rows
+
+    def report(self):
+        """The measurements as a JSON-ready dict (SQL templates slowest first)."""
+        with self.lock:
+            stages = {name: dict(e, rows_per_sec=round(e["rows_out"] / e["wall_s"], 1) if e["wall_s"] else None)
+                      for name, e in self.stages.items()}
+            sql = [dict(statement=t, **e) for t, e in sorted(self.sql.items(), key=lambda kv: -kv[1]["total_s"])]
+            return dict(recorded=time.strftime("%Y-%m-%d %H:%M:%S"), pid=os.getpid(),
+                        stages=stages, sql=sql, profiles=dict(self.profiles))
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+            self.sql.clear()
+            self.profiles.clear()
+
+
+METRICS = Metrics()
+_active = [0]  # stages currently open, across threads
+_active_lock = threading.Lock()
+
+
+@contextmanager
+def stage(name, rows_in=None, metrics=None):
+    """Measure a block of work under `name`; yields a StageRecord for rows_out."""
+    metrics = metrics or METRICS
+    record = StageRecord(name, rows_in)
+    with _active_lock:
+        if _active[0] == 0:
+            _reset_peak_rss()
+        _active[0] += 1
+    wall, cpu, child_cpu = time.perf_counter(), time.thread_time(), _children_cpu()
+    try:
+        yield record
+    finally:
+        with _active_lock:
+            _active[0] -= 1
+        metrics.add_stage(record, time.perf_counter() - wall,
+                          time.thread_time() - cpu + _children_cpu() - child_cpu, _peak_rss_mb())
+
+
+def instrument_engine(engine, metrics=None):
+    """Hook before/after_cursor_execute (and handle_error) on an engine (once) to time every statement."""
+    metrics = metrics or METRICS
+    if getattr(engine, "_movie_instrumented", False):
+        return engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start"].pop()
+        param_sets = len(parameters) if executemany else 1
+        metrics.add_sql(statement_template(statement), seconds, param_sets, cursor.rowcount or 0)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # a statement that raised gets no after_cursor_execute: drop its start time
+        conn = exception_context.connection
+        if conn is not None and exception_context.execution_context is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    engine._movie_instrumented = True
+    return engine
+
+
+# -----------------------------
+# Profiling hooks
+# -----------------------------
+class StackSampler:
+    """Samples one thread's innermost frames every `interval` seconds from a helper thread."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < 3:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}")
+                frame = frame.f_back
+            self.counts[" <- ".join(stack)] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self, top=PROFILE_TOP):
+        return dict(kind="sample", interval_s=self.interval, samples=self.samples,
+                    top=[dict(stack=s, samples=n, share=round(n / self.samples, 4))
+                         for s, n in self.counts.most_common(top)] if self.samples else [])
+
+
+def _cprofile_summary(profile, top=PROFILE_TOP):
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append(dict(function=f"{os.path.basename(filename)}:{line} {func}", calls=nc,
+                         total_s=round(tt, 6), cumulative_s=round(ct, 6)))
+    rows.sort(key=lambda r: -r["cumulative_s"])
+    return dict(kind="cprofile", top=rows[:top])
+
+
+@contextmanager
+def profiled(kind, name, metrics=None, out_dir=METRICS_DIR):
+    """
+    Profile a block: kind "cprofile" (deterministic; full stats also dumped to
+    out_dir/<name>.prof for snakeviz/pstats) or "sample" (low-overhead stack
+    sampling). Any other kind, e.g. None, runs the block unprofiled.
+    """
+    metrics = metrics or METRICS
+    if kind == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            os.makedirs(out_dir, exist_ok=True)
+            profile.dump_stats(os.path.join(out_dir, f"{name}.prof"))
+            with metrics.lock:
+                metrics.profiles[name] = _cprofile_summary(profile)
+    elif kind == "sample":
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            with metrics.lock:
+                metrics.profiles[name] = sampler.summary()
+    else:
+        yield
+
+
+def write_metrics(name, metrics=None, out_dir=METRICS_DIR):
+    """Write the collected measurements to out_dir/<name>.json; returns the path."""
+    metrics = metrics or METRICS
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(metrics.report(), f, indent=1)
+    print("Metrics written to", path)
+    return path
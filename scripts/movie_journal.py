@@ -0,0 +1,82 @@
+# movie_journal.py
+"""
+Batch progress journal for resumable loads.
+
+movie_load.py writes one `load_journal` row per committed batch, in the same
+transaction as the batch itself: the input fingerprint and load mode, the
+batch number, its row range (first_row, row_count) and the rows it wrote.
+A batch is therefore either fully loaded and journaled or neither.
+
+When a load fails partway and is started again on the same input (same
+fingerprint, same mode), every batch the journal already holds is skipped,
+so the load resumes after the last committed batch instead of at row 0.
+The journal only ever describes the one unfinished load: starting a load on
+other input (or in another mode) clears it, and a finished load empties it.
+
+The input fingerprint is taken from file metadata (name, size, mtime), like
+the query cache's data version, so fingerprinting a large store costs one
+stat() per column file.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select
+
+
+def input_fingerprint(*paths):
+    """Hex digest over the name, size and mtime of every file under the given paths (None if none exist)."""
+    digest = hashlib.sha256()
+    found = False
+    for path in paths:
+        files = [path]
+        if os.path.isdir(path):
+            files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        for file in files:
+            if not os.path.isfile(file):
+                continue
+            st = os.stat(file)
+            digest.update(f"{os.path.relpath(file, path)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+            found = True
+    return digest.hexdigest()[:32] if found else None
+
+
+class LoadJournal:
+    """The committed batches of one (fingerprint, mode) load, read from and written to `table`."""
+
+    def __init__(self, table, fingerprint, mode):
+        self.table = table
+        self.fingerprint = fingerprint
+        self.mode = mode
+        self.done = {}  # batch_no -> (first_row, row_count, rows_written)
+
+    def _this_load(self):
+        return (self.table.c.fingerprint == self.fingerprint) & (self.table.c.mode == self.mode)
+
+    def start(self, conn):
+        """Drop entries of other loads and read this load's committed batches; returns how many."""
+        conn.execute(delete(self.table).where(~self._this_load()))
+        rows = conn.execute(select(self.table.c.batch_no, self.table.c.first_row, self.table.c.row_count,
+                                   self.table.c.rows_written).where(self._this_load()))
+        self.done = {batch_no: (first, count, written) for batch_no, first, count, written in rows}
+        if self.done:
+            print(f"Resuming load: {len(self.done)} batches "
+                  f"({sum(v[1] for v in self.done.values())} movies) already committed")
+        return len(self.done)
+
+    def committed(self, batch_no, first_row, row_count):
+        """Rows written by this batch in an earlier attempt, or None if it still has to be loaded."""
+        entry = self.done.get(batch_no)
+        if entry is None or entry[:2] != (first_row, row_count):
+            return None
+        return entry[2]
+
+    def record(self, conn, batch_no, first_row, row_count, rows_written):
+        """Journal a batch; call inside the batch's transaction."""
+        if batch_no in self.done:
+            # journaled with another row range (BATCH_SIZE changed between attempts)
+            conn.execute(delete(self.table).where(self._this_load() & (self.table.c.batch_no == batch_no)))
+        conn.execute(insert(self.table).values(fingerprint=self.fingerprint, mode=self.mode, batch_no=batch_no,
+                                               first_row=first_row, row_count=row_count,
+                                               rows_written=rows_written, committed_at=datetime.now()))
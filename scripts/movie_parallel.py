@@ -0,0 +1,190 @@
+# movie_parallel.py
+"""
+Partitioned, multi-process execution of a DataFrame transform (used for
+movie_eda.transform_movies).
+
+The input is split into contiguous row partitions, and each partition is
+transformed in a process pool. On platforms with fork, workers inherit the
+input frame instead of receiving a pickled copy. Numeric and datetime result
+columns come back through multiprocessing shared memory and are copied once,
+straight into the final arrays; only object columns (names, lists) are pickled.
+A transform may also return CompactMovies: its CodedLists are small numpy
+arrays and are pickled as they are, then concatenated with their dictionaries
+merged. Partitions are reassembled in order, so the output matches the serial
+transform.
+"""
+
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from movie_compact import CodedLists, CompactMovies, compact_dtypes
+
+# (frame, func) inherited by forked workers
+_SOURCE = None
+
+
+def _partition_bounds(rows, partitions):
+    edges = np.linspace(0, rows, partitions + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def _export(out):
+    """Worker side: move numeric columns into shared memory, keep the rest for pickling."""
+    lists = {}
+    if isinstance(out, CompactMovies):
+        out, lists = out.frame, out.lists
+    numeric, objects = {}, {}
+    for name in out.columns:
+        col = out[name]
+        if isinstance(col.dtype, np.dtype) and col.dtype.kind in "biufM":
+            data = col.to_numpy()
+            raw = data.view(np.int64) if col.dtype.kind == "M" else data
+            shm = SharedMemory(create=True, size=max(raw.nbytes, 1))
+            np.ndarray(raw.shape, dtype=raw.dtype, buffer=shm.buf)[:] = raw
+            numeric[name] = (shm.name, str(col.dtype), str(raw.dtype), len(raw))
+            shm.close()
+        else:
+            objects[name] = col
+    return list(out.columns), out.index, numeric, objects, lists
+
+
+def _run_partition(start, stop, frame=None, func=None):
+    if frame is None:
+        frame, func = _SOURCE
+        frame = frame.iloc[start:stop]
+    return _export(func(frame))
+
+
+def _attach(spec):
+    shm_name, dtype, raw_dtype, length = spec
+    shm = SharedMemory(name=shm_name)
+    return shm, np.ndarray((length,), dtype=raw_dtype, buffer=shm.buf)
+
+
+def _release(results):
+    """Unlink every shared-memory block a set of partition results still owns."""
+    for r in results:
+        for spec in r[2].values():
+            try:
+                shm = SharedMemory(name=spec[0])
+            except FileNotFoundError:
+                continue
+            shm.close()
+            shm.unlink()
+
+
+def _numeric_dtype(specs):
+    """Common dtype of a column's per-partition numeric blocks, or None if they can't be combined."""
+    if any(s is None for s in specs):
+        return None
+    try:
+        return np.result_type(*[np.dtype(s[1]) for s in specs])
+    except TypeError:
+        return None
+
+
+def _concat_categoricals(parts):
+    """
+    Stack a column that every partition returned as categorical, with the
+    categories the serial transform would give it: in partition order, which
+    keeps a first-appearance order (e.g. CodedLists.first), or sorted when every
+    part's categories are sorted and used, as astype("category") leaves them
+    (compact_dtypes).
+    """
+    sort = all(p.cat.categories.is_monotonic_increasing and len(p.cat.categories) == p.nunique() for p in parts)
+    return pd.api.types.union_categoricals(parts, sort_categories=sort, ignore_order=True)
+
+
+def _assemble(results):
+    """Parent side: build the output frame from the partitions' results, in order."""
+    columns = results[0][0]
+    index = results[0][1].append([r[1] for r in results[1:]])
+    data = {}
+    shms = []
+    try:
+        for name in columns:
+            specs = [r[2].get(name) for r in results]
+            final = _numeric_dtype(specs)
+            if final is not None:
+                # all partitions numeric: allocate once, copy each block straight in
+                out = np.empty(sum(s[3] for s in specs), dtype=final)
+                raw_out = out.view(np.int64) if final.kind == "M" else out
+                pos = 0
+                for spec in specs:
+                    shm, block = _attach(spec)
+                    shms.append(shm)
+                    if np.dtype(spec[1]).kind == "M":
+                        block = block.view(spec[1]).astype(final).view(np.int64)
+                    raw_out[pos:pos + len(block)] = block
+                    pos += len(block)
+                data[name] = out
+            else:
+                # object (or mixed) columns: concatenate the pickled pieces
+                parts = []
+                for r in results:
+                    if name in r[3]:
+                        parts.append(r[3][name].reset_index(drop=True))
+                    else:
+                        shm, block = _attach(r[2][name])
+                        shms.append(shm)
+                        parts.append(pd.Series(block.view(r[2][name][1]).copy(), name=name))
+                if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+                    data[name] = _concat_categoricals(parts)
+                    continue
+                if any(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+                    # categorical in some partitions only: compact_dtypes decides for the whole column
+                    parts = [p.astype(object) for p in parts]
+                data[name] = pd.concat(parts, ignore_index=True).array
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+        _release(results)
+
+    out = pd.DataFrame(data, columns=columns)
+    out.index = index
+    if results[0][4]:
+        # partitions pick compact dtypes on their own; pick them again for the whole
+        return CompactMovies(compact_dtypes(out), {name: CodedLists.concat([r[4][name] for r in results])
+                                                   for name in results[0][4]})
+    return out
+
+
+def transform_parallel(df, func, workers=None, partitions=None):
+    """
+    Apply func (a DataFrame -> DataFrame or CompactMovies row-wise transform)
+    to df using a process pool. Returns the same result func(df) would.
+    """
+    global _SOURCE
+    workers = workers or os.cpu_count() or 1
+    bounds = _partition_bounds(len(df), partitions or workers)
+    if workers == 1 or len(bounds) <= 1:
+        return func(df)
+
+    use_fork = "fork" in mp.get_all_start_methods()
+    context = mp.get_context("fork") if use_fork else None
+    if use_fork:
+        _SOURCE = (df, func)
+        # Workers must share the parent's resource tracker; one started inside
+        # a worker would unlink its shared-memory blocks when the pool shuts down
+        resource_tracker.ensure_running()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            if use_fork:
+                futures = [pool.submit(_run_partition, a, b) for a, b in bounds]
+            else:
+                futures = [pool.submit(_run_partition, a, b, df.iloc[a:b], func) for a, b in bounds]
+            try:
+                results = [f.result() for f in futures]
+            except Exception:
+                _release([f.result() for f in futures if f.done() and f.exception() is None])
+                raise
+    finally:
+        _SOURCE = None
+    return _assemble(results)
@@ -0,0 +1,164 @@
+# movie_parsing.py
+"""
+Fast parsing of list-like text columns (genres, cast, directors).
+
+The CSV hand-offs store these columns either as JSON (TMDB's raw
+'[{"id": 28, "name": "Action"}]') or as Python reprs ("['Action', 'Drama']").
+Calling ast.literal_eval on every cell is the slowest Python step in the
+pipeline, so each cell goes through the cheapest parser that can handle it:
+ 1. a regex tokenizer for flat lists of plain string literals (the repr format)
+ 2. json.loads for JSON arrays
+ 3. ast.literal_eval only for anything else
+Parsed strings are memoised, and whole columns are parsed once per distinct
+value and returned as a flat values array plus an offsets array.
+"""
+
+import ast
+import json
+import re
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# How many distinct cell strings to remember across calls
+PARSE_CACHE_SIZE = 200_000
+
+# A whole list of simple quoted strings: ['A', "B's", 'C'] (no escapes inside)
+_FLAT_LIST = re.compile(
+    r"""\[\s*(?:(?:'[^'\\]*'|"[^"\\]*")\s*,\s*)*(?:'[^'\\]*'|"[^"\\]*")?\s*,?\s*\]\Z"""
+)
+_FLAT_ITEM = re.compile(r"'([^'\\]*)'|\"([^\"\\]*)\"")
+
+# First characters that can start a Python literal other than a list
+_LITERAL_START = set("'\"({0123456789-+.")
+
+
+def _split_fallback(text):
+    """Comma-separated fallback for plain text such as 'James Cameron'."""
+    return tuple(i.strip() for i in text.split(',') if i.strip())
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_text(text):
+    s = text.strip()
+    if s.startswith('['):
+        if _FLAT_LIST.match(s):
+            return tuple(a or b for a, b in _FLAT_ITEM.findall(s))
+        try:
+            parsed = json.loads(s)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, list):
+            return tuple(parsed)
+    elif not s or s[0] not in _LITERAL_START:
+        # A bare word can never be a literal, so skip literal_eval entirely
+        return _split_fallback(s)
+
+    try:
+        parsed = ast.literal_eval(s)
+    except Exception:
+        return _split_fallback(s)
+    if isinstance(parsed, (list, tuple)):
+        return tuple(parsed)
+    return (parsed,)
+
+
+def parse_list_value(val):
+    """
+    Parse one list-like cell and return a tuple of its items (dicts are kept as dicts).
+    NaN/None give (), lists pass through, non-list text falls back to a comma split.
+    """
+    if isinstance(val, str):
+        return _parse_text(val)
+    if isinstance(val, (list, tuple, np.ndarray)):
+        return tuple(val)
+    if val is None or pd.isna(val):
+        return ()
+    return (val,)
+
+
+def _item_name(item, key):
+    """Flatten one parsed item to a string: dicts contribute their `key` field."""
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict):
+        name = item.get(key)
+        return name if isinstance(name, str) and name else None
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _names_for_text(text, key):
+    items = _parse_text(text)
+    if all(isinstance(i, str) for i in items):
+        return items
+    return tuple(n for n in (_item_name(i, key) for i in items) if n is not None)
+
+
+def _names(val, key):
+    """Parse one cell straight to its tuple of names (memoised for strings)."""
+    if isinstance(val, str):
+        return _names_for_text(val, key)
+    return tuple(n for n in (_item_name(i, key) for i in parse_list_value(val)) if n is not None)
+
+
+def parse_list_column(column, key="name"):
+    """
+    Parse a whole Series of list-like cells.
+    Returns (values, offsets): `values` is an object array of all item names
+    in row order and row i owns values[offsets[i]:offsets[i + 1]].
+    Each distinct cell string is parsed only once.
+    """
+    column = pd.Series(column)
+    if pd.api.types.infer_dtype(column, skipna=True) in ("string", "empty"):
+        codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    else:
+        # Cells that are already lists (possibly of dicts) are not hashable: one entry per row
+        uniques = column.tolist()
+        codes = np.arange(len(uniques), dtype=np.int64)
+
+    # Parse each distinct value once and flatten it to names
+    parsed = [_names(u, key) for u in uniques]
+    unique_lens = np.fromiter(map(len, parsed), dtype=np.int64, count=len(parsed))
+    unique_values = np.fromiter(chain.from_iterable(parsed), dtype=object, count=int(unique_lens.sum()))
+    unique_offsets = np.zeros(len(parsed) + 1, dtype=np.int64)
+    np.cumsum(unique_lens, out=unique_offsets[1:])
+
+    # Gather: NaN rows (code -1) have length 0
+    codes = np.asarray(codes, dtype=np.int64)
+    valid = codes >= 0
+    row_lens = np.zeros(len(codes), dtype=np.int64)
+    row_lens[valid] = unique_lens[codes[valid]]
+    offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(row_lens, out=offsets[1:])
+
+    starts = np.zeros(len(codes), dtype=np.int64)
+    starts[valid] = unique_offsets[codes[valid]]
+    gather = np.repeat(starts - offsets[:-1], row_lens) + np.arange(offsets[-1], dtype=np.int64)
+    values = unique_values[gather] if len(unique_values) else np.empty(0, dtype=object)
+    return values, offsets
+
+
+# -----------------------------
+# Helpers over (values, offsets)
+# -----------------------------
+def list_lengths(offsets):
+    """Number of items per row."""
+    return np.diff(offsets)
+
+
+def first_item(values, offsets):
+    """First item of each row, or None for empty rows."""
+    lengths = np.diff(offsets)
+    out = np.full(len(lengths), None, dtype=object)
+    has_items = lengths > 0
+    out[has_items] = values[offsets[:-1][has_items]]
+    return out
+
+
+def to_lists(values, offsets, limit=None):
+    """Materialise Python lists per row (optionally only the first `limit` items)."""
+    ends = offsets[1:] if limit is None else np.minimum(offsets[1:], offsets[:-1] + limit)
+    return [values[s:e].tolist() for s, e in zip(offsets[:-1].tolist(), ends.tolist())]
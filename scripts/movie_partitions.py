@@ -0,0 +1,307 @@
+# movie_partitions.py
+"""
+Year-partitioned fact storage for time-range analysis.
+
+With PARTITION_FACTS on, the loader keeps, besides the movies and link
+tables, a copy of the movie facts (FACT_COLUMNS: the numeric columns the
+analyses group and filter by) and of the genre/cast/director links split by
+release_year into PARTITION_YEARS-wide ranges, one set of tables per range:
+    movie_facts_p1990, movie_genres_p1990, movie_cast_p1990, movie_directors_p1990
+The fact_partitions catalog lists every partition with its first and last
+year. Movies without a release year are in no partition (the analyses drop them).
+The partitions are a second copy: the base tables and their indexes still get
+every row, so keeping them makes loads slower (every movie and link row is
+written twice) in exchange for year-range queries that read only the years
+they ask for. PARTITION_FACTS is off by default; the loader then keeps no
+partitions (and drops existing ones), and queries read the base tables.
+
+Routing: the bulk and incremental loads delete a batch's movies from the
+partitions their stored years point to and insert the new rows into the
+partitions of their new years, inside the batch's transaction, creating a
+partition the first time a year range is seen. The full and row loads fill
+the partitions from the base tables in one pass at the end (rebuild), like
+the summaries.
+
+Pruning: query_years(db, sql, start_year, end_year) runs a per-partition
+query only on the partitions overlapping the year range, as one UNION ALL
+statement with a branch per partition; when none overlaps, the result is
+empty without reading any table. Each branch reads real tables, so its
+joins use that partition's keys; the movies / link tables are not replaced by
+a UNION ALL view because SQLite materialises such a view when it is joined.
+
+Run from the scripts folder:
+    python movie_partitions.py 1990 1999    # partitions read for that range, and genre counts
+"""
+
+import os
+import sys
+from operator import itemgetter
+
+import pandas as pd
+from sqlalchemy import Column, Index, MetaData, Table, delete, insert, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateTable
+
+from movie_query_cache import run_query
+
+# -----------------------------
+# Config
+# -----------------------------
+DB_PATH = os.path.join("..", "data", "movies.db")
+PARTITION_FACTS = False  # keep the year partitions (a second copy of the facts and links); off: none
+PARTITION_YEARS = 10  # years per partition (10 = one per decade); 0 keeps no partitions
+FACT_COLUMNS = ["id", "title", "release_year", "release_month", "budget", "revenue", "profit",
+                "runtime", "vote_average", "director_text"]
+CATALOG = "fact_partitions"
+YEAR_RANGE = (0, 9999)  # bounds used for an open start / end year
+
+# per-partition table -> base table it is split from
+PARTITIONED = {"movie_facts": "movies", "movie_genres": "movie_genres",
+               "movie_cast": "movie_cast", "movie_directors": "movie_directors"}
+
+
+class YearPartitions:
+    """
+    The partition tables of one schema: movies (the base facts table) and its
+    link tables, split by release_year; `catalog` lists the partitions.
+    """
+
+    def __init__(self, catalog, movies, links, span=None):
+        self.catalog = catalog
+        self.movies = movies
+        self.links = list(links)
+        self.span = (PARTITION_YEARS if PARTITION_FACTS else 0) if span is None else span
+        self.fact_columns = [c for c in movies.columns if c.name in FACT_COLUMNS]
+        self.fact_row = itemgetter(*[list(movies.columns).index(c) for c in self.fact_columns])
+        self.year_position = list(movies.columns).index(movies.c.release_year)
+        self.known = set()  # first years of the partitions in the database
+        self._tables = {}
+
+    def first_year(self, year):
+        return int(year) // self.span * self.span
+
+    def tables(self, first):
+        """{base table name: partition Table} for the partition starting at first."""
+        if first not in self._tables:
+            suffix = f"p{first}"
+            md = MetaData()
+            facts = Table(f"movie_facts_{suffix}", md,
+                          *[Column(c.name, c.type, primary_key=c.primary_key, autoincrement=False)
+                            for c in self.fact_columns])
+            Index(f"ix_movie_facts_{suffix}_year", facts.c.release_year)
+            parts = {self.movies.name: facts}
+            for link in self.links:
+                # clustered by movie: (movie_id, dimension id) is the key, as in the base table's unique index
+                key = [c.name for c in link.columns][:2]
+                parts[link.name] = Table(f"{link.name}_{suffix}", md,
+                                         *[Column(c.name, c.type, primary_key=c.name in key) for c in link.columns],
+                                         sqlite_with_rowid=False)
+            self._tables[first] = parts
+        return self._tables[first]
+
+    # -----------------------------
+    # Catalog
+    # -----------------------------
+    def load(self, conn):
+        """Read which partitions exist (call at the start of a load)."""
+        self.known = {r[0] for r in conn.execute(select(self.catalog.c.first_year))}
+        return len(self.known)
+
+    def _create(self, conn, first, indexes=True):
+        for table in self.tables(first).values():
+            if indexes:
+                table.create(conn, checkfirst=True)
+            else:
+                conn.execute(CreateTable(table, if_not_exists=True))
+        conn.execute(insert(self.catalog).values(name=f"p{first}", first_year=first,
+                                                 last_year=first + self.span - 1))
+        self.known.add(first)
+
+    def drop_all(self, conn):
+        """Drop every partition in the catalog and empty it."""
+        for first in [r[0] for r in conn.execute(select(self.catalog.c.first_year))]:
+            for table in self.tables(first).values():
+                table.drop(conn, checkfirst=True)
+        conn.execute(delete(self.catalog))
+        self.known = set()
+
+    def rebuild(self, conn):
+        """Recreate the partitions from the base tables (one INSERT ... SELECT per table and partition)."""
+        self.drop_all(conn)
+        if not self.span:
+            return 0
+        movies = self.movies.name
+        firsts = [r[0] for r in conn.execute(text(
+            f"SELECT DISTINCT release_year / {self.span} * {self.span} FROM {movies} "
+            f"WHERE release_year IS NOT NULL ORDER BY 1"))]
+        fact_names = ", ".join(c.name for c in self.fact_columns)
+        for first in firsts:
+            self._create(conn, first, indexes=False)
+            parts = self.tables(first)
+            in_range = f"release_year BETWEEN {first} AND {first + self.span - 1}"
+            conn.execute(text(f"INSERT INTO {parts[movies].name} ({fact_names}) "
+                              f"SELECT {fact_names} FROM {movies} WHERE {in_range} ORDER BY id"))
+            for link in self.links:
+                columns = [c.name for c in link.columns]
+                conn.execute(text(
+                    f"INSERT INTO {parts[link.name].name} ({', '.join(columns)}) "
+                    f"SELECT {', '.join('l.' + c for c in columns)} FROM {link.name} l "
+                    f"JOIN {movies} m ON m.id = l.movie_id WHERE m.{in_range} "
+                    f"ORDER BY l.{columns[0]}, l.{columns[1]}"))
+            for table in parts.values():
+                for index in table.indexes:
+                    index.create(conn)
+        return len(firsts)
+
+    def ensure(self, conn):
+        """
+        Bring the partitions in line with PARTITION_YEARS for a database that
+        has none yet (or partitions of another width): rebuilt from the movies
+        already loaded. With PARTITION_FACTS off (or PARTITION_YEARS = 0)
+        existing partitions are dropped.
+        """
+        spans = {last - first + 1 for first, last in
+                 conn.execute(select(self.catalog.c.first_year, self.catalog.c.last_year))}
+        if not self.span:
+            if spans:
+                self.drop_all(conn)
+            return False
+        if spans == {self.span}:
+            self.load(conn)
+            return False
+        if spans or conn.execute(text(f"SELECT 1 FROM {self.movies.name} "
+                                      f"WHERE release_year IS NOT NULL LIMIT 1")).first() is not None:
+            print("Building year partitions from existing data")
+            self.rebuild(conn)
+            return True
+        self.known = set()
+        return False
+
+    # -----------------------------
+    # Routing (inside a batch's transaction)
+    # -----------------------------
+    def delete(self, conn, ids):
+        """Remove movies (and their links) from the partitions of their stored years; call before they are deleted."""
+        if not self.known:
+            return
+        stored = conn.execute(select(self.movies.c.id, self.movies.c.release_year)
+                              .where(self.movies.c.id.in_(ids) & self.movies.c.release_year.isnot(None)))
+        by_partition = {}
+        for movie_id, year in stored:
+            by_partition.setdefault(self.first_year(year), []).append(movie_id)
+        for first, part_ids in by_partition.items():
+            if first not in self.known:
+                continue
+            for name, table in self.tables(first).items():
+                key = table.c.id if name == self.movies.name else table.c.movie_id
+                conn.execute(delete(table).where(key.in_(part_ids)))
+
+    def route(self, conn, movie_rows, link_rows):
+        """
+        (partition Table, row tuples) pairs for a batch: movie_rows are movies
+        tuples in table column order, link_rows one list of tuples per link
+        table. Missing partitions are created.
+        """
+        if not self.span:
+            return []
+        part_of = {}  # movie id -> first year of its partition
+        facts = {}
+        for row in movie_rows:
+            year = row[self.year_position]
+            if year is None:
+                continue
+            first = self.first_year(year)
+            part_of[row[0]] = first
+            facts.setdefault(first, []).append(self.fact_row(row))
+        for first in sorted(facts.keys() - self.known):
+            self._create(conn, first)
+        routed = [(self.tables(first)[self.movies.name], rows) for first, rows in sorted(facts.items())]
+        for link, rows in zip(self.links, link_rows):
+            by_partition = {}
+            for row in rows:
+                first = part_of.get(row[0])
+                if first is not None:
+                    by_partition.setdefault(first, []).append(row)
+            routed += [(self.tables(first)[link.name], part) for first, part in sorted(by_partition.items())]
+        return routed
+
+
+# -----------------------------
+# Pruning query layer
+# -----------------------------
+def partitions_for(db=DB_PATH, start_year=None, end_year=None, cache=None):
+    """Catalog rows (name, first_year, last_year) of the partitions overlapping the year range (all: no range)."""
+    low, high = _bounds(start_year, end_year)
+    try:
+        return run_query(db, f"SELECT name, first_year, last_year FROM {CATALOG} "
+                             "WHERE last_year >= :low AND first_year <= :high ORDER BY first_year",
+                         dict(low=low, high=high), cache=cache)
+    except OperationalError:  # database from before the partitions
+        return pd.DataFrame(columns=["name", "first_year", "last_year"])
+
+
+def _bounds(start_year, end_year):
+    return (YEAR_RANGE[0] if start_year is None else int(start_year),
+            YEAR_RANGE[1] if end_year is None else int(end_year))
+
+
+def partition_sql(sql, names, combine=None):
+    """
+    One SELECT over the named partitions: sql once per partition, with
+    {movie_facts}, {movie_genres}, {movie_cast} and {movie_directors} replaced
+    by that partition's tables, joined with UNION ALL. names None: one branch
+    over the base tables; no names: no rows (the base-table branch under a
+    constant false WHERE, which SQLite skips without reading a table).
+    combine, if given, wraps the union as {rows}.
+    """
+    if names:
+        union = "\nUNION ALL\n".join(sql.format(**{t: f"{t}_{name}" for t in PARTITIONED}) for name in names)
+    elif names is None:
+        union = sql.format(**PARTITIONED)
+    else:
+        union = f"SELECT * FROM ({sql.format(**PARTITIONED)}) WHERE 0"
+    return combine.format(rows=f"({union})") if combine else union
+
+
+def query_years(db=DB_PATH, sql="", start_year=None, end_year=None, combine=None, params=None, cache=None):
+    """
+    Run a per-partition query on the partitions overlapping [start_year, end_year]
+    (None = open) and return a DataFrame. sql must itself keep to the range,
+    with :start_year / :end_year (filled in, open bounds as YEAR_RANGE), since a
+    partition can reach past it. Aggregate across partitions with combine, e.g.
+        combine="SELECT name, SUM(n) AS movies FROM {rows} GROUP BY name"
+    On a database without partitions (PARTITION_FACTS off) the query runs on
+    the base tables; when partitions are kept but none overlaps, it returns no rows.
+    """
+    start, end = _bounds(start_year, end_year)
+    catalog = partitions_for(db, cache=cache)
+    if len(catalog):
+        names = catalog["name"][(catalog["last_year"] >= start) & (catalog["first_year"] <= end)].tolist()
+    else:
+        names = None  # no partitions kept: the base tables hold every movie
+    statement = partition_sql(sql, names, combine)
+    return run_query(db, statement, dict(params or {}, start_year=start, end_year=end), cache=cache)
+
+
+def genres_by_year(db=DB_PATH, start_year=None, end_year=None, cache=None):
+    """Movies per (release_year, genre) in the range, read from the overlapping partitions only."""
+    sql = """
+        SELECT f.release_year AS release_year, mg.genre_id AS genre_id, COUNT(*) AS movies
+        FROM {movie_genres} mg
+        JOIN {movie_facts} f ON f.id = mg.movie_id
+        WHERE f.release_year BETWEEN :start_year AND :end_year
+        GROUP BY f.release_year, mg.genre_id"""
+    combine = """
+        SELECT p.release_year, g.name AS genre, p.movies
+        FROM {rows} p JOIN genres g ON g.id = p.genre_id
+        ORDER BY p.release_year, p.movies DESC, g.name"""
+    return query_years(db, sql, start_year, end_year, combine, cache=cache)
+
+
+if __name__ == "__main__":
+    years = [int(y) for y in sys.argv[1:3]] + [None] * (2 - len(sys.argv[1:3]))
+    if len(partitions_for(DB_PATH)):
+        print("Partitions read:", partitions_for(DB_PATH, *years)["name"].tolist())
+    else:
+        print("Partitions read: none kept (PARTITION_FACTS off), base tables")
+    print(genres_by_year(DB_PATH, *years).head(20))
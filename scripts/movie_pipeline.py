@@ -0,0 +1,309 @@
+# movie_pipeline.py
+"""
+Pipeline runner: ingestion -> cleaning -> EDA transform -> validation -> load -> analysis, similarity, profile.
+
+Every stage declares its input and output paths plus the parameters it runs
+with. Before running a stage, the runner computes its fingerprint: a SHA-256
+over the stage's parameters, the source of the modules it runs and the state of
+its inputs (size + mtime of every file, or their contents with
+FINGERPRINT_CONTENTS). The fingerprint and the state of the outputs it produced
+are kept in PIPELINE_CACHE; a stage whose fingerprint is unchanged and whose
+outputs are still the ones it wrote is skipped.
+
+Stages depend on the stages that produce their inputs. Stages whose
+dependencies are done run concurrently in a thread pool (e.g. the two raw CSV
+imports). A skipped stage leaves its outputs untouched, so its dependants see
+unchanged inputs and are skipped too; after editing movie_analysis.py only the
+analysis stage runs again.
+
+Usage:
+    python movie_pipeline.py                 # run whatever is out of date
+    python movie_pipeline.py analysis        # bring one stage (and its inputs) up to date
+    python movie_pipeline.py --force load    # rerun a stage even if it is cached
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import movie_analysis
+import movie_cleaning
+import movie_eda
+import movie_ingestion
+import movie_load
+import movie_profile
+import movie_similarity
+import movie_validation
+from movie_instrumentation import stage as measured, write_metrics
+from movie_store import read_table
+
+# -----------------------------
+# Config
+# -----------------------------
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = movie_ingestion.DATA_DIR
+PIPELINE_CACHE = os.path.join(DATA_DIR, ".pipeline_cache.json")
+FINGERPRINT_CONTENTS = False  # hash input file contents instead of size + mtime
+MAX_WORKERS = 4
+
+CLEANED_STORE = movie_cleaning.CLEANED_STORE
+TRANSFORMED_STORE = os.path.join(DATA_DIR, "movies_transformed.store")
+VALIDATED_STORE = os.path.join(DATA_DIR, "movies_validated.store")
+QUARANTINE_STORE = os.path.join(DATA_DIR, "movies_quarantine.store")
+DB_PATH = os.path.join(DATA_DIR, "movies.db")
+ANALYSIS_DIR = os.path.join(DATA_DIR, "analysis")
+SIMILARITY_INDEX = os.path.join(DATA_DIR, "similarity_index.npz")
+PROFILE_PATH = os.path.join(DATA_DIR, "profile.json")
+
+
+# -----------------------------
+# Stage functions (inputs..., outputs..., **params)
+# -----------------------------
+def clean_stage(movies_store, credits_store, cleaned_store, chunksize):
+    return movie_cleaning.write_cleaned(
+        movie_ingestion.load_store_chunks(chunksize, movies_store, credits_store), cleaned_store)
+
+
+def transform_stage(cleaned_store, transformed_store):
+    return movie_eda.run_transform(cleaned_store, transformed_store)
+
+
+def validate_stage(transformed_store, validated_store, quarantine_store, chunk_rows):
+    return movie_validation.run_validation(transformed_store, validated_store, quarantine_store, chunk_rows)
+
+
+def load_stage(validated_store, quarantine_store, db_path, mode, batch_size):
+    frames = movie_load.read_transformed(validated_store, batch_size=batch_size)
+    count, _ = movie_load.run_load(frames, f"sqlite:///{db_path}", mode,
+                                   fingerprint=movie_load.input_fingerprint(validated_store),
+                                   quarantined=read_table(quarantine_store))
+    return count
+
+
+def analysis_stage(db_path, analysis_dir, plot_mode):
+    movie_analysis.run_analysis(db_path, analysis_dir, plot_mode)
+
+
+def similarity_stage(db_path, index_path, top_k):
+    return movie_similarity.run_similarity(db_path, index_path, top_k)
+
+
+def profile_stage(db_path, profile_path):
+    return movie_profile.run_profile(db_path, profile_path)
+
+
+class Stage:
+    """One pipeline step: func(*inputs, *outputs, **params), plus the modules whose code it runs."""
+
+    def __init__(self, name, func, inputs, outputs, params=None, code=()):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.code = list(code)
+
+    def run(self):
+        return self.func(*self.inputs, *self.outputs, **self.params)
+
+
+def default_stages():
+    return [
+        Stage("ingest_movies", movie_ingestion.import_raw,
+              [movie_ingestion.MOVIES_FILE], [movie_ingestion.MOVIES_STORE],
+              {"dtypes": movie_ingestion.MOVIES_DTYPES},
+              code=["movie_ingestion", "movie_store"]),
+        Stage("ingest_credits", movie_ingestion.import_raw,
+              [movie_ingestion.CREDITS_FILE], [movie_ingestion.CREDITS_STORE],
+              {"dtypes": movie_ingestion.CREDITS_DTYPES},
+              code=["movie_ingestion", "movie_store"]),
+        Stage("clean", clean_stage,
+              [movie_ingestion.MOVIES_STORE, movie_ingestion.CREDITS_STORE], [CLEANED_STORE],
+              {"chunksize": movie_ingestion.CHUNK_SIZE},
+              code=["movie_cleaning", "movie_credits", "movie_ingestion", "movie_store"]),
+        Stage("transform", transform_stage,
+              [CLEANED_STORE], [TRANSFORMED_STORE],
+              code=["movie_eda", "movie_compact", "movie_parsing", "movie_parallel", "movie_store"]),
+        Stage("validate", validate_stage,
+              [TRANSFORMED_STORE], [VALIDATED_STORE, QUARANTINE_STORE],
+              {"chunk_rows": movie_validation.CHUNK_ROWS},
+              code=["movie_validation", "movie_compact", "movie_store"]),
+        Stage("load", load_stage,
+              [VALIDATED_STORE, QUARANTINE_STORE], [DB_PATH],
+              {"mode": movie_load.LOAD_MODE, "batch_size": movie_load.BATCH_SIZE},
+              code=["movie_load", "movie_compact", "movie_dimensions", "movie_parsing", "movie_cdc", "movie_store",
+                    "movie_summaries", "movie_journal", "movie_search", "movie_partitions", "movie_shards"]),
+        Stage("analysis", analysis_stage,
+              [DB_PATH], [ANALYSIS_DIR],
+              {"plot_mode": movie_analysis.PLOT_MODE},
+              code=["movie_analysis", "movie_partitions", "movie_plots", "movie_query_cache"]),
+        Stage("similarity", similarity_stage,
+              [DB_PATH], [SIMILARITY_INDEX],
+              {"top_k": movie_similarity.TOP_K},
+              code=["movie_similarity", "movie_query_cache"]),
+        Stage("profile", profile_stage,
+              [DB_PATH], [PROFILE_PATH],
+              code=["movie_profile", "movie_query_cache"]),
+    ]
+
+
+# -----------------------------
+# Fingerprints
+# -----------------------------
+def _files(path):
+    """Every file under path (path itself when it is a file), sorted."""
+    if os.path.isdir(path):
+        found = []
+        for root, _, names in os.walk(path):
+            found.extend(os.path.join(root, n) for n in names)
+        return sorted(found)
+    return [path] if os.path.exists(path) else []
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def path_state(path, contents=False):
+    """What a path looks like now: (relative name, size, mtime or content hash) per file."""
+    state = []
+    for f in _files(path):
+        st = os.stat(f)
+        mark = _file_digest(f) if contents else st.st_mtime_ns
+        state.append([os.path.relpath(f, path) if f != path else "", st.st_size, mark])
+    return state
+
+
+def fingerprint(stage):
+    digest = hashlib.sha256()
+    digest.update(stage.name.encode())
+    digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+    for module in stage.code:
+        digest.update(_file_digest(os.path.join(SCRIPTS_DIR, f"{module}.py")).encode())
+    for path in stage.inputs:
+        digest.update(json.dumps([path, path_state(path, FINGERPRINT_CONTENTS)]).encode())
+    return digest.hexdigest()
+
+
+def outputs_state(stage):
+    return {path: path_state(path) for path in stage.outputs}
+
+
+def load_cache(path=PIPELINE_CACHE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache, path=PIPELINE_CACHE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def is_cached(stage, cache, key):
+    entry = cache.get(stage.name)
+    if not entry or entry.get("fingerprint") != key:
+        return False
+    current = outputs_state(stage)
+    return all(current[p] for p in stage.outputs) and current == entry.get("outputs")
+
+
+# -----------------------------
+# Scheduling
+# -----------------------------
+def dependencies(stages):
+    """stage name -> names of the stages producing its inputs."""
+    producers = {path: s.name for s in stages for path in s.outputs}
+    return {s.name: {producers[p] for p in s.inputs if p in producers} for s in stages}
+
+
+def _select(stages, deps, targets):
+    """The target stages plus everything upstream of them, in declaration order."""
+    if not targets:
+        return stages
+    unknown = set(targets) - {s.name for s in stages}
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {sorted(unknown)}")
+    wanted = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [s for s in stages if s.name in wanted]
+
+
+def run_pipeline(stages=None, targets=None, force=(), max_workers=MAX_WORKERS, cache_path=PIPELINE_CACHE):
+    """
+    Run (or skip) every selected stage once its dependencies are done.
+    Returns {stage name: "ran" | "cached"}.
+    """
+    stages = stages or default_stages()
+    deps = dependencies(stages)
+    stages = _select(stages, deps, targets)
+    cache = load_cache(cache_path)
+    lock = threading.Lock()
+    status = {}
+
+    def log(message):
+        with lock:
+            print(message, flush=True)
+
+    def execute(stage):
+        key = fingerprint(stage)
+        if stage.name not in force and is_cached(stage, cache, key):
+            log(f"[{stage.name}] up to date, skipped")
+            return "cached"
+        log(f"[{stage.name}] running")
+        started = time.perf_counter()
+        with measured(f"pipeline.{stage.name}"):
+            stage.run()
+        with lock:
+            cache[stage.name] = {"fingerprint": key, "outputs": outputs_state(stage)}
+            save_cache(cache, cache_path)
+        log(f"[{stage.name}] done in {time.perf_counter() - started:.2f}s")
+        return "ran"
+
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for stage in [s for s in pending if deps[s.name] <= set(status)]:
+                pending.remove(stage)
+                running[pool.submit(execute, stage)] = stage
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                # a failed stage stops the run; stages already started finish first
+                status[stage.name] = future.result()
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the movie pipeline, skipping up-to-date stages.")
+    parser.add_argument("stages", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--force", action="append", default=[], help="rerun this stage even if cached")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="stages run at the same time")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    status = run_pipeline(targets=args.stages, force=set(args.force), max_workers=args.workers)
+    write_metrics("movie_pipeline", out_dir=os.path.join(DATA_DIR, "metrics"))
+    ran = [name for name, s in status.items() if s == "ran"]
+    print(f"\nPipeline finished in {time.perf_counter() - started:.2f}s — "
+          f"ran: {', '.join(ran) or 'nothing'}; cached: {len(status) - len(ran)}")
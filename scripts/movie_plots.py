@@ -0,0 +1,192 @@
+# movie_plots.py
+"""
+Aggregate-first charts: the database bins the movies, Python only sees the bins.
+
+Instead of reading every movie into pandas and letting matplotlib bin
+(plt.hist) or draw (plt.scatter) each row, every chart is one GROUP BY query:
+    grid_bins()   2-D counts on a GRID_BINS x GRID_BINS grid (budget vs revenue)
+    histogram()   1-D bucket counts of one column (budget, revenue distributions)
+    yearly()      per-release_year count and average of a column
+The bucket edges come from one MIN/MAX query, so two small queries replace a
+full table read, and at most GRID_BINS ** 2 rows are transferred, at any
+number of movies. Results go through movie_query_cache like the other reports.
+
+Charts are described as plain dicts (kind, data, labels, output path) and
+rendered headless with matplotlib's Agg canvas (no pyplot, no display) by
+render_charts(), in a process pool of PLOT_WORKERS: each worker gets one
+chart's bins and writes one PNG.
+
+Run from the scripts folder:
+    python movie_plots.py     # ../data/movies.db -> ../data/analysis/*.png
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from movie_query_cache import run_query
+
+# -----------------------------
+# Config
+# -----------------------------
+DB_PATH = os.path.join("..", "data", "movies.db")
+PLOT_DIR = os.path.join("..", "data", "analysis")
+GRID_BINS = 80  # per axis of the budget vs revenue grid
+HIST_BINS = 50
+PLOT_WORKERS = min(4, os.cpu_count() or 1)
+PLOT_DPI = 100
+
+# the movies movie_analysis.load_movies keeps (it drops rows missing any of these)
+ANALYSED = "budget IS NOT NULL AND revenue IS NOT NULL AND profit IS NOT NULL AND release_year IS NOT NULL"
+
+
+# -----------------------------
+# Binning in SQL
+# -----------------------------
+def value_range(db, column, where=ANALYSED, cache=None):
+    """(min, max) of a movies column over the rows matching where; (None, None) if there are none."""
+    row = run_query(db, f"SELECT MIN({column}) AS low, MAX({column}) AS high FROM movies WHERE {where}",
+                    cache=cache).iloc[0]
+    if pd.isna(row["low"]):
+        return None, None
+    return float(row["low"]), float(row["high"])
+
+
+def _bucket(column, low, high, bins):
+    """SQL expression numbering the bucket of column (0 .. bins-1; the maximum goes into the last one)."""
+    width = (high - low) / bins or 1.0
+    return f"MIN({bins - 1}, CAST(({column} - {low!r}) / {width!r} AS INTEGER))", width
+
+
+def histogram(db, column, bins=HIST_BINS, where=ANALYSED, cache=None):
+    """(counts, edges) of one column, as np.histogram returns them, counted by the database."""
+    low, high = value_range(db, column, where, cache)
+    if low is None:
+        return np.zeros(bins, dtype=np.int64), np.linspace(0, 1, bins + 1)
+    bucket, width = _bucket(column, low, high, bins)
+    counts = run_query(db, f"SELECT {bucket} AS b, COUNT(*) AS n FROM movies WHERE {where} GROUP BY b",
+                       cache=cache)
+    dense = np.zeros(bins, dtype=np.int64)
+    dense[counts["b"].to_numpy(np.int64)] = counts["n"].to_numpy(np.int64)
+    return dense, low + width * np.arange(bins + 1)
+
+
+def grid_bins(db, x, y, bins=GRID_BINS, where=ANALYSED, cache=None):
+    """(counts[y bucket, x bucket], x edges, y edges): a 2-D histogram counted by the database."""
+    x_low, x_high = value_range(db, x, where, cache)
+    y_low, y_high = value_range(db, y, where, cache)
+    if x_low is None:
+        return np.zeros((bins, bins), dtype=np.int64), np.linspace(0, 1, bins + 1), np.linspace(0, 1, bins + 1)
+    x_bucket, x_width = _bucket(x, x_low, x_high, bins)
+    y_bucket, y_width = _bucket(y, y_low, y_high, bins)
+    cells = run_query(db, f"SELECT {x_bucket} AS bx, {y_bucket} AS by_, COUNT(*) AS n FROM movies "
+                          f"WHERE {where} GROUP BY bx, by_", cache=cache)
+    dense = np.zeros((bins, bins), dtype=np.int64)
+    dense[cells["by_"].to_numpy(np.int64), cells["bx"].to_numpy(np.int64)] = cells["n"].to_numpy(np.int64)
+    return dense, x_low + x_width * np.arange(bins + 1), y_low + y_width * np.arange(bins + 1)
+
+
+def yearly(db, column, where=ANALYSED, cache=None):
+    """release_year, movies and the average of column per year."""
+    return run_query(db, f"SELECT release_year, COUNT(*) AS movies, AVG({column}) AS {column} FROM movies "
+                         f"WHERE {where} GROUP BY release_year ORDER BY release_year", cache=cache)
+
+
+# -----------------------------
+# Rendering (Agg, in worker processes)
+# -----------------------------
+def render(chart):
+    """Draw one chart dict to chart["path"] with the Agg canvas; returns the path."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import LogNorm
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=chart.get("size", (8, 5)))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    kind = chart["kind"]
+    if kind == "grid":
+        counts = np.ma.masked_equal(chart["counts"], 0)
+        mesh = ax.pcolormesh(chart["x_edges"], chart["y_edges"], counts, cmap="Blues",
+                             norm=LogNorm(vmin=1, vmax=max(int(counts.max() or 1), 1)))
+        fig.colorbar(mesh, ax=ax, label="Movies")
+    elif kind == "hist":
+        edges = chart["edges"]
+        ax.bar(edges[:-1], chart["counts"], width=np.diff(edges), align="edge",
+               color=chart.get("color", "skyblue"), edgecolor="black")
+    elif kind == "line":
+        ax.plot(chart["x"], chart["y"], color=chart.get("color", "green"), marker="o")
+    elif kind == "bar":
+        ax.bar(range(len(chart["y"])), chart["y"], color=chart.get("color", "orange"))
+        ax.set_xticks(range(len(chart["x"])))
+        ax.set_xticklabels(chart["x"], rotation=45, ha="right")
+    else:
+        raise ValueError(f"Unknown chart kind: {kind}")
+    ax.set_title(chart["title"])
+    ax.set_xlabel(chart.get("xlabel", ""))
+    ax.set_ylabel(chart.get("ylabel", ""))
+    ax.grid(chart.get("grid", kind in ("grid", "line")))
+    fig.tight_layout()
+    fig.savefig(chart["path"], dpi=PLOT_DPI)
+    return chart["path"]
+
+
+def render_charts(charts, workers=PLOT_WORKERS):
+    """Render chart dicts to their paths, in a process pool when there are several; returns the paths."""
+    charts = list(charts)
+    for chart in charts:
+        os.makedirs(os.path.dirname(chart["path"]) or ".", exist_ok=True)
+    workers = min(workers, len(charts))
+    if workers <= 1:
+        return [render(c) for c in charts]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render, charts))
+
+
+# -----------------------------
+# The analysis charts
+# -----------------------------
+def budget_revenue_chart(db, out_dir, bins=GRID_BINS, cache=None):
+    counts, x_edges, y_edges = grid_bins(db, "budget", "revenue", bins, cache=cache)
+    return dict(kind="grid", counts=counts, x_edges=x_edges, y_edges=y_edges, title="Movie Budget vs Revenue",
+                xlabel="Budget", ylabel="Revenue", path=os.path.join(out_dir, "budget_vs_revenue.png"))
+
+
+def histogram_chart(db, column, out_dir, color, bins=HIST_BINS, cache=None):
+    counts, edges = histogram(db, column, bins, cache=cache)
+    return dict(kind="hist", counts=counts, edges=edges, color=color, title=f"{column.title()} Distribution",
+                xlabel=column.title(), ylabel="Number of Movies",
+                path=os.path.join(out_dir, f"{column}_distribution.png"))
+
+
+def analysis_charts(db=DB_PATH, out_dir=PLOT_DIR, yearly_profit=None, director_profit=None, cache=None):
+    """
+    Chart dicts for movie_analysis's charts plus the budget and revenue
+    distributions, all from binned queries. yearly_profit (release_year,
+    profit) and director_profit (a Series by director) default to SQL aggregates.
+    """
+    if yearly_profit is None:
+        yearly_profit = yearly(db, "profit", cache=cache)
+    if director_profit is None:
+        director_profit = run_query(db, "SELECT director_text, AVG(profit) AS profit FROM movies "
+                                        f"WHERE {ANALYSED} AND director_text IS NOT NULL "
+                                        "GROUP BY director_text ORDER BY profit DESC LIMIT 10",
+                                    cache=cache).set_index("director_text")["profit"]
+    return [
+        budget_revenue_chart(db, out_dir, cache=cache),
+        dict(kind="line", x=yearly_profit["release_year"].to_numpy(), y=yearly_profit["profit"].to_numpy(),
+             title="Average Movie Profit Over Years", xlabel="Year", ylabel="Average Profit",
+             path=os.path.join(out_dir, "profit_by_year.png")),
+        dict(kind="bar", x=[str(d) for d in director_profit.index], y=director_profit.to_numpy(), size=(9, 5),
+             title="Top 10 Directors by Average Profit", xlabel="Director", ylabel="Average Profit",
+             path=os.path.join(out_dir, "top_directors.png")),
+        histogram_chart(db, "budget", out_dir, "skyblue", cache=cache),
+        histogram_chart(db, "revenue", out_dir, "lightgreen", cache=cache),
+    ]
+
+
+if __name__ == "__main__":
+    paths = render_charts(analysis_charts(DB_PATH, PLOT_DIR))
+    print("Charts written:", ", ".join(paths))
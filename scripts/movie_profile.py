@@ -0,0 +1,331 @@
+# movie_profile.py
+"""
+Approximate per-column statistics of the database, in one streaming pass.
+
+profile_database() reads each table once, CHUNK_ROWS rows at a time, and
+feeds every column into fixed-size sketches, so memory does not grow with the
+table:
+    rows, nulls      exact counts (null rate)
+    HyperLogLog      approximate distinct count: 2 ** HLL_PRECISION one-byte
+                     registers (16 KB, about 0.8% standard error)
+    QuantileSketch   KLL-style compactors for numeric columns: min, max, mean
+                     exact; quartiles / p99 within about 1% of rank
+    FrequentItems    Misra-Gries counters for the most frequent values: each
+                     reported count is at most `error` below the true count
+All three sketches are mergeable, so chunk results combine without rereading.
+
+The finished profile is saved as JSON (PROFILE_PATH) with the database's data
+version (latest load run + file state, as movie_query_cache uses), and
+load_profile() returns the saved one while the database is unchanged: the
+pipeline's profile stage refreshes it after each load, and health checks
+(check_database.py --profile) read it instead of scanning again.
+
+Run from the scripts folder:
+    python movie_profile.py [table ...]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from movie_query_cache import file_state
+
+# -----------------------------
+# Config
+# -----------------------------
+DB_PATH = os.path.join("..", "data", "movies.db")
+PROFILE_PATH = os.path.join("..", "data", "profile.json")
+PROFILE_TABLES = ["movies", "genres", "movie_genres", "actors", "movie_cast", "directors", "movie_directors"]
+CHUNK_ROWS = 50_000
+HLL_PRECISION = 14
+QUANTILE_K = 256  # size of the top compactor
+TOP_COUNTERS = 256  # values tracked per column
+TOP_K = 5  # values reported per column
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+_NUMERIC_TYPES = ("INT", "REAL", "FLOA", "DOUB", "NUM", "DEC")
+
+
+# -----------------------------
+# Sketches
+# -----------------------------
+def _leading_zeros(x):
+    """Leading zero bits of each uint64 (64 for 0)."""
+    x = x.copy()
+    zeros = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        top_clear = (x >> np.uint64(64 - shift)) == 0
+        zeros[top_clear] += shift
+        x[top_clear] <<= np.uint64(shift)
+    zeros[x == 0] += 1
+    return zeros
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        """Add a Series / array of non-null values (hashed with pandas' hash_array)."""
+        if not len(values):
+            return
+        hashes = pd.util.hash_array(np.asarray(values))
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rank = np.minimum(_leading_zeros(hashes << np.uint64(self.precision)) + 1, 64 - self.precision + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            return m * np.log(m / empty)  # small counts: linear counting
+        return float(raw)
+
+
+class QuantileSketch:
+    """
+    KLL-style quantile sketch: level h holds items standing for 2 ** h values.
+    A level over its capacity is sorted and every other item (random offset)
+    moves up a level; capacities shrink by 2/3 per level below the top.
+    """
+
+    def __init__(self, k=QUANTILE_K, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+
+    def _capacity(self, level):
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - level - 1))))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compact()
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                odd = len(items) % 2
+                # an odd item out stays on this level
+                self.levels[level] = items[:odd]
+                kept = items[odd:][self.rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], kept])
+            level += 1
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return [None] * len(qs)
+        weights = np.concatenate([np.full(len(v), 2.0 ** h) for h, v in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        ranks = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side="left")
+        return items[order][np.minimum(ranks, len(items) - 1)].tolist()
+
+
+class FrequentItems:
+    """Misra-Gries summary of the most frequent values in TOP_COUNTERS counters."""
+
+    def __init__(self, counters=TOP_COUNTERS):
+        self.size = counters
+        self.counts = pd.Series(dtype="int64")
+        self.error = 0  # the most any kept count is below the true count
+
+    def update(self, values):
+        if not len(values):
+            return
+        self._add(pd.Series(values).value_counts(sort=False))
+
+    def merge(self, other):
+        self.error += other.error
+        self._add(other.counts)
+
+    def _add(self, counts):
+        merged = self.counts.add(counts, fill_value=0) if len(self.counts) else counts
+        if len(merged) > self.size:
+            cut = merged.nlargest(self.size + 1).iloc[-1]
+            merged = merged[merged > cut] - cut
+            self.error += int(cut)
+        self.counts = merged.astype("int64")
+
+    def top(self, k=TOP_K):
+        return [(_plain(v), int(c)) for v, c in self.counts.nlargest(k).items()]
+
+
+def _plain(value):
+    """A JSON-friendly scalar."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# -----------------------------
+# Profiling
+# -----------------------------
+class ColumnProfile:
+    """The sketches of one column."""
+
+    def __init__(self, name, numeric):
+        self.name = name
+        self.numeric = numeric
+        self.rows = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        self.frequent = FrequentItems()
+        self.quantiles = QuantileSketch() if numeric else None
+        self.low = self.high = None
+        self.total = 0.0
+
+    def update(self, series):
+        if self.numeric:
+            series = pd.to_numeric(series, errors="coerce").astype("float64")
+        values = series.dropna()
+        self.rows += len(series)
+        self.nulls += len(series) - len(values)
+        self.distinct.update(values.to_numpy())
+        self.frequent.update(values)
+        if self.numeric and len(values):
+            array = values.to_numpy()
+            self.quantiles.update(array)
+            self.low = array.min() if self.low is None else min(self.low, array.min())
+            self.high = array.max() if self.high is None else max(self.high, array.max())
+            self.total += float(array.sum())
+
+    def result(self):
+        present = self.rows - self.nulls
+        out = dict(null_rate=round(self.nulls / self.rows, 4) if self.rows else None,
+                   distinct=int(round(min(self.distinct.estimate(), present))),
+                   top=self.frequent.top(), top_error=self.frequent.error)
+        if self.numeric and present:
+            out.update(min=_plain(self.low), max=_plain(self.high), mean=self.total / present,
+                       quantiles=dict(zip((str(q) for q in QUANTILES), self.quantiles.quantiles(QUANTILES))))
+        return out
+
+
+def _columns(conn, table):
+    """(name, is numeric) of a table's columns, from their declared types."""
+    return [(name, any(t in (decl or "").upper() for t in _NUMERIC_TYPES))
+            for _, name, decl, *_ in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def profile_table(conn, table, chunk_rows=CHUNK_ROWS):
+    """{"rows": n, "columns": {name: statistics}} from one pass over the table."""
+    columns = [ColumnProfile(name, numeric) for name, numeric in _columns(conn, table)]
+    rows = 0
+    select = ", ".join(f'"{c.name}"' for c in columns)
+    for chunk in pd.read_sql_query(f'SELECT {select} FROM "{table}"', conn, chunksize=chunk_rows):
+        rows += len(chunk)
+        for column in columns:
+            column.update(chunk[column.name])
+    return dict(rows=rows, columns={c.name: c.result() for c in columns})
+
+
+def _connect(db):
+    return sqlite3.connect(f"file:{os.path.abspath(db)}?mode=ro", uri=True)
+
+
+def _existing(conn, tables):
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return [t for t in (tables or PROFILE_TABLES) if t in names]
+
+
+def profile_database(db=DB_PATH, tables=None, chunk_rows=CHUNK_ROWS):
+    """Profile of the given tables (PROFILE_TABLES by default) that exist in the database."""
+    conn = _connect(db)
+    try:
+        return {table: profile_table(conn, table, chunk_rows) for table in _existing(conn, tables)}
+    finally:
+        conn.close()
+
+
+def data_version(db, tables=None):
+    """
+    (latest load run, file state) of the database, as movie_query_cache
+    versions its results, and which of the tables exist.
+    """
+    conn = _connect(db)
+    try:
+        try:
+            run_id = conn.execute("SELECT MAX(id) FROM load_runs").fetchone()[0]
+        except sqlite3.OperationalError:
+            run_id = None
+        existing = _existing(conn, tables)
+    finally:
+        conn.close()
+    return [run_id, [list(f) for f in file_state(db)]], existing
+
+
+def save_profile(db=DB_PATH, path=PROFILE_PATH, tables=None):
+    """Profile the database and write it with its data version; returns the profile."""
+    version, _ = data_version(db)
+    profile = profile_database(db, tables)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(database=os.path.abspath(db), version=version, tables=profile), f, indent=1, default=str)
+    return profile
+
+
+def load_profile(db=DB_PATH, path=PROFILE_PATH, tables=None):
+    """The saved profile while the database is unchanged since it was taken, else a new one (saved)."""
+    version, existing = data_version(db, tables)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if (saved.get("database") == os.path.abspath(db) and saved.get("version") == version
+                and set(existing) <= set(saved["tables"])):
+            return {t: saved["tables"][t] for t in existing}
+    return save_profile(db, path, tables)
+
+
+def run_profile(db=DB_PATH, path=PROFILE_PATH):
+    """Profile the database and save it (pipeline stage); returns the number of rows read."""
+    profile = save_profile(db, path)
+    rows = sum(t["rows"] for t in profile.values())
+    print(f"Profiled {len(profile)} tables ({rows} rows) into", path)
+    return rows
+
+
+def print_profile(profile):
+    """One line per column: null rate, distinct count, quartiles and most frequent values."""
+    for table, stats in profile.items():
+        print(f"\n{table}: {stats['rows']} rows")
+        lines = []
+        for name, col in stats["columns"].items():
+            q = col.get("quantiles") or {}
+            lines.append(dict(column=name, null_rate=col["null_rate"], distinct=col["distinct"],
+                              min=col.get("min"), p25=q.get("0.25"), median=q.get("0.5"), p75=q.get("0.75"),
+                              max=col.get("max"),
+                              top=", ".join(f"{str(v)[:20]} ({c})" for v, c in col["top"][:3])))
+        with pd.option_context("display.width", 200, "display.max_colwidth", 60):
+            print(pd.DataFrame(lines).to_string(index=False))
+
+
+if __name__ == "__main__":
+    print_profile(save_profile(DB_PATH, PROFILE_PATH, sys.argv[1:] or None))
@@ -0,0 +1,181 @@
+# movie_query_cache.py
+"""
+Result cache for the analysis queries.
+
+run_query(db, sql, params) returns a DataFrame, served from an LRU cache when
+the same query (SQL with whitespace normalised, plus parameters) already ran
+against the same data. The cache is bounded by entry count and by the memory
+of the cached frames.
+
+Each entry remembers the database's data version when it was computed:
+    - the id of the latest row in load_runs (written by movie_load.run_load)
+    - for SQLite files, size + mtime of the database and its -wal file, which
+      also catches writes that did not go through the loader
+An entry from another version is dropped instead of returned. With CACHE_PATH
+set, the cache is pickled to disk after each new result, so repeated report
+runs in new processes start warm.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from movie_instrumentation import instrument_engine
+
+# -----------------------------
+# Config
+# -----------------------------
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_PATH = None  # e.g. "../data/query_cache.pkl" to keep results between runs
+
+# whitespace outside of quoted SQL literals
+_SQL_TOKENS = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|\s+")
+
+
+def normalise_sql(sql):
+    """Collapse whitespace (except inside literals) and drop a trailing ';'."""
+    sql = _SQL_TOKENS.sub(lambda m: m.group(1) or " ", sql).strip()
+    return sql.rstrip(";").rstrip()
+
+
+def cache_key(db_url, sql, params=None):
+    payload = json.dumps([db_url, normalise_sql(sql), params or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+class QueryCache:
+    """LRU of key -> (data version, DataFrame), bounded by entries and bytes."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, path=CACHE_PATH):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._read(path)
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, df):
+        size = _frame_bytes(df)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (version, df, size)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+            if self.path:
+                self._write(self.path)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def _drop(self, key):
+        _, _, size = self.entries.pop(key)
+        self.bytes -= size
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                entries = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        for key, entry in entries.items():
+            self.entries[key] = entry
+            self.bytes += entry[2]
+
+    def _write(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(dict(self.entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+QUERY_CACHE = QueryCache()
+_engines = {}
+
+
+def get_engine(db):
+    """db: an Engine, a database URL, or a path to an SQLite file."""
+    if not isinstance(db, str):
+        return db
+    url = db if "://" in db else f"sqlite:///{db}"
+    if url not in _engines:
+        _engines[url] = instrument_engine(create_engine(url, future=True))
+    return _engines[url]
+
+
+def file_state(database):
+    """(size, mtime) of an SQLite file and its -wal file; changes with every commit."""
+    files = []
+    for path in (database, database + "-wal"):
+        if os.path.exists(path):
+            st = os.stat(path)
+            files.append((st.st_size, st.st_mtime_ns))
+    return tuple(files)
+
+
+def data_version(conn, engine):
+    """Latest load run id, plus the database file state for SQLite."""
+    try:
+        run_id = conn.execute(text("SELECT MAX(id) FROM load_runs")).scalar()
+    except OperationalError:
+        conn.rollback()
+        run_id = None
+    database = engine.url.database
+    if engine.url.get_backend_name() == "sqlite" and database and database != ":memory:":
+        return (run_id, file_state(database))
+    return (run_id, ())
+
+
+def run_query(db, sql, params=None, cache=None):
+    """
+    Run sql (with optional bind params) and return a DataFrame, reusing a cached
+    result while the database's data version is unchanged.
+    Pass cache=False to bypass the cache.
+    """
+    engine = get_engine(db)
+    cache = QUERY_CACHE if cache is None else cache
+    with engine.connect() as conn:
+        if cache is False:
+            return pd.read_sql(text(sql), conn, params=params)
+        key = cache_key(str(engine.url), sql, params)
+        version = data_version(conn, engine)
+        df = cache.get(key, version)
+        if df is None:
+            df = pd.read_sql(text(sql), conn, params=params)
+            cache.put(key, version, df)
+    # callers may modify the frame they get back
+    return df.copy()
@@ -0,0 +1,281 @@
+# movie_query_service.py
+"""
+Read-optimised lookups over movies.db for other tools, instead of copying SQL
+out of movie_analysis.py / check_database.py:
+
+    service = MovieQueryService("../data/movies.db")
+    page = service.movies_by_actor("Tom Hanks", limit=50)
+    while page.next_cursor:
+        page = service.movies_by_actor("Tom Hanks", limit=50, after=page.next_cursor)
+
+Also movies_by_director, movies_by_genre and movies_by_years(start, end).
+
+ - A fixed pool of read-only sqlite3 connections (mode=ro), shared by
+   threads; each keeps its compiled statements (the SQL text is constant and
+   only the parameters change), so a lookup is bind + step.
+ - Keyset pagination: pages are ordered by a unique key, and the next page
+   starts after the last key of the previous one (an index seek), instead of
+   LIMIT/OFFSET, which re-reads every skipped row.
+ - An in-process LRU of recent pages, checked against the database's file
+   state (see movie_query_cache.file_state), so a commit by the loader
+   invalidates it.
+In WAL mode readers see the last committed batch and are not blocked by a
+load in progress. Run with --serve for a small JSON HTTP endpoint.
+
+Run from the scripts folder:
+    python movie_query_service.py actor "Tom Hanks"
+    python movie_query_service.py years 1990 1999
+    python movie_query_service.py --serve --port 8765
+"""
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from movie_query_cache import file_state
+
+# -----------------------------
+# Config
+# -----------------------------
+DB_PATH = os.path.join("..", "data", "movies.db")
+POOL_SIZE = 4  # read-only connections
+STATEMENT_CACHE = 64  # compiled statements kept per connection
+LRU_ENTRIES = 1024  # cached pages
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+BUSY_TIMEOUT_S = 5.0
+CONNECTION_PRAGMAS = {
+    "query_only": 1,
+    "cache_size": -65536,  # KiB per connection
+    "mmap_size": 256 * 1024 ** 2,
+}
+HTTP_HOST = "127.0.0.1"
+HTTP_PORT = 8765
+
+MOVIE_COLUMNS = ["id", "title", "release_year", "release_date", "vote_average", "runtime", "director_text"]
+_SELECT = ", ".join(f"m.{c}" for c in MOVIE_COLUMNS)
+
+# One statement per lookup; each pages on (link table's movie_id) or (release_year, id),
+# the columns of the index it seeks (ix_movie_*_<dimension>, ix_movies_release_year)
+QUERIES = {
+    "actor": f"""
+        SELECT {_SELECT}, mc.cast_order FROM actors a
+        JOIN movie_cast mc ON mc.actor_id = a.id
+        JOIN movies m ON m.id = mc.movie_id
+        WHERE a.name = ? AND mc.movie_id > ?
+        ORDER BY mc.movie_id LIMIT ?""",
+    "director": f"""
+        SELECT {_SELECT} FROM directors d
+        JOIN movie_directors md ON md.director_id = d.id
+        JOIN movies m ON m.id = md.movie_id
+        WHERE d.name = ? AND md.movie_id > ?
+        ORDER BY md.movie_id LIMIT ?""",
+    "genre": f"""
+        SELECT {_SELECT} FROM genres g
+        JOIN movie_genres mg ON mg.genre_id = g.id
+        JOIN movies m ON m.id = mg.movie_id
+        WHERE g.name = ? AND mg.movie_id > ?
+        ORDER BY mg.movie_id LIMIT ?""",
+    "years": f"""
+        SELECT {_SELECT} FROM movies m
+        WHERE (m.release_year, m.id) > (?, ?) AND m.release_year <= ?
+        ORDER BY m.release_year, m.id LIMIT ?""",
+}
+
+# rows of one page, and the cursor of the next one (None on the last page)
+Page = namedtuple("Page", ["rows", "next_cursor"])
+
+
+class ConnectionPool:
+    """A fixed set of read-only connections to one SQLite file, handed out one per caller."""
+
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(db_path)
+        self.db_path = db_path
+        self.idle = queue.Queue()
+        for _ in range(size):
+            self.idle.put(self._connect())
+
+    def _connect(self):
+        uri = "file:" + os.path.abspath(self.db_path).replace("?", "%3f") + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=BUSY_TIMEOUT_S,
+                               cached_statements=STATEMENT_CACHE)
+        conn.row_factory = sqlite3.Row
+        for name, value in CONNECTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+
+class MovieQueryService:
+    """Paged movie lookups by actor, director, genre and year range."""
+
+    def __init__(self, db_path=DB_PATH, pool_size=POOL_SIZE, lru_entries=LRU_ENTRIES):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.lru_entries = lru_entries
+        self.lru = OrderedDict()  # (lookup, params) -> (file state, Page)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _page(self, lookup, params, limit, key_of):
+        version = file_state(self.db_path)
+        cache_key = (lookup, params, limit)
+        with self.lock:
+            entry = self.lru.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self.lru.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        with self.pool.connection() as conn:
+            # one row more than asked tells whether there is a next page
+            rows = [dict(r) for r in conn.execute(QUERIES[lookup], params + (limit + 1,))]
+        more = len(rows) > limit
+        rows = rows[:limit]
+        page = Page(rows, key_of(rows[-1]) if more else None)
+        with self.lock:
+            self.lru[cache_key] = (version, page)
+            self.lru.move_to_end(cache_key)
+            while len(self.lru) > self.lru_entries:
+                self.lru.popitem(last=False)
+        return page
+
+    @staticmethod
+    def _limit(limit):
+        return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    def _by_name(self, lookup, name, limit, after):
+        after_id = int(after) if after else -1
+        return self._page(lookup, (name, after_id), self._limit(limit), lambda row: str(row["id"]))
+
+    def movies_by_actor(self, name, limit=PAGE_SIZE, after=None):
+        """Movies the actor is cast in, by movie id (rows include cast_order)."""
+        return self._by_name("actor", name, limit, after)
+
+    def movies_by_director(self, name, limit=PAGE_SIZE, after=None):
+        return self._by_name("director", name, limit, after)
+
+    def movies_by_genre(self, name, limit=PAGE_SIZE, after=None):
+        return self._by_name("genre", name, limit, after)
+
+    def movies_by_years(self, start_year, end_year, limit=PAGE_SIZE, after=None):
+        """Movies released in [start_year, end_year], by (release_year, id)."""
+        if after:
+            year, after_id = (int(v) for v in after.split(":"))
+        else:
+            year, after_id = int(start_year), -1
+        return self._page("years", (year, after_id, int(end_year)), self._limit(limit),
+                          lambda row: f"{row['release_year']}:{row['id']}")
+
+    def stats(self):
+        with self.lock:
+            return dict(hits=self.hits, misses=self.misses, cached_pages=len(self.lru))
+
+    def close(self):
+        self.pool.close()
+
+
+# -----------------------------
+# Optional HTTP endpoint
+# -----------------------------
+def make_handler(service):
+    """
+    GET /movies/actor?name=..  /movies/director?name=..  /movies/genre?name=..
+        /movies/years?start=1990&end=1999   (all take &limit= and &after=<next_cursor>)
+        /stats
+    -> JSON {"rows": [...], "next_cursor": ...}
+    """
+    lookups = {"actor": service.movies_by_actor, "director": service.movies_by_director,
+               "genre": service.movies_by_genre}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            args = {k: v[0] for k, v in parse_qs(url.query).items()}
+            parts = url.path.strip("/").split("/")
+            try:
+                if parts == ["stats"]:
+                    return self._send(200, service.stats())
+                if len(parts) != 2 or parts[0] != "movies":
+                    return self._send(404, {"error": "unknown path"})
+                paging = dict(limit=args.get("limit", PAGE_SIZE), after=args.get("after"))
+                if parts[1] == "years":
+                    page = service.movies_by_years(args["start"], args["end"], **paging)
+                elif parts[1] in lookups:
+                    page = lookups[parts[1]](args["name"], **paging)
+                else:
+                    return self._send(404, {"error": "unknown lookup"})
+            except (KeyError, ValueError) as e:
+                return self._send(400, {"error": f"bad or missing parameter: {e}"})
+            self._send(200, page._asdict())
+
+        def log_message(self, format, *args):
+            pass  # no per-request logging
+
+    return Handler
+
+
+def serve(service, host=HTTP_HOST, port=HTTP_PORT):
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Serving {service.db_path} on http://{host}:{port}/movies/...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paged movie lookups over movies.db.")
+    parser.add_argument("lookup", nargs="?", choices=["actor", "director", "genre", "years"])
+    parser.add_argument("values", nargs="*", help="a name, or start and end year")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--limit", type=int, default=PAGE_SIZE)
+    parser.add_argument("--serve", action="store_true", help="answer lookups over HTTP")
+    parser.add_argument("--port", type=int, default=HTTP_PORT)
+    args = parser.parse_args()
+
+    service = MovieQueryService(args.db)
+    if args.serve:
+        serve(service, port=args.port)
+    elif args.lookup == "years":
+        page = service.movies_by_years(*args.values, limit=args.limit)
+    elif args.lookup:
+        page = getattr(service, f"movies_by_{args.lookup}")(" ".join(args.values), limit=args.limit)
+    else:
+        parser.error("give a lookup, or --serve")
+    if not args.serve:
+        for row in page.rows:
+            print(row)
+        print("next cursor:", page.next_cursor)
+    service.close()
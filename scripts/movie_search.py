@@ -0,0 +1,161 @@
+# movie_search.py
+"""
+Full-text search over movie titles and overviews (SQLite FTS5).
+
+movies_fts is an external-content FTS5 index over movies.title,
+original_title and overview: it holds only the inverted index and reads the
+text back from movies by rowid (= movies.id). Triggers on movies keep it in
+step with every insert, update and delete, so the bulk, incremental and row
+loads (which replace movies with DELETE + INSERT) maintain it inside each
+batch's transaction. A full load drops the index along with the movies table
+and builds it in one pass after the last batch (build_search).
+
+search_movies(db, "star wars") ranks matches with bm25, weighting title hits
+above original-title and overview hits (SEARCH_WEIGHTS). Each word also
+matches as a prefix ("galax" finds "Galaxy"), and pages are taken with
+limit/offset. Results go through movie_query_cache, so repeated lookups are
+served from memory until the next load.
+
+Run from the scripts folder:
+    python movie_search.py star wars
+"""
+
+import os
+import re
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from movie_query_cache import run_query
+
+# -----------------------------
+# Config
+# -----------------------------
+DB_PATH = os.path.join("..", "data", "movies.db")
+FTS_TABLE = "movies_fts"
+FTS_COLUMNS = ["title", "original_title", "overview"]
+FTS_TOKENIZE = "unicode61 remove_diacritics 2"  # case- and accent-insensitive words
+FTS_PREFIX = "2 3"  # extra prefix indexes, so short prefix queries don't scan the term list
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)  # bm25 weight of a hit in title, original_title, overview
+SEARCH_PAGE_SIZE = 20
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+
+# -----------------------------
+# Index maintenance
+# -----------------------------
+def _triggers():
+    columns = ", ".join(FTS_COLUMNS)
+    new = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    delete = f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON movies BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON movies BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON movies BEGIN {delete} {insert} END",
+    ]
+
+
+def has_search(conn):
+    return conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                        {"name": FTS_TABLE}).first() is not None
+
+
+def create_search(conn):
+    """Create the (empty) FTS5 table and the triggers that keep it in sync with movies."""
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({', '.join(FTS_COLUMNS)}, "
+        f"content='movies', content_rowid='id', tokenize='{FTS_TOKENIZE}', prefix='{FTS_PREFIX}')"))
+    weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+    # ORDER BY rank then uses the weighted bm25 (and FTS5's sorted-rank shortcut)
+    conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', 'bm25({weights})')"))
+    for trigger in _triggers():
+        conn.execute(text(trigger))
+
+
+def drop_search(conn):
+    """Drop the triggers and the index (a full load rebuilds them at the end)."""
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+def build_search(conn):
+    """(Re)create the index and fill it from every movie in one pass."""
+    if conn.dialect.name != "sqlite":
+        return False
+    drop_search(conn)
+    create_search(conn)
+    conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+    return True
+
+
+def ensure_search(conn):
+    """
+    Create the index for a database that does not have one yet, filling it from
+    the movies already loaded. No-op on other databases or without FTS5.
+    """
+    if conn.dialect.name != "sqlite" or has_search(conn):
+        return False
+    try:
+        has_movies = conn.execute(text("SELECT 1 FROM movies LIMIT 1")).first() is not None
+        if has_movies:
+            print("Building full-text search index from existing data")
+        build_search(conn)
+    except OperationalError as e:  # SQLite built without FTS5
+        print("Full-text search disabled:", e.orig)
+        return False
+    return True
+
+
+# -----------------------------
+# Search API
+# -----------------------------
+def fts_query(query, prefix=True, columns=None):
+    """
+    FTS5 MATCH expression for free text: every word must match (as a prefix
+    when prefix=True), optionally only within the given columns. Operators and
+    quotes in the input are treated as plain text. None when there are no words.
+    """
+    words = _WORDS.findall(query)
+    if not words:
+        return None
+    terms = " ".join(f'"{w}"' + ("*" if prefix else "") for w in words)
+    if columns:
+        unknown = set(columns) - set(FTS_COLUMNS)
+        if unknown:
+            raise ValueError(f"Not searchable: {sorted(unknown)}; choose from {FTS_COLUMNS}")
+        terms = f"{{{' '.join(columns)}}} : ({terms})"
+    return terms
+
+
+def search_movies(db=DB_PATH, query="", limit=SEARCH_PAGE_SIZE, offset=0, prefix=True, columns=None, cache=None):
+    """
+    Movies matching query, best first (ties by id), as a DataFrame of
+    id, title, original_title, release_year, vote_average, score (higher is
+    better) and an overview snippet with the hits in [brackets].
+    Page through results with offset = page * limit.
+    """
+    match = fts_query(query, prefix, columns)
+    sql = f"""
+        SELECT m.id, m.title, m.original_title, m.release_year, m.vote_average,
+               -{FTS_TABLE}.rank AS score,
+               snippet({FTS_TABLE}, 2, '[', ']', '...', 12) AS snippet
+        FROM {FTS_TABLE}
+        JOIN movies m ON m.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH :match
+        ORDER BY {FTS_TABLE}.rank, m.id
+        LIMIT :limit OFFSET :offset"""
+    # no words: an impossible match keeps the result's columns
+    return run_query(db, sql, dict(match=match or '""', limit=int(limit), offset=int(offset)), cache=cache)
+
+
+if __name__ == "__main__":
+    terms = " ".join(sys.argv[1:]) or "star wars"
+    results = search_movies(DB_PATH, terms)
+    print(f"Top {len(results)} matches for {terms!r}:")
+    for row in results.itertuples(index=False):
+        print(f"{row.score:7.2f}  {row.title} ({row.release_year})  {row.snippet}")
@@ -0,0 +1,101 @@
+# movie_shards.py
+"""
+Shards for the parallel full load (movie_load.py, LOAD_MODE = "sharded").
+
+SQLite has one writer, so the serial loads use one core. A sharded load splits
+the transformed store into contiguous row ranges (shard_bounds, cut on batch
+boundaries so every batch is the one the serial load would see). Each range is
+loaded by a worker process into its own temporary SQLite file with the same
+row building as the bulk path, except that links are stored with the
+dimension *name* instead of its id (shard_schema):
+    movies                 the movies rows, as they will be in movies.db
+    movie_genres_names     movie_id, name
+    movie_cast_names       movie_id, name, cast_order
+    movie_directors_names  movie_id, name
+Workers also report every name in first-appearance order. The parent
+resolves those lists in shard order, one executemany per dimension, so the new
+genres, actors and directors get the ids a serial load hands out. Then each
+shard is merged (merge_shard): ATTACH, one INSERT ... SELECT per table (links
+joined to the dimension tables by name), in the shard's row order, DETACH.
+Rows reach movies.db in input order, so the merged tables, ids and the indexes,
+summaries, partitions and search index built afterwards match a serial full load.
+"""
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, Integer, MetaData, String, Table, text
+
+# Shards are scratch files: no journal, no fsync
+SHARD_PRAGMAS = {
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "cache_size": -65536,  # KiB
+    "temp_store": "MEMORY",
+}
+SHARD_SCHEMA = "shard"  # name a shard is attached under
+
+
+def shard_bounds(rows, shards, batch_size):
+    """(start, stop) row ranges of at most `shards` shards, each a whole number of batches."""
+    batches = -(-rows // batch_size)
+    edges = np.linspace(0, batches, min(shards, batches) + 1).astype(int) * batch_size
+    return [(int(a), int(min(b, rows))) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def shard_schema(movies, links):
+    """
+    MetaData of a shard, its movies table and one name-keyed table per link;
+    links: (link table, dimension table, order column or None) tuples.
+    No keys or indexes: shards are only appended to and read back in order.
+    """
+    md = MetaData()
+    facts = Table(movies.name, md, *[Column(c.name, c.type) for c in movies.columns])
+    named = [Table(f"{link.name}_names", md, Column("movie_id", Integer), Column("name", String),
+                   *([Column(order, Integer)] if order else []))
+             for link, _, order in links]
+    return md, facts, named
+
+
+def link_names(coded, movie_ids, with_order=False):
+    """
+    movie_load.link_rows without the ids: (movie_id, name[, position]) rows
+    (blank names dropped, a name repeated within a movie kept once, at its
+    last position) and the batch's names in first-appearance order.
+    """
+    if coded is None or not len(coded.codes):
+        return [], []
+    seen = pd.unique(coded.codes)
+    names = coded.dictionary[seen]
+    links = pd.DataFrame({"movie_id": movie_ids[coded.row_index()],
+                          "name": names[pd.Index(seen).get_indexer(coded.codes)]})
+    if with_order:
+        links["position"] = coded.positions()
+    named = links["name"].notna().to_numpy() & (links["name"] != "").to_numpy()
+    links = links[named].drop_duplicates(subset=["movie_id", "name"], keep="last")
+    return list(zip(*(links[c].tolist() for c in links.columns))), [n for n in names.tolist() if n]
+
+
+def merge_shard(conn, path, movies, links):
+    """
+    Append one shard to the database of conn in one transaction: its movies,
+    then each link table with the names joined to their dimension ids.
+    links: (link table, dimension table, shard link table, order column or None) tuples.
+    """
+    conn.exec_driver_sql(f"ATTACH DATABASE ? AS {SHARD_SCHEMA}", (path,))
+    conn.commit()
+    try:
+        with conn.begin():
+            columns = ", ".join(c.name for c in movies.columns)
+            conn.execute(text(f"INSERT INTO {movies.name} ({columns}) "
+                              f"SELECT {columns} FROM {SHARD_SCHEMA}.{movies.name} ORDER BY rowid"))
+            for link, dimension, named, order in links:
+                movie_column, id_column = [c.name for c in link.columns][:2]
+                target = [movie_column, id_column] + ([order] if order else [])
+                source = ["l.movie_id", "d.id"] + ([f"l.{order}"] if order else [])
+                conn.execute(text(
+                    f"INSERT INTO {link.name} ({', '.join(target)}) SELECT {', '.join(source)} "
+                    f"FROM {SHARD_SCHEMA}.{named.name} l JOIN {dimension.name} d ON d.name = l.name "
+                    f"ORDER BY l.rowid"))
+    finally:
+        conn.exec_driver_sql(f"DETACH DATABASE {SHARD_SCHEMA}")
+        conn.commit()
@@ -0,0 +1,326 @@
+# movie_similarity.py
+"""
+"Movies like this" index, precomputed from the loaded link tables.
+
+movie_genres and movie_cast form a movie x genre and a movie x actor graph.
+build_index() reads both once and keeps them as CSR arrays (row offsets,
+column indices and weights, as in movie_compact.CodedLists):
+    genres  IDF-weighted (a shared rare genre counts more than a shared Drama),
+            each movie's vector L2-normalised
+    cast    1 / (1 + cast_order) per actor (leads count more than the fifth
+            billed actor), L2-normalised
+Two movies' similarity is GENRE_WEIGHT * genre cosine + CAST_WEIGHT * cast
+cosine, and the TOP_K most similar movies of every movie are precomputed:
+    - the cast part is non-zero only for movies sharing an actor; those pairs
+      are expanded through the actor -> movies index, ROW_BLOCK movies at a time
+    - the genre part depends only on a movie's genre set ("profile"); the
+      highest genre-only scores of every profile come from a small profile x
+      profile matrix, and those movies are added as candidates
+so the top-k is exact (up to ties) without comparing every pair of movies.
+Actor co-occurrence (number of movies two actors share) is counted the same
+way from the movie -> actors index.
+
+Everything is saved to one .npz file. SimilarityIndex.similar(ids) and
+co_stars(ids) look up many movies / actors at once with array indexing.
+
+Run from the scripts folder:
+    python movie_similarity.py                  # build from ../data/movies.db
+    python movie_similarity.py --movie 19995    # show the movies most like one
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from movie_instrumentation import stage
+from movie_query_cache import run_query
+
+# -----------------------------
+# Config
+# -----------------------------
+DB_PATH = os.path.join("..", "data", "movies.db")
+SIMILARITY_INDEX = os.path.join("..", "data", "similarity_index.npz")
+TOP_K = 20
+GENRE_WEIGHT = 0.4
+CAST_WEIGHT = 0.6
+ROW_BLOCK = 4096  # movies whose candidate pairs are scored together
+
+
+# -----------------------------
+# CSR helpers
+# -----------------------------
+def _csr(rows, cols, values, n_rows):
+    """Row offsets plus cols/values sorted by (row, col)."""
+    order = np.lexsort((cols, rows))
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=offsets[1:])
+    return offsets, cols[order], values[order]
+
+
+def _normalise_rows(offsets, values):
+    """Divide each row's values by the row's L2 norm (empty rows stay empty)."""
+    lengths = np.diff(offsets)
+    norms = np.sqrt(np.add.reduceat(values ** 2, offsets[:-1][lengths > 0])) if len(values) else np.empty(0)
+    row_norm = np.ones(len(lengths))
+    row_norm[lengths > 0] = norms
+    return values / np.repeat(row_norm, lengths)
+
+
+def _expand(offsets, items):
+    """For every row in items (with repeats): its positions in the CSR arrays, and how many each has."""
+    starts = offsets[:-1][items]
+    counts = offsets[1:][items] - starts
+    total = counts.sum()
+    bases = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    return bases + np.arange(total, dtype=np.int64), counts
+
+
+def _top_per_row(rows, cols, scores, k):
+    """Keep the k best (score desc, col asc) entries of every row; returned sorted by row then rank."""
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    first = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.empty(0, np.int64)
+    rank = np.arange(len(rows)) - np.repeat(first, np.diff(np.r_[first, len(rows)]))
+    keep = rank < k
+    return rows[keep], cols[keep], scores[keep], rank[keep]
+
+
+def _pair_sums(rows, cols, values, n_cols):
+    """Sum values per distinct (row, col) pair."""
+    keys, inverse = np.unique(rows * n_cols + cols, return_inverse=True)
+    return keys // n_cols, keys % n_cols, np.bincount(inverse.ravel(), weights=values)
+
+
+# -----------------------------
+# Building
+# -----------------------------
+def genre_profiles(offsets, cols, weights, n_genres):
+    """
+    Group movies by genre set: (profile of each movie, profile x genre unit
+    vectors). Genre sets are compared as bitsets, 64 genres per word.
+    """
+    n_movies = len(offsets) - 1
+    words = max(1, (n_genres + 63) // 64)
+    bits = np.zeros((n_movies, words), dtype=np.uint64)
+    rows = np.repeat(np.arange(n_movies), np.diff(offsets))
+    np.bitwise_or.at(bits, (rows, cols // 64), np.left_shift(np.uint64(1), (cols % 64).astype(np.uint64)))
+    _, first, profile = np.unique(bits, axis=0, return_index=True, return_inverse=True)
+    vectors = np.zeros((len(first), n_genres))
+    members, member_counts = _expand(offsets, first)
+    vectors[np.repeat(np.arange(len(first)), member_counts), cols[members]] = weights[members]
+    return profile.ravel(), vectors
+
+
+def genre_pools(profile, vectors, k):
+    """
+    Per profile, the k + 1 movies with the highest genre cosine to it (ties by
+    row) and that cosine; -1 / 0 padded. k + 1 leaves k after dropping the movie itself.
+    """
+    n_profiles = len(vectors)
+    cosine = vectors @ vectors.T
+    members = np.argsort(profile, kind="stable")
+    member_offsets = np.zeros(n_profiles + 1, dtype=np.int64)
+    np.cumsum(np.bincount(profile, minlength=n_profiles), out=member_offsets[1:])
+    pool_rows = np.full((n_profiles, k + 1), -1, dtype=np.int64)
+    pool_scores = np.zeros((n_profiles, k + 1))
+    for p in range(n_profiles):
+        ranked = np.lexsort((np.arange(n_profiles), -cosine[p]))
+        ranked = ranked[cosine[p, ranked] > 0]
+        sizes = np.diff(member_offsets)[ranked]
+        needed = np.searchsorted(np.cumsum(sizes), k + 1) + 1
+        rows = np.concatenate([members[member_offsets[q]:member_offsets[q + 1]] for q in ranked[:needed]] or
+                              [np.empty(0, np.int64)])[:k + 1]
+        pool_rows[p, :len(rows)] = rows
+        pool_scores[p, :len(rows)] = cosine[p, profile[rows]]
+    return pool_rows, pool_scores, cosine
+
+
+def top_similar(genre_profile, genre_pool, cast, k=TOP_K, block=ROW_BLOCK):
+    """
+    (neighbour rows, scores): the k most similar movies of every movie, best
+    first, -1 / NaN padded.
+    genre_profile: output of genre_profiles; genre_pool: output of genre_pools;
+    cast: (movie offsets, actor cols, weights) plus (actor offsets, movie rows, weights).
+    """
+    profile = genre_profile
+    pool_rows, pool_scores, cosine = genre_pool
+    (cast_offsets, cast_actors, cast_w), (actor_offsets, actor_movies, actor_w) = cast
+    n_movies = len(profile)
+    neighbours = np.full((n_movies, k), -1, dtype=np.int64)
+    scores = np.full((n_movies, k), np.nan)
+    for lo in range(0, n_movies, block):
+        hi = min(lo + block, n_movies)
+        # cast: every (movie, co-cast movie) pair through each shared actor
+        items = np.arange(cast_offsets[lo], cast_offsets[hi])
+        item_rows = np.repeat(np.arange(lo, hi), np.diff(cast_offsets[lo:hi + 1]))
+        partners, counts = _expand(actor_offsets, cast_actors[items])
+        rows = np.repeat(item_rows, counts)
+        cols = actor_movies[partners]
+        values = np.repeat(cast_w[items], counts) * actor_w[partners]
+        other = rows != cols
+        rows, cols, cast_scores = _pair_sums(rows[other], cols[other], values[other], n_movies)
+        total = CAST_WEIGHT * cast_scores + GENRE_WEIGHT * cosine[profile[rows], profile[cols]]
+        # genre-only candidates: the best of the movie's genre profile
+        block_rows = np.arange(lo, hi)
+        pool_r = np.repeat(block_rows, k + 1)
+        pool_c = pool_rows[profile[block_rows]].ravel()
+        pool_s = GENRE_WEIGHT * pool_scores[profile[block_rows]].ravel()
+        valid = (pool_c >= 0) & (pool_c != pool_r)
+        rows = np.concatenate([rows, pool_r[valid]])
+        cols = np.concatenate([cols, pool_c[valid]])
+        total = np.concatenate([total, pool_s[valid]])
+        # a pool movie that also shares an actor keeps its full (higher) score
+        order = np.lexsort((-total, cols, rows))
+        rows, cols, total = rows[order], cols[order], total[order]
+        first = np.r_[True, (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])]
+        rows, cols, total, rank = _top_per_row(rows[first], cols[first], total[first], k)
+        neighbours[rows, rank] = cols
+        scores[rows, rank] = total
+    return neighbours, scores
+
+
+def co_occurrence(cast_offsets, cast_actors, n_actors):
+    """Actor x actor counts of shared movies as CSR, each row sorted by count desc, then actor."""
+    n_movies = len(cast_offsets) - 1
+    movie_of_item = np.repeat(np.arange(n_movies), np.diff(cast_offsets))
+    partners, counts = _expand(cast_offsets, movie_of_item)
+    first = np.repeat(cast_actors, counts)
+    second = cast_actors[partners]
+    other = first != second
+    rows, cols, shared = _pair_sums(first[other], second[other], np.ones(other.sum()), n_actors)
+    order = np.lexsort((cols, -shared, rows))
+    offsets = np.zeros(n_actors + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_actors), out=offsets[1:])
+    return offsets, cols[order], shared[order].astype(np.int64)
+
+
+def read_graph(db):
+    """Movie ids and the genre / cast link rows, as arrays."""
+    movie_ids = run_query(db, "SELECT id FROM movies ORDER BY id", cache=False)["id"].to_numpy(np.int64)
+    genres = run_query(db, "SELECT movie_id, genre_id FROM movie_genres", cache=False)
+    cast = run_query(db, "SELECT movie_id, actor_id, cast_order FROM movie_cast", cache=False)
+    return movie_ids, genres, cast
+
+
+def build_index(db=DB_PATH, k=TOP_K):
+    """Read the link tables from db and compute the whole SimilarityIndex."""
+    movie_ids, genres, cast = read_graph(db)
+    n_movies = len(movie_ids)
+
+    # genres: IDF-weighted, unit length per movie
+    genre_rows = np.searchsorted(movie_ids, genres["movie_id"].to_numpy(np.int64))
+    genre_cols, genre_ids = pd.factorize(genres["genre_id"], sort=True)
+    movies_per_genre = np.bincount(genre_cols, minlength=len(genre_ids))
+    idf = np.log((1 + n_movies) / (1 + movies_per_genre)) + 1
+    genre_offsets, genre_cols, genre_w = _csr(genre_rows, genre_cols, idf[genre_cols], n_movies)
+    genre_w = _normalise_rows(genre_offsets, genre_w)
+
+    # cast: billing-order weights, unit length per movie; plus the actor -> movies side
+    cast_rows = np.searchsorted(movie_ids, cast["movie_id"].to_numpy(np.int64))
+    actor_cols, actor_ids = pd.factorize(cast["actor_id"], sort=True)
+    order = cast["cast_order"].fillna(0).to_numpy(np.float64)
+    cast_offsets, cast_actors, cast_w = _csr(cast_rows, actor_cols, 1.0 / (1.0 + order), n_movies)
+    cast_w = _normalise_rows(cast_offsets, cast_w)
+    item_rows = np.repeat(np.arange(n_movies), np.diff(cast_offsets))
+    actor_offsets, actor_movies, actor_w = _csr(cast_actors, item_rows, cast_w, len(actor_ids))
+
+    profile, vectors = genre_profiles(genre_offsets, genre_cols, genre_w, len(genre_ids))
+    pools = genre_pools(profile, vectors, k)
+    neighbours, scores = top_similar(profile, pools, ((cast_offsets, cast_actors, cast_w),
+                                                      (actor_offsets, actor_movies, actor_w)), k)
+    co_offsets, co_actors, co_counts = co_occurrence(cast_offsets, cast_actors, len(actor_ids))
+
+    return SimilarityIndex(
+        movie_ids=movie_ids, genre_ids=np.asarray(genre_ids, np.int64), actor_ids=np.asarray(actor_ids, np.int64),
+        genre_offsets=genre_offsets, genre_cols=genre_cols, genre_weights=genre_w,
+        cast_offsets=cast_offsets, cast_cols=cast_actors, cast_weights=cast_w,
+        similar_rows=neighbours, similar_scores=scores,
+        co_offsets=co_offsets, co_actors=co_actors, co_counts=co_counts)
+
+
+# -----------------------------
+# Lookups
+# -----------------------------
+class SimilarityIndex:
+    """The arrays of one build; ids are database ids, rows/cols positions in movie_ids / actor_ids."""
+
+    def __init__(self, **arrays):
+        self.arrays = arrays
+        for name, value in arrays.items():
+            setattr(self, name, value)
+
+    def save(self, path=SIMILARITY_INDEX):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **self.arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=SIMILARITY_INDEX):
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    @staticmethod
+    def _positions(ids, known):
+        """Positions of ids in the sorted known ids, -1 where absent."""
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        pos = np.searchsorted(known, ids)
+        pos[pos == len(known)] = 0
+        return np.where(known[pos] == ids, pos, -1) if len(known) else np.full(len(ids), -1)
+
+    def similar(self, movie_ids, k=None):
+        """
+        (ids, scores), each len(movie_ids) x k: the most similar movies of each
+        given movie, best first; -1 / NaN padded (and for unknown ids).
+        """
+        k = self.similar_rows.shape[1] if k is None else min(k, self.similar_rows.shape[1])
+        rows = self._positions(movie_ids, self.movie_ids)
+        neighbours = self.similar_rows[np.maximum(rows, 0), :k]
+        scores = self.similar_scores[np.maximum(rows, 0), :k].copy()
+        ids = np.where(neighbours >= 0, self.movie_ids[np.maximum(neighbours, 0)], -1)
+        ids[rows < 0], scores[rows < 0] = -1, np.nan
+        return ids, scores
+
+    def co_stars(self, actor_ids, k=10):
+        """(actor ids, shared movie counts), each len(actor_ids) x k, most frequent first; -1 / 0 padded."""
+        rows = self._positions(actor_ids, self.actor_ids)
+        starts = np.where(rows >= 0, self.co_offsets[np.maximum(rows, 0)], 0)
+        lengths = np.where(rows >= 0, np.diff(self.co_offsets)[np.maximum(rows, 0)], 0)
+        take = np.arange(k) < np.minimum(lengths, k)[:, None]
+        positions = np.where(take, starts[:, None] + np.arange(k), 0)
+        ids = np.where(take, self.actor_ids[self.co_actors[positions]] if len(self.co_actors) else -1, -1)
+        counts = np.where(take, self.co_counts[positions] if len(self.co_counts) else 0, 0)
+        return ids, counts
+
+
+def run_similarity(db=DB_PATH, index_path=SIMILARITY_INDEX, k=TOP_K):
+    """Build the index from db and save it; returns the number of movies indexed."""
+    with stage("similarity") as s:
+        index = build_index(db, k)
+        index.save(index_path)
+        s.rows_out = len(index.movie_ids)
+    print(f"Similarity index for {len(index.movie_ids)} movies written to", index_path)
+    return len(index.movie_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the 'movies like this' index.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--index", default=SIMILARITY_INDEX)
+    parser.add_argument("--movie", type=int, nargs="*", help="movie ids to look up (builds the index if missing)")
+    args = parser.parse_args()
+
+    if args.movie is None or not os.path.exists(args.index):
+        run_similarity(args.db, args.index)
+    if args.movie:
+        index = SimilarityIndex.load(args.index)
+        ids, scores = index.similar(args.movie, 10)
+        titles = run_query(args.db, "SELECT id, title FROM movies").set_index("id")["title"]
+        for movie_id, row_ids, row_scores in zip(args.movie, ids, scores):
+            print(f"\nMost like {titles.get(movie_id, movie_id)}:")
+            for other, score in zip(row_ids, row_scores):
+                if other >= 0:
+                    print(f"  {score:.3f}  {titles.get(other, other)}")
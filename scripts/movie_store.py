@@ -0,0 +1,380 @@
+# movie_store.py
+"""
+Typed columnar store used between pipeline stages (cleaning -> EDA -> load).
+
+A store is a directory holding one schema.json plus raw binary column files:
+    numeric   <col>.bin (explicit numpy dtype) [+ <col>.valid.bin for ints/bools]
+    datetime  <col>.bin (int64 nanoseconds, NaT kept as NaT)
+    string    <col>.data.bin (UTF-8 bytes) + <col>.offsets.bin (int64) + <col>.valid.bin
+    list      the items as a string column + <col>.list_offsets.bin (int64)
+    category  <col>.codes.bin (int32, -1 = missing) + the distinct values as
+              a string column <col>.dict.* (written on close)
+    codes     a dictionary-coded list column (movie_compact.CodedLists):
+              <col>.codes.bin (int32 per item) + <col>.list_offsets.bin + <col>.dict.*
+Files are plain appendable binaries, so chunked writers stream straight to
+disk, and readers memory-map them (np.memmap) instead of re-parsing text.
+List columns are kept as values/offsets arrays, so no repr strings need a
+literal_eval on the way back in. CSV stays only as import/export.
+Writers take DataFrames or movie_compact.CompactMovies; StoreReader.compact()
+reads rows back as CompactMovies without building Python lists.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from movie_compact import CodedLists, CompactMovies, compact_dtypes
+
+SCHEMA_FILE = "schema.json"
+STORE_VERSION = 1
+
+
+def _kind_of(series):
+    """Pick the storage kind for a column from its dtype / contents."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "category", None
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime", "int64"
+    if pd.api.types.is_bool_dtype(dtype):
+        return "numeric", "bool"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "numeric", "int64"
+    if pd.api.types.is_float_dtype(dtype):
+        return "numeric", "float64"
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred in ("string", "empty"):
+        return "string", None
+    if inferred == "mixed" and series.dropna().map(lambda v: isinstance(v, (list, tuple, np.ndarray))).all():
+        return "list", None
+    raise TypeError(f"Column {series.name!r} ({inferred}) cannot be stored; convert it to str first")
+
+
+def _kind_from_spec(spec):
+    """Storage kind for an explicit dtype given to StoreWriter."""
+    if spec in ("string", "list", "category", "codes"):
+        return spec, None
+    dtype = np.dtype(spec)
+    if dtype.kind == "M":
+        return "datetime", "int64"
+    return "numeric", dtype.name
+
+
+def _encode_strings(items):
+    """UTF-8 encode a sequence of str/None -> (bytes, lengths, valid)."""
+    valid = np.fromiter((isinstance(v, str) for v in items), dtype=bool, count=len(items))
+    encoded = [v.encode("utf-8") if isinstance(v, str) else b"" for v in items]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    return b"".join(encoded), lengths, valid
+
+
+class StoreWriter:
+    """
+    Appends DataFrame or CompactMovies chunks to a store. The schema is fixed by
+    the first chunk, except for columns listed in `dtypes` (column -> "string",
+    "list", "category", "codes", "datetime64[ns]" or a numpy dtype); pass it when an early chunk could
+    mislead inference, e.g. a text column that is all-NaN in the first chunk.
+    The store is written to a temporary directory and swapped in on close().
+    """
+
+    def __init__(self, path, dtypes=None):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.dtypes = dtypes or {}
+        self.columns = None
+        self.rows = 0
+        self.byte_ends = {}  # string/list column -> bytes written so far
+        self.item_ends = {}  # list column -> items written so far
+        self.dictionaries = {}  # category/codes column -> {value: code}
+        if os.path.exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+
+    def _file(self, name):
+        return os.path.join(self.tmp_path, name)
+
+    def _write(self, name, array):
+        with open(self._file(name), "ab") as f:
+            f.write(np.ascontiguousarray(array).tobytes())
+
+    def _start(self, df, lists):
+        self.columns = []
+        for name in list(df.columns) + list(lists):
+            if name in self.dtypes:
+                kind, dtype = _kind_from_spec(self.dtypes[name])
+            elif name in lists:
+                kind, dtype = "codes", None
+            else:
+                kind, dtype = _kind_of(df[name])
+            self.columns.append({"name": name, "kind": kind, "dtype": dtype})
+            if kind in ("string", "list"):
+                self.byte_ends[name] = 0
+                self._write(f"{name}.offsets.bin", np.zeros(1, dtype=np.int64))
+            if kind in ("list", "codes"):
+                self.item_ends[name] = 0
+                self._write(f"{name}.list_offsets.bin", np.zeros(1, dtype=np.int64))
+            if kind in ("category", "codes"):
+                self.dictionaries[name] = {}
+
+    def _global_codes(self, name, codes, dictionary):
+        """Map a chunk's codes into the column's store-wide dictionary (only the used entries)."""
+        known = self.dictionaries[name]
+        remap = np.full(len(dictionary) + 1, -1, dtype=np.int32)  # last slot: -1 stays -1
+        for code in np.unique(codes[codes >= 0]).tolist():
+            remap[code] = known.setdefault(dictionary[code], len(known))
+        return remap[codes]
+
+    def _append_strings(self, name, items):
+        blob, lengths, valid = _encode_strings(items)
+        self._write(f"{name}.data.bin", np.frombuffer(blob, dtype=np.uint8))
+        self._write(f"{name}.offsets.bin", self.byte_ends[name] + np.cumsum(lengths))
+        self._write(f"{name}.valid.bin", valid)
+        self.byte_ends[name] += len(blob)
+
+    def append(self, data):
+        """Append a DataFrame or a CompactMovies chunk."""
+        df, lists = (data.frame, data.lists) if isinstance(data, CompactMovies) else (data, {})
+        if self.columns is None:
+            self._start(df, lists)
+        missing = [c["name"] for c in self.columns if c["name"] not in df.columns and c["name"] not in lists]
+        if missing:
+            raise ValueError(f"Chunk is missing columns {missing}")
+
+        for col in self.columns:
+            name, kind = col["name"], col["kind"]
+            if name in lists:
+                coded = lists[name]
+                series = None if kind == "codes" else pd.Series(coded.to_lists(), dtype=object)
+            else:
+                series = df[name]
+            if kind == "codes":
+                if series is not None:
+                    coded = CodedLists.from_series(series)
+                self._write(f"{name}.codes.bin", self._global_codes(name, coded.codes, coded.dictionary))
+                self._write(f"{name}.list_offsets.bin", self.item_ends[name] + coded.offsets[1:])
+                self.item_ends[name] += len(coded.codes)
+            elif kind == "category":
+                values = series.array if isinstance(series.dtype, pd.CategoricalDtype) else pd.Categorical(series)
+                codes = np.asarray(values.codes, dtype=np.int32)
+                self._write(f"{name}.codes.bin",
+                            self._global_codes(name, codes, values.categories.to_numpy(dtype=object)))
+            elif kind == "numeric":
+                if np.dtype(col["dtype"]).kind == "f":
+                    self._write(f"{name}.bin", series.to_numpy(dtype=col["dtype"], na_value=np.nan))
+                else:
+                    # ints/bools have no NaN: store 0 plus a validity mask
+                    self._write(f"{name}.bin", series.to_numpy(dtype=col["dtype"], na_value=0))
+                    self._write(f"{name}.valid.bin", series.notna().to_numpy())
+            elif kind == "datetime":
+                values = pd.to_datetime(series, errors="coerce").to_numpy(dtype="datetime64[ns]")
+                self._write(f"{name}.bin", values.view(np.int64))
+            elif kind == "string":
+                self._append_strings(name, series.tolist())
+            else:
+                cells = [list(v) if isinstance(v, (list, tuple, np.ndarray)) else [] for v in series.tolist()]
+                lengths = np.fromiter(map(len, cells), dtype=np.int64, count=len(cells))
+                self._append_strings(name, [item for cell in cells for item in cell])
+                self._write(f"{name}.list_offsets.bin", self.item_ends[name] + np.cumsum(lengths))
+                self.item_ends[name] += int(lengths.sum())
+        self.rows += len(df)
+
+    def close(self):
+        for name, known in self.dictionaries.items():
+            blob, lengths, valid = _encode_strings(list(known))
+            offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            self._write(f"{name}.dict.data.bin", np.frombuffer(blob, dtype=np.uint8))
+            self._write(f"{name}.dict.offsets.bin", offsets)
+            self._write(f"{name}.dict.valid.bin", valid)
+            next(c for c in self.columns if c["name"] == name)["dictionary_size"] = len(known)
+        schema = {"version": STORE_VERSION, "rows": self.rows, "columns": self.columns or []}
+        with open(self._file(SCHEMA_FILE), "w", encoding="utf-8") as f:
+            json.dump(schema, f, indent=1)
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+def write_table(path, df, dtypes=None):
+    """Write a whole DataFrame as a store."""
+    with StoreWriter(path, dtypes) as writer:
+        writer.append(df)
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def is_store(path):
+    return os.path.exists(os.path.join(path, SCHEMA_FILE))
+
+
+def read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _map(path, name, dtype, count):
+    """Memory-map one column file (an empty array when there is nothing to map)."""
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(os.path.join(path, name), dtype=dtype, mode="r", shape=(count,))
+
+
+def _decode_strings(data, offsets, valid):
+    """Decode rows of a string column; offsets has len(valid) + 1 entries."""
+    if len(valid) == 0:
+        return np.empty(0, dtype=object)
+    start, end = int(offsets[0]), int(offsets[-1])
+    blob = bytes(data[start:end])
+    rel = (np.asarray(offsets) - start).tolist()
+    out = np.empty(len(valid), dtype=object)
+    if blob.isascii():
+        # byte offsets == character offsets: decode once, slice the str
+        text = blob.decode("ascii")
+        out[:] = [text[s:e] for s, e in zip(rel[:-1], rel[1:])]
+    else:
+        out[:] = [blob[s:e].decode("utf-8") for s, e in zip(rel[:-1], rel[1:])]
+    out[~np.asarray(valid)] = None
+    return out
+
+
+class StoreReader:
+    """Memory-mapped access to a store written by StoreWriter."""
+
+    def __init__(self, path):
+        self.path = path
+        self.schema = read_schema(path)
+        self.rows = self.schema["rows"]
+        self.columns = {c["name"]: c for c in self.schema["columns"]}
+        self._dictionaries = {}
+
+    def _string_parts(self, name, count):
+        offsets = _map(self.path, f"{name}.offsets.bin", np.int64, count + 1)
+        data = _map(self.path, f"{name}.data.bin", np.uint8, int(offsets[-1]) if count else 0)
+        valid = _map(self.path, f"{name}.valid.bin", np.bool_, count)
+        return data, offsets, valid
+
+    def dictionary(self, name):
+        """Distinct values of a category/codes column, decoded once per reader."""
+        if name not in self._dictionaries:
+            size = self.columns[name]["dictionary_size"]
+            self._dictionaries[name] = _decode_strings(*self._string_parts(f"{name}.dict", size))
+        return self._dictionaries[name]
+
+    def coded_lists(self, name, start=0, stop=None):
+        """A codes or list column over rows [start, stop) as CodedLists."""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        if self.columns[name]["kind"] == "list":
+            return CodedLists.from_values(*self.list_column(name, start, stop))
+        list_offsets = _map(self.path, f"{name}.list_offsets.bin", np.int64, self.rows + 1)
+        first, last = int(list_offsets[start]), int(list_offsets[stop])
+        codes = _map(self.path, f"{name}.codes.bin", np.int32, int(list_offsets[-1]))
+        return CodedLists(np.array(codes[first:last]), np.asarray(list_offsets[start:stop + 1]) - first,
+                          self.dictionary(name))
+
+    def list_column(self, name, start=0, stop=None):
+        """(values, offsets) for a list column over rows [start, stop), offsets rebased to 0."""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        list_offsets = _map(self.path, f"{name}.list_offsets.bin", np.int64, self.rows + 1)
+        first, last = int(list_offsets[start]), int(list_offsets[stop])
+        total_items = int(list_offsets[-1])
+        data, offsets, valid = self._string_parts(name, total_items)
+        values = _decode_strings(data, offsets[first:last + 1], valid[first:last])
+        return values, np.asarray(list_offsets[start:stop + 1]) - first
+
+    def column(self, name, start=0, stop=None):
+        """One column over rows [start, stop) as a pandas Series."""
+        from movie_parsing import to_lists
+
+        stop = self.rows if stop is None else min(stop, self.rows)
+        col = self.columns[name]
+        kind = col["kind"]
+        if kind == "numeric":
+            values = _map(self.path, f"{name}.bin", np.dtype(col["dtype"]), self.rows)[start:stop]
+            if np.dtype(col["dtype"]).kind != "f":
+                valid = np.asarray(_map(self.path, f"{name}.valid.bin", np.bool_, self.rows)[start:stop])
+                if not valid.all():
+                    array_type = pd.arrays.BooleanArray if col["dtype"] == "bool" else pd.arrays.IntegerArray
+                    return pd.Series(array_type(np.array(values), ~valid), name=name)
+            return pd.Series(np.asarray(values), name=name)
+        if kind == "datetime":
+            values = _map(self.path, f"{name}.bin", np.int64, self.rows)[start:stop]
+            return pd.Series(np.asarray(values).view("datetime64[ns]"), name=name)
+        if kind == "string":
+            data, offsets, valid = self._string_parts(name, self.rows)
+            return pd.Series(_decode_strings(data, offsets[start:stop + 1], valid[start:stop]), name=name)
+        if kind == "category":
+            codes = _map(self.path, f"{name}.codes.bin", np.int32, self.rows)[start:stop]
+            categories = pd.Index(self.dictionary(name), dtype=object)
+            return pd.Series(pd.Categorical.from_codes(np.asarray(codes), categories=categories), name=name)
+        if kind == "codes":
+            return pd.Series(self.coded_lists(name, start, stop).to_lists(), name=name, dtype=object)
+        values, offsets = self.list_column(name, start, stop)
+        return pd.Series(to_lists(values, offsets), name=name, dtype=object)
+
+    def frame(self, columns=None, start=0, stop=None):
+        columns = list(self.columns) if columns is None else columns
+        stop = self.rows if stop is None else min(stop, self.rows)
+        df = pd.DataFrame({name: self.column(name, start, stop) for name in columns})
+        df.index = pd.RangeIndex(start, stop)
+        return df
+
+    def chunks(self, chunksize, columns=None):
+        """Yield DataFrames of `chunksize` rows; only one chunk is decoded at a time."""
+        for start in range(0, self.rows, chunksize):
+            yield self.frame(columns, start, start + chunksize)
+
+    def compact(self, columns=None, start=0, stop=None):
+        """Rows [start, stop) as CompactMovies: list/codes columns as CodedLists, the rest compacted."""
+        columns = list(self.columns) if columns is None else columns
+        stop = self.rows if stop is None else min(stop, self.rows)
+        listed = [c for c in columns if self.columns[c]["kind"] in ("list", "codes")]
+        frame = pd.DataFrame({name: self.column(name, start, stop) for name in columns if name not in listed})
+        frame.index = pd.RangeIndex(start, stop)
+        # categories were chosen when the store was written; only shrink the numbers
+        return CompactMovies(compact_dtypes(frame, category_max_ratio=0),
+                             {name: self.coded_lists(name, start, stop) for name in listed})
+
+    def compact_chunks(self, chunksize, columns=None):
+        """Like chunks(), as CompactMovies."""
+        for start in range(0, self.rows, chunksize):
+            yield self.compact(columns, start, start + chunksize)
+
+
+def read_table(path, columns=None):
+    """Read a whole store (or some columns of it) into a DataFrame."""
+    return StoreReader(path).frame(columns)
+
+
+def read_compact(path, columns=None):
+    """Read a whole store (or some columns of it) as CompactMovies."""
+    return StoreReader(path).compact(columns)
+
+
+# -----------------------------
+# CSV import / export
+# -----------------------------
+def import_csv(csv_path, path, chunksize=100_000, dtypes=None):
+    """Convert a CSV into a store, chunk by chunk (dtypes: see StoreWriter)."""
+    with StoreWriter(path, dtypes) as writer:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            writer.append(chunk)
+
+
+def export_csv(path, csv_path, chunksize=100_000):
+    """Write a store back out as CSV (list columns become Python list reprs)."""
+    reader = StoreReader(path)
+    for i, chunk in enumerate(reader.chunks(chunksize)):
+        chunk.to_csv(csv_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
@@ -0,0 +1,137 @@
+# movie_summaries.py
+"""
+Pre-aggregated summary tables, kept up to date by movie_load.py.
+
+    genre_summary     genre_id -> name, movie_count, rating_sum/rating_count, avg_rating
+    year_summary      release_year -> movie_count, profit_sum, avg_profit
+    director_summary  director_text -> movie_count, profit_sum, avg_profit
+
+The tables are defined with the rest of the schema in movie_load.py. Loads
+maintain them from deltas: before a batch replaces its movies, the batch's
+current contribution to every summary is read (one grouped query per summary,
+restricted to the batch's ids); after the write it is read again, and only the
+difference is upserted. Reports then read a handful of rows by primary key or
+an index instead of scanning movies and the link tables.
+"""
+
+from sqlalchemy import bindparam, text
+
+LOOKUP_CHUNK = 900  # ids per IN (...) query
+
+# source: SELECT producing the summary's key, attribute and additive columns
+# (with those names) for the movies matching {movie_filter}. The profit reports
+# only count movies with a release year, like movie_analysis.py always has.
+SUMMARIES = [
+    dict(table="genre_summary", key="genre_id", attributes=["name"],
+         sums=["movie_count", "rating_sum", "rating_count"],
+         average=("avg_rating", "rating_sum", "rating_count"),
+         source="""
+            SELECT mg.genre_id AS genre_id, g.name AS name, COUNT(*) AS movie_count,
+                   COALESCE(SUM(m.vote_average), 0) AS rating_sum, COUNT(m.vote_average) AS rating_count
+            FROM movie_genres mg
+            JOIN movies m ON m.id = mg.movie_id
+            JOIN genres g ON g.id = mg.genre_id
+            WHERE {movie_filter}
+            GROUP BY mg.genre_id, g.name"""),
+    dict(table="year_summary", key="release_year", attributes=[],
+         sums=["movie_count", "profit_sum"],
+         average=("avg_profit", "profit_sum", "movie_count"),
+         source="""
+            SELECT m.release_year AS release_year, COUNT(*) AS movie_count, SUM(m.profit) AS profit_sum
+            FROM movies m
+            WHERE m.release_year IS NOT NULL AND m.profit IS NOT NULL AND {movie_filter}
+            GROUP BY m.release_year"""),
+    dict(table="director_summary", key="director_text", attributes=[],
+         sums=["movie_count", "profit_sum"],
+         average=("avg_profit", "profit_sum", "movie_count"),
+         source="""
+            SELECT m.director_text AS director_text, COUNT(*) AS movie_count, SUM(m.profit) AS profit_sum
+            FROM movies m
+            WHERE m.director_text IS NOT NULL AND m.release_year IS NOT NULL AND m.profit IS NOT NULL
+              AND {movie_filter}
+            GROUP BY m.director_text"""),
+]
+
+
+def _columns(summary):
+    return [summary["key"]] + summary["attributes"] + summary["sums"]
+
+
+def _movie_column(summary):
+    return "mg.movie_id" if summary["table"] == "genre_summary" else "m.id"
+
+
+def contributions(conn, ids):
+    """
+    What the movies with these ids currently add to each summary:
+    {table: {key: row tuple (key, attributes..., sums...)}}.
+    """
+    ids = list(ids)
+    result = {s["table"]: {} for s in SUMMARIES}
+    for summary in SUMMARIES:
+        query = text(summary["source"].format(movie_filter=f"{_movie_column(summary)} IN :ids"))
+        query = query.bindparams(bindparam("ids", expanding=True))
+        rows = result[summary["table"]]
+        for start in range(0, len(ids), LOOKUP_CHUNK):
+            for row in conn.execute(query, {"ids": ids[start:start + LOOKUP_CHUNK]}):
+                rows[row[0]] = tuple(row)
+    return result
+
+
+def _upsert(summary):
+    table, key, average = summary["table"], summary["key"], summary["average"]
+    columns = _columns(summary) + [average[0]]
+    updates = [f"{c} = excluded.{c}" for c in summary["attributes"]]
+    updates += [f"{c} = {table}.{c} + excluded.{c}" for c in summary["sums"]]
+    updates.append(f"{average[0]} = ({table}.{average[1]} + excluded.{average[1]}) * 1.0 / "
+                   f"NULLIF({table}.{average[2]} + excluded.{average[2]}, 0)")
+    return text(f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(':' + c for c in columns)}) "
+                f"ON CONFLICT ({key}) DO UPDATE SET {', '.join(updates)}")
+
+
+def apply_delta(conn, before, after):
+    """Upsert after - before (outputs of contributions()) into the summary tables."""
+    for summary in SUMMARIES:
+        table = summary["table"]
+        old, new = before.get(table, {}), after.get(table, {})
+        width = 1 + len(summary["attributes"])
+        sums = summary["sums"]
+        params = []
+        for key in old.keys() | new.keys():
+            base = new.get(key) or old[key]
+            deltas = [(new[key][width + i] if key in new else 0) - (old[key][width + i] if key in old else 0)
+                      for i in range(len(sums))]
+            if not any(deltas):
+                continue
+            values = dict(zip(_columns(summary), list(base[:width]) + deltas))
+            numerator, denominator = values[summary["average"][1]], values[summary["average"][2]]
+            values[summary["average"][0]] = numerator / denominator if denominator > 0 else None
+            params.append(values)
+        if params:
+            conn.execute(_upsert(summary), params)
+            conn.execute(text(f"DELETE FROM {table} WHERE movie_count <= 0"))
+
+
+def rebuild_summaries(conn):
+    """Recompute every summary table from the base tables."""
+    for summary in SUMMARIES:
+        table, average = summary["table"], summary["average"]
+        columns = ", ".join(_columns(summary))
+        conn.execute(text(f"DELETE FROM {table}"))
+        conn.execute(text(
+            f"INSERT INTO {table} ({columns}, {average[0]}) "
+            f"SELECT {columns}, {average[1]} * 1.0 / NULLIF({average[2]}, 0) "
+            f"FROM ({summary['source'].format(movie_filter='1 = 1')}) AS src"))
+
+
+def ensure_summaries(conn):
+    """Build the summaries once for a database that has movies but no summaries yet."""
+    has_movies = conn.execute(text("SELECT 1 FROM movies LIMIT 1")).first() is not None
+    has_summaries = any(conn.execute(text(f"SELECT 1 FROM {s['table']} LIMIT 1")).first() is not None
+                        for s in SUMMARIES)
+    if has_movies and not has_summaries:
+        print("Building summary tables from existing data")
+        rebuild_summaries(conn)
+        return True
+    return False
@@ -0,0 +1,225 @@
+# movie_synthetic.py
+"""
+Synthetic TMDB-shaped input for scaling tests.
+
+Writes tmdb_5000_movies.csv and tmdb_5000_credits.csv (same file names, columns
+and JSON blob formats as the Kaggle TMDB 5000 export) with any number of rows,
+so every stage can be run unchanged against a larger data folder:
+
+    python movie_synthetic.py 500k ../data/synthetic_500k
+
+Distributions follow the real export: 20 genres with Drama/Comedy/Thriller
+most common, ~2.5 genres per movie; cast lists around 20 long with a long
+tail; actors drawn from a pool with a power law, so popular names recur
+across many movies and only ~40% of cast credits are distinct people; ~20 crew
+entries per movie, one director for most films (some none, some two) from a
+pool of about one director per two movies; a quarter of budgets and
+revenues at 0 and lognormal otherwise; missing homepages, taglines, runtimes
+and release dates at roughly the real rates. Output is deterministic for a
+given seed, and rows are generated and written in chunks, so memory stays
+flat at any scale.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+SCALES = {"5k": 5_000, "50k": 50_000, "500k": 500_000, "5m": 5_000_000}
+CHUNK_ROWS = 20_000
+SEED = 5000
+
+# (TMDB id, name, weight)
+GENRES = [(18, "Drama", 2297), (35, "Comedy", 1722), (53, "Thriller", 1274), (28, "Action", 1154),
+          (10749, "Romance", 894), (12, "Adventure", 790), (80, "Crime", 696), (878, "Science Fiction", 535),
+          (27, "Horror", 519), (10751, "Family", 513), (14, "Fantasy", 424), (9648, "Mystery", 348),
+          (16, "Animation", 234), (36, "History", 197), (10402, "Music", 185), (10752, "War", 144),
+          (99, "Documentary", 110), (37, "Western", 82), (10769, "Foreign", 34), (10770, "TV Movie", 8)]
+LANGUAGES = [("en", "English", 0.86), ("fr", "Français", 0.03), ("es", "Español", 0.02),
+             ("de", "Deutsch", 0.02), ("zh", "普通话", 0.02), ("hi", "हिन्दी", 0.01),
+             ("ja", "日本語", 0.02), ("it", "Italiano", 0.02)]
+COUNTRIES = [("US", "United States of America"), ("GB", "United Kingdom"), ("FR", "France"),
+             ("DE", "Germany"), ("CA", "Canada"), ("IN", "India"), ("JP", "Japan"), ("AU", "Australia")]
+CREW_JOBS = [("Writing", "Screenplay"), ("Production", "Producer"), ("Production", "Executive Producer"),
+             ("Sound", "Original Music Composer"), ("Camera", "Director of Photography"),
+             ("Editing", "Editor"), ("Production", "Casting"), ("Art", "Production Design"),
+             ("Costume & Make-Up", "Costume Design"), ("Visual Effects", "Visual Effects Supervisor")]
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David",
+               "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah",
+               "Charles", "Karen", "Chris", "Zoë", "Sam", "Anna", "Ben", "Chloë", "Kate", "Tom", "Emma",
+               "Hugh", "Seán", "Penélope", "Renée", "Jean-Claude", "Mads", "Ingrid", "Rhys", "Ewan", "Amy",
+               "Priya", "Ken", "Yuki", "Omar", "Lupita", "Javier", "Gael", "Noémie", "Björn", "Dev", "Li"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+              "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Taylor", "Moore", "Jackson", "Martin",
+              "O'Neill", "O'Brien", "McGregor", "Saldaña", "Brühl", "Nyong'o", "Bardem", "García Bernal",
+              "Watanabe", "Patel", "Kapoor", "Chen", "Wang", "Kim", "Park", "Nguyen", "Müller", "Dubois",
+              "Rossi", "Novak", "Kowalski", "Jensen", "Larsen", "Berg", "Walsh", "Murphy", "Kelly", "Byrne",
+              "Stone", "Hill", "Cruz", "Reyes"]
+WORDS = ["Last", "Night", "Dark", "Return", "City", "Love", "War", "Secret", "Lost", "Star", "Kingdom",
+         "Shadow", "Dream", "Fire", "Road", "Home", "Island", "Storm", "Summer", "Ghost", "Heart", "Game"]
+
+
+@lru_cache(maxsize=1 << 16)
+def person_name(index):
+    """Deterministic, mostly realistic name for a person id (pool of any size)."""
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    rest = index // len(FIRST_NAMES)
+    last = LAST_NAMES[rest % len(LAST_NAMES)]
+    rest //= len(LAST_NAMES)
+    if rest == 0:
+        return f"{first} {last}"
+    initial = chr(ord("A") + rest % 26)
+    rest //= 26
+    return f"{first} {initial}. {last}" + (f" {rest + 1}" if rest else "")
+
+
+@lru_cache(maxsize=1 << 16)
+def _quoted(text):
+    return json.dumps(text, ensure_ascii=False)
+
+
+def _power_law(rng, pool, size, skew=2.2):
+    """Indices in [0, pool), small indices far more likely (heavy name reuse)."""
+    return np.minimum((pool * rng.random(size) ** skew).astype(np.int64), pool - 1)
+
+
+def _credit_id(rnd):
+    return f"{rnd.getrandbits(96):024x}"
+
+
+def _named_list(items):
+    return "[" + ", ".join(f'{{"id": {i}, "name": {_quoted(n)}}}' for i, n in items) + "]"
+
+
+def _movies_chunk(rng, first_id, rows):
+    genre_weights = np.array([w for _, _, w in GENRES], dtype=float)
+    genre_weights /= genre_weights.sum()
+    genre_counts = np.clip(rng.poisson(2.5, rows), 0, 7)
+    genre_json = []
+    for count in genre_counts:
+        picked = rng.choice(len(GENRES), size=count, replace=False, p=genre_weights)
+        genre_json.append(_named_list((GENRES[g][0], GENRES[g][1]) for g in picked))
+
+    budget = np.where(rng.random(rows) < 0.22, 0, rng.lognormal(16.8, 1.3, rows)).astype(np.int64)
+    revenue = np.where(rng.random(rows) < 0.28, 0,
+                       np.maximum(budget, 1e5) * rng.lognormal(0.6, 1.1, rows)).astype(np.int64)
+    days = rng.integers(0, 102 * 365, rows)
+    release = (np.datetime64("1916-01-01") + days.astype("timedelta64[D]")).astype(str).astype(object)
+    release[rng.random(rows) < 0.001] = None
+    runtime = np.round(np.clip(rng.normal(107, 22, rows), 0, 338)).astype(object)
+    runtime[rng.random(rows) < 0.005] = None
+
+    lang_p = np.array([p for _, _, p in LANGUAGES])
+    lang = rng.choice(len(LANGUAGES), size=rows, p=lang_p / lang_p.sum())
+    words = rng.integers(0, len(WORDS), (rows, 3))
+    ids = np.arange(first_id, first_id + rows)
+    titles = [f"The {WORDS[a]} {WORDS[b]} {i}" for (a, b, _), i in zip(words, ids)]
+    homepage = np.where(rng.random(rows) < 0.35, [f"http://www.movie{i}.com/" for i in ids], None)
+    tagline = np.where(rng.random(rows) < 0.83, [f"{WORDS[c]} is only the beginning." for _, _, c in words], None)
+    country = rng.integers(0, len(COUNTRIES), rows)
+
+    return pd.DataFrame({
+        "budget": budget,
+        "genres": genre_json,
+        "homepage": homepage,
+        "id": ids,
+        "keywords": [_named_list([(1000 + a, WORDS[a].lower()), (1000 + c, WORDS[c].lower())]) for a, _, c in words],
+        "original_language": [LANGUAGES[i][0] for i in lang],
+        "original_title": titles,
+        "overview": [f"A story about {WORDS[a].lower()} and {WORDS[b].lower()}." for a, b, _ in words],
+        "popularity": np.round(rng.lognormal(2.5, 1.2, rows), 6),
+        "production_companies": [_named_list([(int(c) + 1, f"{LAST_NAMES[int(c) % len(LAST_NAMES)]} Pictures")])
+                                 for c in rng.integers(0, 5000, rows)],
+        "production_countries": ['[{"iso_3166_1": "%s", "name": "%s"}]' % COUNTRIES[c] for c in country],
+        "release_date": release,
+        "revenue": revenue,
+        "runtime": runtime,
+        "spoken_languages": ['[{"iso_639_1": "%s", "name": %s}]' % (LANGUAGES[i][0], _quoted(LANGUAGES[i][1]))
+                             for i in lang],
+        "status": np.where(rng.random(rows) < 0.998, "Released", "Rumored"),
+        "tagline": tagline,
+        "title": titles,
+        "vote_average": np.round(np.clip(rng.normal(6.1, 1.2, rows), 0, 10), 1),
+        "vote_count": rng.lognormal(5.5, 1.6, rows).astype(np.int64),
+    })
+
+
+def _credits_chunk(rng, rnd, movies, actor_pool, crew_pool, director_pool):
+    rows = len(movies)
+    cast_sizes = np.clip(rng.lognormal(2.8, 0.7, rows), 0, 220).astype(np.int64)
+    cast_sizes[rng.random(rows) < 0.01] = 0
+    crew_sizes = np.clip(rng.lognormal(2.7, 0.9, rows), 0, 430).astype(np.int64)
+    director_counts = rng.choice([0, 1, 2], size=rows, p=[0.01, 0.91, 0.08])
+
+    cast_json, crew_json = [], []
+    for size, crew_size, n_directors in zip(cast_sizes, crew_sizes, director_counts):
+        actors = dict.fromkeys(_power_law(rng, actor_pool, size).tolist())  # unique, drawn order
+        cast_json.append("[" + ", ".join(
+            f'{{"cast_id": {pos + 1}, "character": {_quoted(f"Character {pos + 1}")}, '
+            f'"credit_id": "{_credit_id(rnd)}", "gender": {a % 3}, "id": {a + 1}, '
+            f'"name": {_quoted(person_name(a))}, "order": {pos}}}'
+            for pos, a in enumerate(actors)) + "]")
+
+        directors = dict.fromkeys(_power_law(rng, director_pool, n_directors, 1.6).tolist())
+        entries = [("Directing", "Director", d) for d in directors]
+        jobs = rng.integers(0, len(CREW_JOBS), crew_size)
+        people = _power_law(rng, crew_pool, crew_size, 1.5).tolist()
+        entries += [(CREW_JOBS[j][0], CREW_JOBS[j][1], p) for j, p in zip(jobs.tolist(), people)]
+        rnd.shuffle(entries)
+        crew_json.append("[" + ", ".join(
+            f'{{"credit_id": "{_credit_id(rnd)}", "department": "{dept}", "gender": {p % 3}, '
+            f'"id": {actor_pool + p + 1}, "job": "{job}", "name": {_quoted(person_name(actor_pool + p))}}}'
+            for dept, job, p in entries) + "]")
+
+    return pd.DataFrame({"movie_id": movies["id"].to_numpy(), "title": movies["title"].to_numpy(),
+                         "cast": cast_json, "crew": crew_json})
+
+
+def generate(rows, out_dir, seed=SEED, chunk_rows=CHUNK_ROWS, actors_per_movie=12, crew_per_movie=12):
+    """
+    Write rows synthetic movies (+ credits) to out_dir/tmdb_5000_movies.csv and
+    out_dir/tmdb_5000_credits.csv. Returns the two paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    movies_file = os.path.join(out_dir, "tmdb_5000_movies.csv")
+    credits_file = os.path.join(out_dir, "tmdb_5000_credits.csv")
+    actor_pool = max(int(rows * actors_per_movie), 50)
+    crew_pool = max(int(rows * crew_per_movie), 50)
+    director_pool = max(rows // 2, 10)  # directors are the first people of the crew pool
+
+    for start in range(0, rows, chunk_rows):
+        # one generator per chunk keeps output identical whatever the chunk order
+        rng = np.random.default_rng([seed, start])
+        rnd = random.Random(seed * 1_000_003 + start)
+        movies = _movies_chunk(rng, start + 1, min(chunk_rows, rows - start))
+        credits = _credits_chunk(rng, rnd, movies, actor_pool, crew_pool, director_pool)
+        first = start == 0
+        movies.to_csv(movies_file, mode="w" if first else "a", header=first, index=False)
+        credits.to_csv(credits_file, mode="w" if first else "a", header=first, index=False)
+    return movies_file, credits_file
+
+
+def parse_scale(text):
+    """'50k' / '5M' / '1234' -> row count."""
+    key = text.lower()
+    if key in SCALES:
+        return SCALES[key]
+    if key[-1:] in "km":
+        return int(float(key[:-1]) * (1_000 if key[-1] == "k" else 1_000_000))
+    return int(key)
+
+
+if __name__ == "__main__":
+    rows = parse_scale(sys.argv[1]) if len(sys.argv) > 1 else SCALES["5k"]
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join("..", "data", f"synthetic_{rows}")
+    started = time.perf_counter()
+    movies_file, credits_file = generate(rows, out_dir)
+    elapsed = time.perf_counter() - started
+    size = (os.path.getsize(movies_file) + os.path.getsize(credits_file)) / 1e6
+    print(f"{rows} movies written to {out_dir} ({size:.0f} MB) in {elapsed:.1f}s")
@@ -0,0 +1,324 @@
+# movie_validation.py
+"""
+Data-quality gate between the EDA transform and the load.
+
+The checks are declared once, in RULES: a reason code, a kind of check and
+the column it looks at. Every kind (CHECKS) tests a whole column of a chunk at
+once and returns a mask of the failing rows:
+    required     value missing (or an empty string)
+    numeric      value present but not a number
+    integer      number with a fractional part
+    range        number below low / above high (missing values pass)
+    unique       value already seen, earlier in the chunk or in an earlier chunk
+    equals       value differs from an expression over other columns (DataFrame.eval),
+                 or only one of the two is missing
+    list_length  items in a list column disagree with the row's count column
+                 (at most `limit` items are kept; a scalar column counts as one)
+A rule whose columns the input does not have is skipped.
+
+run_validation() streams the transformed store chunk by chunk: rows passing
+every rule are appended to the validated store (same schema, what the load
+reads), and the others go to the quarantine store, one row per failed rule
+with its reason code, the offending value and the whole input row as JSON.
+The load then writes them to the quarantine table in one statement, so bad
+rows neither raise inside the load loop nor vanish silently. The validated
+store records the input_fingerprint of the transformed store it was split
+from (SOURCE_FILE), so a later transform makes it stale (validated_from).
+
+Run from the scripts folder:
+    python movie_validation.py      # ../data/movies_transformed.store -> validated + quarantine stores
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from movie_compact import as_compact
+from movie_instrumentation import stage, write_metrics
+from movie_journal import input_fingerprint
+from movie_store import StoreReader, StoreWriter, read_schema, write_table
+
+# -----------------------------
+# Config
+# -----------------------------
+TRANSFORMED_STORE = os.path.join("..", "data", "movies_transformed.store")
+VALIDATED_STORE = os.path.join("..", "data", "movies_validated.store")
+QUARANTINE_STORE = os.path.join("..", "data", "movies_quarantine.store")
+SOURCE_FILE = "source.json"  # in the validated store: fingerprint of the transformed store it came from
+CHUNK_ROWS = 100_000
+MAX_RUNTIME = 1_000  # minutes
+YEAR_RANGE = (1870, 2100)
+LIST_COLUMNS = ["main_cast", "directors"]  # coded when the input is a DataFrame
+
+QUARANTINE_COLUMNS = ["input_row", "reason", "movie_id", "column_name", "value", "record"]
+QUARANTINE_DTYPES = dict(input_row="int64", reason="string", movie_id="int64", column_name="string",
+                         value="string", record="string")
+
+
+# -----------------------------
+# Checks (whole column at once)
+# -----------------------------
+def _present(series):
+    """True where a value is there; empty or blank strings count as missing."""
+    present = series.notna().to_numpy()
+    if series.dtype == object or isinstance(series.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+        text = series.astype(object).to_numpy()
+        is_str = present & np.fromiter((isinstance(v, str) for v in text), dtype=bool, count=len(text))
+        present[is_str] = pd.Series(text[is_str], dtype=object).str.strip().ne("").to_numpy()
+    return present
+
+
+def _numbers(series):
+    """float64 values with NaN for missing or non-numeric cells."""
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.to_numeric(series.astype(object), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def check_required(data, column, state):
+    return ~_present(data.frame[column])
+
+
+def check_numeric(data, column, state):
+    series = data.frame[column]
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return np.zeros(len(series), dtype=bool)
+    return _present(series) & np.isnan(_numbers(series))
+
+
+def check_integer(data, column, state):
+    values = _numbers(data.frame[column])
+    return np.isfinite(values) & (values != np.trunc(values))
+
+
+def check_range(data, column, state, low=None, high=None):
+    values = _numbers(data.frame[column])
+    failed = np.zeros(len(values), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        if low is not None:
+            failed |= values < low
+        if high is not None:
+            failed |= values > high
+    return failed
+
+
+def check_unique(data, column, state):
+    series = data.frame[column]
+    present = series.notna().to_numpy()
+    values = series[present].to_numpy()
+    repeated = pd.Series(values).duplicated(keep="first").to_numpy()
+    seen = state.get("seen")
+    if seen is not None and len(seen):
+        repeated |= np.isin(values, seen)
+    state["seen"] = values if seen is None else np.union1d(seen, values)
+    failed = np.zeros(len(series), dtype=bool)
+    failed[present] = repeated
+    return failed
+
+
+def check_equals(data, column, state, expected):
+    frame = data.frame
+    try:
+        target = frame.eval(expected)
+    except (KeyError, NameError, AttributeError, pd.errors.UndefinedVariableError):
+        return None
+    except TypeError:
+        # text in a numeric column: those rows get no expected value (and fail)
+        text = [c for c in frame.columns if frame[c].dtype == object]
+        target = frame.assign(**{c: _numbers(frame[c]) for c in text}).eval(expected)
+    values, target = _numbers(data.frame[column]), _numbers(pd.Series(target))
+    missing, target_missing = np.isnan(values), np.isnan(target)
+    return (missing != target_missing) | (~missing & ~target_missing & (values != target))
+
+
+def check_list_length(data, column, state, count, limit=None):
+    if count not in data.frame.columns:
+        return None
+    if column in data.lists:
+        lengths = data.lists[column].lengths()
+    else:
+        lengths = _present(data.frame[column]).astype(np.int64)
+    counts = _numbers(data.frame[count])
+    expected = np.minimum(counts, limit) if limit is not None else counts
+    return np.isnan(counts) | (lengths != expected)
+
+
+CHECKS = {
+    "required": check_required,
+    "numeric": check_numeric,
+    "integer": check_integer,
+    "range": check_range,
+    "unique": check_unique,
+    "equals": check_equals,
+    "list_length": check_list_length,
+}
+
+
+# -----------------------------
+# Rules
+# -----------------------------
+class Rule:
+    """One check: the rows for which CHECKS[kind](data, column, state, **params) is True fail with `code`."""
+
+    def __init__(self, code, kind, column, **params):
+        if kind not in CHECKS:
+            raise ValueError(f"Unknown check kind: {kind}")
+        self.code = code
+        self.kind = kind
+        self.column = column
+        self.params = params
+
+    def failures(self, data, state):
+        """Failing-row mask for a CompactMovies chunk, or None when the rule does not apply to it."""
+        if self.column not in data.columns:
+            return None
+        return CHECKS[self.kind](data, self.column, state, **self.params)
+
+
+RULES = [
+    Rule("id_missing", "required", "id"),
+    Rule("id_not_integer", "integer", "id"),
+    Rule("id_not_positive", "range", "id", low=1),
+    Rule("id_duplicate", "unique", "id"),
+    Rule("title_missing", "required", "title"),
+    Rule("budget_not_numeric", "numeric", "budget"),
+    Rule("budget_negative", "range", "budget", low=0),
+    Rule("revenue_not_numeric", "numeric", "revenue"),
+    Rule("revenue_negative", "range", "revenue", low=0),
+    Rule("runtime_not_numeric", "numeric", "runtime"),
+    Rule("runtime_out_of_range", "range", "runtime", low=0, high=MAX_RUNTIME),
+    Rule("vote_average_out_of_range", "range", "vote_average", low=0, high=10),
+    Rule("release_year_out_of_range", "range", "release_year", low=YEAR_RANGE[0], high=YEAR_RANGE[1]),
+    Rule("profit_mismatch", "equals", "profit", expected="revenue - budget"),
+    Rule("release_year_mismatch", "equals", "release_year", expected="release_date.dt.year"),
+    Rule("release_month_mismatch", "equals", "release_month", expected="release_date.dt.month"),
+    Rule("genre_count_mismatch", "list_length", "main_genre", count="num_genres", limit=1),
+    Rule("cast_count_mismatch", "list_length", "main_cast", count="num_cast", limit=3),
+]
+
+
+# -----------------------------
+# Splitting chunks
+# -----------------------------
+def _cell_text(data, column, rows):
+    """The column's values at rows as text (None where missing), for the quarantine."""
+    if column in data.lists:
+        return [json.dumps(v) for v in data.lists[column].take(rows).to_lists()]
+    values = data.frame[column].iloc[rows].astype(object).to_numpy()
+    return [None if pd.isna(v) else str(v) for v in values]
+
+
+def _records(data, rows):
+    """Whole input rows as JSON objects (lists as arrays, missing values as null)."""
+    df = data.take(rows).to_frame()
+    df = df.astype(object).where(df.notna(), None)
+    return [json.dumps(r, default=str) for r in df.to_dict("records")]
+
+
+class Validator:
+    """Applies the rules to a stream of chunks; `unique` checks remember the ids of earlier chunks."""
+
+    def __init__(self, rules=None):
+        self.rules = list(RULES if rules is None else rules)
+        self.state = {rule.code: {} for rule in self.rules}
+        self.rows = 0
+        self.failures = {}  # reason code -> rows failed
+
+    def split(self, data):
+        """(rows passing every rule as CompactMovies, quarantine DataFrame of the others)."""
+        data = as_compact(data, LIST_COLUMNS)
+        bad = np.zeros(len(data), dtype=bool)
+        parts = []
+        for rule in self.rules:
+            failed = rule.failures(data, self.state[rule.code])
+            if failed is None or not failed.any():
+                continue
+            rows = np.flatnonzero(failed)
+            bad |= failed
+            self.failures[rule.code] = self.failures.get(rule.code, 0) + len(rows)
+            ids = pd.to_numeric(data.frame["id"].iloc[rows], errors="coerce") if "id" in data.frame \
+                else pd.Series(np.nan, index=rows)
+            parts.append(pd.DataFrame(dict(input_row=self.rows + rows, reason=rule.code,
+                                           movie_id=ids.to_numpy(dtype=np.float64, na_value=np.nan),
+                                           column_name=rule.column, value=_cell_text(data, rule.column, rows))))
+        quarantined = pd.concat(parts, ignore_index=True) if parts else empty_quarantine()
+        if len(quarantined):
+            failed_rows = np.flatnonzero(bad)
+            records = dict(zip(self.rows + failed_rows, _records(data, failed_rows)))
+            quarantined["record"] = quarantined["input_row"].map(records)
+            quarantined["movie_id"] = quarantined["movie_id"].astype("Int64")
+        self.rows += len(data)
+        return data.take(np.flatnonzero(~bad)), quarantined[QUARANTINE_COLUMNS]
+
+
+def empty_quarantine():
+    return pd.DataFrame({c: pd.Series(dtype="Int64" if QUARANTINE_DTYPES[c] == "int64" else object)
+                         for c in QUARANTINE_COLUMNS})
+
+
+def validate_chunks(chunks, rules=None):
+    """Generator of (valid CompactMovies, quarantine DataFrame) per input chunk."""
+    validator = Validator(rules)
+    for chunk in chunks:
+        yield validator.split(chunk)
+
+
+# -----------------------------
+# Stage entry point
+# -----------------------------
+def store_dtypes(path):
+    """StoreWriter dtypes reproducing a store's schema."""
+    dtypes = {}
+    for col in read_schema(path)["columns"]:
+        kind = col["kind"]
+        dtypes[col["name"]] = ("datetime64[ns]" if kind == "datetime" else
+                               col["dtype"] if kind == "numeric" else kind)
+    return dtypes
+
+
+def validated_from(validated_path, transformed_path):
+    """True when validated_path was written by run_validation from transformed_path as it is now."""
+    try:
+        with open(os.path.join(validated_path, SOURCE_FILE), encoding="utf-8") as f:
+            source = json.load(f)
+    except (OSError, ValueError):
+        return False
+    fingerprint = input_fingerprint(transformed_path)
+    return fingerprint is not None and source.get("fingerprint") == fingerprint
+
+
+def run_validation(transformed_path=TRANSFORMED_STORE, validated_path=VALIDATED_STORE,
+                   quarantine_path=QUARANTINE_STORE, chunk_rows=CHUNK_ROWS, rules=None):
+    """
+    Split the transformed store into the validated store and the quarantine
+    store; returns the number of valid rows.
+    """
+    reader = StoreReader(transformed_path)
+    validator = Validator(rules)
+    quarantined = []
+    with stage("validate", rows_in=reader.rows) as s, \
+            StoreWriter(validated_path, store_dtypes(transformed_path)) as writer:
+        for chunk in reader.compact_chunks(chunk_rows):
+            valid, bad = validator.split(chunk)
+            writer.append(valid)
+            if len(bad):
+                quarantined.append(bad)
+        s.rows_out = writer.rows
+    write_table(quarantine_path, pd.concat(quarantined, ignore_index=True) if quarantined else empty_quarantine(),
+                QUARANTINE_DTYPES)
+    # written last: a validated store without it (or from other input) is not loaded as current
+    with open(os.path.join(validated_path, SOURCE_FILE), "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": input_fingerprint(transformed_path)}, f)
+    held_back = reader.rows - writer.rows
+    print(f"Validated {reader.rows} movies: {writer.rows} passed, {held_back} quarantined")
+    for code, rows in sorted(validator.failures.items(), key=lambda kv: -kv[1]):
+        print(f"  {code}: {rows}")
+    return writer.rows
+
+
+if __name__ == "__main__":
+    run_validation()
+    print("Validated dataset saved as", VALIDATED_STORE, "- quarantined rows in", QUARANTINE_STORE)
+    write_metrics("movie_validation")
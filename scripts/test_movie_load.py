@@ -0,0 +1,92 @@
+# test_movie_load.py
+"""
+Load checks on a small generated input (run from the scripts folder: python -m pytest)
+"""
+
+import threading
+import time
+from functools import partial
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+import movie_load
+
+ROWS = 3_000  # six BATCH_SIZE batches
+
+LINKS_BY_NAME = {
+    "genres": "SELECT l.movie_id, d.name FROM movie_genres l JOIN genres d ON d.id = l.genre_id",
+    "cast": "SELECT l.movie_id, d.name, l.cast_order FROM movie_cast l JOIN actors d ON d.id = l.actor_id",
+    "directors": "SELECT l.movie_id, d.name FROM movie_directors l JOIN directors d ON d.id = l.director_id",
+}
+
+
+def transformed_movies(rows=ROWS):
+    """movie_eda.py-shaped movies; every batch brings new genre, actor and director names."""
+    ids = range(1, rows + 1)
+    return pd.DataFrame({
+        "id": list(ids),
+        "title": [f"Movie {i}" for i in ids],
+        "original_title": [f"Orig {i}" for i in ids],
+        "overview": [f"Story number {i}" for i in ids],
+        "release_date": [f"{1950 + i % 70}-0{1 + i % 9}-1{i % 10}" for i in ids],
+        "budget": [i * 1000 for i in ids],
+        "revenue": [i * 1500 for i in ids],
+        "runtime": [80 + i % 60 for i in ids],
+        "vote_average": [round(i % 100 / 10, 1) for i in ids],
+        "main_genre": [f"Genre {i // 150}" for i in ids],
+        "num_genres": [1] * rows,
+        "main_cast": [str([f"Actor {i}", f"Actor {i // 3}", f"Actor {i * 7 % 500}"]) for i in ids],
+        "num_cast": [3] * rows,
+        "director": [f"Director {i // 4}" for i in ids],
+        "directors": [str([f"Director {i // 4}"]) for i in ids],
+        "profit": [i * 500 for i in ids],
+        "release_year": [1950 + i % 70 for i in ids],
+        "release_month": [1 + i % 9 for i in ids],
+    })
+
+
+def links_by_name(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as conn:
+        links = {name: sorted(conn.execute(text(sql)).all()) for name, sql in LINKS_BY_NAME.items()}
+    engine.dispose()
+    return links
+
+
+def load(db_path, mode="full"):
+    return movie_load.run_load(movie_load.prepare_frame(transformed_movies()), f"sqlite:///{db_path}", mode,
+                               str(db_path.with_suffix(".json")), fingerprint="test-input")
+
+
+def test_resume_after_failure_with_workers(tmp_path, monkeypatch):
+    load(tmp_path / "clean.db")
+    expected = links_by_name(tmp_path / "clean.db")
+
+    # second batch transaction fails while the other workers wait to commit theirs
+    calls = []
+    calls_lock = threading.Lock()
+    insert_batch = movie_load.insert_batch
+
+    def failing_insert_batch(conn, *rows):
+        with calls_lock:
+            calls.append(None)
+            call = len(calls)
+        written = insert_batch(conn, *rows)
+        if call == 2:
+            time.sleep(0.2)
+            raise RuntimeError("injected batch failure")
+        return written
+
+    run_batches = movie_load.run_batches
+    monkeypatch.setattr(movie_load, "run_batches", partial(run_batches, workers=3))
+    monkeypatch.setattr(movie_load, "insert_batch", failing_insert_batch)
+    with pytest.raises(RuntimeError, match="injected batch failure"):
+        load(tmp_path / "resumed.db")
+    assert len(calls) == 2  # no batch committed after the failure
+
+    monkeypatch.setattr(movie_load, "insert_batch", insert_batch)
+    count, _ = load(tmp_path / "resumed.db")
+    assert count == ROWS
+    assert links_by_name(tmp_path / "resumed.db") == expected
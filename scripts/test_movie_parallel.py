@@ -0,0 +1,53 @@
+# test_movie_parallel.py
+"""
+The partitioned transform against the serial one (run from the scripts folder: python -m pytest)
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import movie_eda
+
+GENRES = ["Drama", "Comedy", "Thriller", "Action", "Romance", "Adventure", "Crime", "Science Fiction",
+          "Horror", "Family", "Fantasy", "Mystery", "Animation", "History", "Music", "War"]
+
+
+def cleaned_movies(rows=4_000, seed=8):
+    """movie_cleaning.py-shaped movies: genres, cast and directors as JSON text."""
+    rng = np.random.default_rng(seed)
+    genres = [json.dumps([{"id": int(g), "name": GENRES[g]} for g in rng.choice(len(GENRES), rng.integers(0, 4),
+                                                                                   replace=False)])
+              for _ in range(rows)]
+    cast = [json.dumps([f"Actor {a}" for a in rng.zipf(1.5, rng.integers(0, 12)) % 3_000]) for _ in range(rows)]
+    director = [f"Director {d}" for d in rng.integers(0, rows // 4, rows)]
+    dates = pd.to_datetime("1950-01-01") + pd.to_timedelta(rng.integers(0, 25_000, rows), unit="D")
+    return pd.DataFrame({
+        "budget": rng.integers(0, 10**8, rows).astype(float),
+        "genres": genres,
+        "id": np.arange(1, rows + 1),
+        "original_title": [f"Orig {i}" for i in range(rows)],
+        "overview": [f"Story number {i}" for i in range(rows)],
+        "release_date": np.where(rng.random(rows) < 0.02, None, dates.strftime("%Y-%m-%d")),
+        "revenue": rng.integers(0, 3 * 10**8, rows).astype(float),
+        "runtime": np.where(rng.random(rows) < 0.05, np.nan, rng.integers(60, 200, rows)),
+        "title": [f"Movie {i}" for i in range(rows)],
+        "vote_average": rng.integers(0, 101, rows) / 10,
+        "cast": cast,
+        "directors": [json.dumps([d]) for d in director],
+        "director": director,
+    })
+
+
+@pytest.mark.parametrize("workers", [2, 3, 5])
+def test_parallel_transform_matches_serial(monkeypatch, workers):
+    df = cleaned_movies()
+    serial = movie_eda.transform_dataset(df, workers=1)
+    monkeypatch.setattr(movie_eda, "PARALLEL_MIN_ROWS", 1)
+    parallel = movie_eda.transform_dataset(df, workers=workers)
+    pd.testing.assert_frame_equal(parallel.frame, serial.frame)
+    assert list(parallel.lists) == list(serial.lists)
+    for name, coded in serial.lists.items():
+        assert parallel.lists[name].to_lists() == coded.to_lists()